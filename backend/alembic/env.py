@@ -1,18 +1,13 @@
 from logging.config import fileConfig
-import os
-from dotenv import load_dotenv
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
 
 # Import Base and all model modules to ensure they are registered with Base.metadata
 from app.models.base import Base
-from app.models import user, board, task, association_tables # Explicitly import models
+from app.models import user, board, task, association_tables, board_stats, task_flow, activity, job, reminder, outbox, attachment # Explicitly import models
 
-from app.db.database import SQLALCHEMY_DATABASE_URL
-
-# Load environment variables
-load_dotenv()
+from app.core.config import get_settings
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -25,7 +20,7 @@ if config.config_file_name is not None:
 
 # Set the database URL in the alembic.ini file
 section = config.config_ini_section
-config.set_section_option(section, "sqlalchemy.url", str(SQLALCHEMY_DATABASE_URL).replace('%', '%%'))
+config.set_section_option(section, "sqlalchemy.url", get_settings().database_url.replace('%', '%%'))
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -0,0 +1,38 @@
+"""Add outbox_events table for webhook delivery
+
+Revision ID: 2c8e5f7a9d31
+Revises: 6b1f3e8a9c24
+Create Date: 2026-10-19 05:21:07.614392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '2c8e5f7a9d31'
+down_revision = '6b1f3e8a9c24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+        sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+        sa.Column('event_id', sa.UUID(), nullable=False),
+        sa.Column('endpoint', sa.String(), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_endpoint_available_at', 'outbox_events', ['endpoint', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_endpoint_available_at', table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,80 @@
+"""Add task_transitions log and flow rollup tables
+
+Revision ID: 3f6b2d9c8a17
+Revises: e83a5c7f19d2
+Create Date: 2026-10-18 23:40:12.518304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6b2d9c8a17'
+down_revision = 'e83a5c7f19d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('task_transitions',
+        sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+        sa.Column('task_id', sa.UUID(), nullable=False),
+        sa.Column('board_id', sa.UUID(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('from_column_id', sa.UUID(), nullable=True),
+        sa.Column('to_column_id', sa.UUID(), nullable=True),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ),
+        sa.ForeignKeyConstraint(['from_column_id'], ['board_columns.id'], ),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ),
+        sa.ForeignKeyConstraint(['to_column_id'], ['board_columns.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_transitions_task_id_id', 'task_transitions', ['task_id', 'id'], unique=False)
+    op.create_table('column_flow_daily',
+        sa.Column('board_id', sa.UUID(), nullable=False),
+        sa.Column('column_id', sa.UUID(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('entered', sa.Integer(), nullable=False),
+        sa.Column('exited', sa.Integer(), nullable=False),
+        sa.Column('dwell_seconds', sa.Float(), nullable=False),
+        sa.Column('dwell_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ),
+        sa.ForeignKeyConstraint(['column_id'], ['board_columns.id'], ),
+        sa.PrimaryKeyConstraint('board_id', 'column_id', 'day')
+    )
+    op.create_table('board_flow_daily',
+        sa.Column('board_id', sa.UUID(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('created', sa.Integer(), nullable=False),
+        sa.Column('moved', sa.Integer(), nullable=False),
+        sa.Column('deleted', sa.Integer(), nullable=False),
+        sa.Column('lead_seconds', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ),
+        sa.PrimaryKeyConstraint('board_id', 'day')
+    )
+    op.create_table('rollup_watermarks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('last_event_id', sa.BigInteger(), nullable=False),
+        sa.Column('last_event_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+    # History before this point is unknown: seed the log with one "created" transition per
+    # live task, dated at its creation, so work-in-progress starts out correct.
+    op.execute("""
+        INSERT INTO task_transitions (task_id, board_id, kind, to_column_id, occurred_at)
+        SELECT t.id, c.board_id, 'created', t.column_id, coalesce(t.created_at, now())
+        FROM tasks t JOIN board_columns c ON c.id = t.column_id
+        WHERE NOT t.is_deleted AND NOT c.is_deleted
+        ORDER BY t.created_at
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('rollup_watermarks')
+    op.drop_table('board_flow_daily')
+    op.drop_table('column_flow_daily')
+    op.drop_index('ix_task_transitions_task_id_id', table_name='task_transitions')
+    op.drop_table('task_transitions')
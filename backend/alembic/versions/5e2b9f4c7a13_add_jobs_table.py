@@ -0,0 +1,52 @@
+"""Add jobs table and live-tasks-by-column index
+
+Revision ID: 5e2b9f4c7a13
+Revises: c7d3e5a1f248
+Create Date: 2026-10-19 01:12:44.608193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b9f4c7a13'
+down_revision = 'c7d3e5a1f248'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), server_default='queued', nullable=False),
+        sa.Column('created_by', sa.UUID(), nullable=False),
+        sa.Column('board_id', sa.UUID(), nullable=True),
+        sa.Column('params', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+        sa.Column('progress', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('locked_by', sa.String(), nullable=True),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_pending_created_at', 'jobs', ['created_at'], unique=False,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"))
+    op.create_index('ix_tasks_column_id_order_index_live', 'tasks', ['column_id', 'order_index'], unique=False,
+                    postgresql_where=sa.text('NOT is_deleted'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_column_id_order_index_live', table_name='tasks')
+    op.drop_index('ix_jobs_pending_created_at', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,57 @@
+"""Hash-partition tasks and task_assignees by board
+
+Revision ID: 6b1f3e8a9c24
+Revises: 8d4a6c2e1f70
+Create Date: 2026-10-19 04:12:40.118306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services import task_partitioning
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1f3e8a9c24'
+down_revision = '8d4a6c2e1f70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    # Large databases are converted online beforehand (python -m app.services.task_partitioning)
+    if task_partitioning.is_partitioned(connection):
+        return
+    # Otherwise the same steps back to back, inside the migration's transaction
+    task_partitioning.prepare(connection, task_partitioning.DEFAULT_PARTITIONS)
+    task_partitioning.backfill(connection)
+    task_partitioning.swap(connection)
+    task_partitioning.drop_old(connection)
+
+
+def downgrade() -> None:
+    columns = "id, title, description, column_id, due_date, priority, order_index, created_at, updated_at, is_deleted, version"
+    op.execute("CREATE TABLE tasks_unpartitioned (LIKE tasks INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE tasks_unpartitioned DROP COLUMN board_id")
+    op.execute(f"INSERT INTO tasks_unpartitioned ({columns}) SELECT {columns} FROM tasks")
+    op.execute("CREATE TABLE task_assignees_unpartitioned (task_id uuid NOT NULL, user_id uuid NOT NULL)")
+    op.execute("INSERT INTO task_assignees_unpartitioned SELECT task_id, user_id FROM task_assignees")
+    # Dropping the parents drops every partition with them
+    op.drop_table('task_assignees')
+    op.drop_table('tasks')
+    op.rename_table('tasks_unpartitioned', 'tasks')
+    op.rename_table('task_assignees_unpartitioned', 'task_assignees')
+
+    op.create_primary_key('tasks_pkey', 'tasks', ['id'])
+    op.create_foreign_key('tasks_column_id_fkey', 'tasks', 'board_columns', ['column_id'], ['id'])
+    op.create_index('ix_tasks_is_deleted', 'tasks', ['is_deleted'], unique=False)
+    op.create_index('ix_tasks_column_id_order_index_live', 'tasks', ['column_id', 'order_index'], unique=False,
+                    postgresql_where=sa.text('NOT is_deleted'))
+    op.create_index('ix_tasks_due_date_live', 'tasks', ['due_date'], unique=False,
+                    postgresql_where=sa.text('NOT is_deleted'))
+    op.create_primary_key('task_assignees_pkey', 'task_assignees', ['task_id', 'user_id'])
+    op.create_foreign_key('task_assignees_task_id_fkey', 'task_assignees', 'tasks', ['task_id'], ['id'])
+    op.create_foreign_key('task_assignees_user_id_fkey', 'task_assignees', 'users', ['user_id'], ['id'])
+    op.create_foreign_key('task_transitions_task_id_fkey', 'task_transitions', 'tasks', ['task_id'], ['id'])
+    op.create_foreign_key('task_reminders_task_id_fkey', 'task_reminders', 'tasks', ['task_id'], ['id'])
@@ -0,0 +1,24 @@
+"""Add is_template flag to Board model
+
+Revision ID: 7c2e9a41b5d3
+Revises: d1cd712178b1
+Create Date: 2026-10-18 10:12:31.482917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9a41b5d3'
+down_revision = 'd1cd712178b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('boards', sa.Column('is_template', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    op.drop_column('boards', 'is_template')
@@ -0,0 +1,45 @@
+"""Add subtask hierarchy to tasks
+
+Revision ID: 875577802e01
+Revises: f4a7c2d91e58
+Create Date: 2026-10-19 10:21:45.794613
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '875577802e01'
+down_revision = 'f4a7c2d91e58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Constant defaults: no table rewrite, and every existing task is a card with no subtasks
+    op.add_column('tasks', sa.Column('parent_id', sa.UUID(), nullable=True))
+    op.add_column('tasks', sa.Column('path', sa.String(), server_default='', nullable=False))
+    op.add_column('tasks', sa.Column('is_done', sa.Boolean(), server_default='false', nullable=False))
+    op.add_column('tasks', sa.Column('subtasks_total', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('tasks', sa.Column('subtasks_done', sa.Integer(), server_default='0', nullable=False))
+    op.create_foreign_key('tasks_parent_id_board_id_fkey', 'tasks', 'tasks',
+                          ['parent_id', 'board_id'], ['id', 'board_id'], onupdate='CASCADE')
+    op.create_index('ix_tasks_path_subtasks', 'tasks', ['board_id', 'path'], unique=False,
+                    postgresql_ops={'path': 'text_pattern_ops'}, postgresql_where=sa.text('parent_id IS NOT NULL'))
+    op.create_index('ix_tasks_parent_id_board_id', 'tasks', ['parent_id', 'board_id'], unique=False,
+                    postgresql_where=sa.text('parent_id IS NOT NULL'))
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM task_assignees ta USING tasks t WHERE t.id = ta.task_id AND t.board_id = ta.board_id AND t.parent_id IS NOT NULL")
+    op.execute("DELETE FROM task_attachments a USING tasks t WHERE t.id = a.task_id AND t.board_id = a.board_id AND t.parent_id IS NOT NULL")
+    op.execute("DELETE FROM tasks WHERE parent_id IS NOT NULL")
+    op.drop_index('ix_tasks_parent_id_board_id', table_name='tasks')
+    op.drop_index('ix_tasks_path_subtasks', table_name='tasks')
+    op.drop_constraint('tasks_parent_id_board_id_fkey', 'tasks', type_='foreignkey')
+    op.drop_column('tasks', 'subtasks_done')
+    op.drop_column('tasks', 'subtasks_total')
+    op.drop_column('tasks', 'is_done')
+    op.drop_column('tasks', 'path')
+    op.drop_column('tasks', 'parent_id')
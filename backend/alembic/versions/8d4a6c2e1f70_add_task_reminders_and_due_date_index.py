@@ -0,0 +1,33 @@
+"""Add task_reminders table and live due_date index
+
+Revision ID: 8d4a6c2e1f70
+Revises: 5e2b9f4c7a13
+Create Date: 2026-10-19 02:03:18.950412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4a6c2e1f70'
+down_revision = '5e2b9f4c7a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('task_reminders',
+        sa.Column('task_id', sa.UUID(), nullable=False),
+        sa.Column('due_date', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ),
+        sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index('ix_tasks_due_date_live', 'tasks', ['due_date'], unique=False,
+                    postgresql_where=sa.text('NOT is_deleted'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_due_date_live', table_name='tasks')
+    op.drop_table('task_reminders')
@@ -0,0 +1,53 @@
+"""Add board_activity table, range-partitioned by month
+
+Revision ID: 9a4e7c1d2b65
+Revises: 3f6b2d9c8a17
+Create Date: 2026-10-18 23:58:31.204417
+
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4e7c1d2b65'
+down_revision = '3f6b2d9c8a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('board_activity',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('clock_timestamp()'), nullable=False),
+        sa.Column('board_id', sa.UUID(), nullable=False),
+        sa.Column('actor_id', sa.UUID(), nullable=True),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.UUID(), nullable=True),
+        sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.ForeignKeyConstraint(['actor_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index('ix_board_activity_board_id_created_at_id', 'board_activity', ['board_id', 'created_at', 'id'], unique=False)
+    # Catch-all so inserts never fail; python -m app.services.activity creates months ahead
+    op.execute("CREATE TABLE board_activity_default PARTITION OF board_activity DEFAULT")
+    today = datetime.now(timezone.utc).date()
+    for offset in range(4):
+        year, month = today.year + (today.month - 1 + offset) // 12, (today.month - 1 + offset) % 12 + 1
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        op.execute(
+            f"CREATE TABLE board_activity_p{start:%Y%m} PARTITION OF board_activity "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+
+
+def downgrade() -> None:
+    # Dropping the parent drops every partition with it
+    op.drop_index('ix_board_activity_board_id_created_at_id', table_name='board_activity')
+    op.drop_table('board_activity')
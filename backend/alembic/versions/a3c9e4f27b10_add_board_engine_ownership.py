@@ -0,0 +1,27 @@
+"""Add in-memory board engine ownership to boards
+
+Revision ID: a3c9e4f27b10
+Revises: 875577802e01
+Create Date: 2026-10-19 14:02:11.408262
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e4f27b10'
+down_revision = '875577802e01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable and a constant default: no table rewrite
+    op.add_column('boards', sa.Column('engine_owner', sa.String(), nullable=True))
+    op.add_column('boards', sa.Column('engine_lsn', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('boards', 'engine_lsn')
+    op.drop_column('boards', 'engine_owner')
@@ -0,0 +1,26 @@
+"""Add version columns to Task and BoardColumn models
+
+Revision ID: b4f1d8e26a90
+Revises: 7c2e9a41b5d3
+Create Date: 2026-10-18 11:40:07.215634
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f1d8e26a90'
+down_revision = '7c2e9a41b5d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('board_columns', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('board_columns', 'version')
+    op.drop_column('tasks', 'version')
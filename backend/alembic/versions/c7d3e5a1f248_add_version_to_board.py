@@ -0,0 +1,24 @@
+"""Add version to board
+
+Revision ID: c7d3e5a1f248
+Revises: 9a4e7c1d2b65
+Create Date: 2026-10-19 00:21:07.331852
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d3e5a1f248'
+down_revision = '9a4e7c1d2b65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('boards', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('boards', 'version')
@@ -0,0 +1,56 @@
+"""Add board_counters table
+
+Revision ID: e83a5c7f19d2
+Revises: b4f1d8e26a90
+Create Date: 2026-10-18 13:05:44.930127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e83a5c7f19d2'
+down_revision = 'b4f1d8e26a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('board_counters',
+        sa.Column('board_id', sa.UUID(), nullable=False),
+        sa.Column('dimension', sa.String(), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ),
+        sa.PrimaryKeyConstraint('board_id', 'dimension', 'key')
+    )
+    # Existing data is counted once here; afterwards every mutation keeps it current
+    # (run `python -m app.services.board_stats` to reconcile at any time).
+    op.execute("""
+        INSERT INTO board_counters (board_id, dimension, key, count)
+        SELECT c.board_id, 'column', t.column_id::text, count(*)
+        FROM tasks t JOIN board_columns c ON c.id = t.column_id
+        WHERE NOT t.is_deleted AND NOT c.is_deleted
+        GROUP BY c.board_id, t.column_id
+        UNION ALL
+        SELECT c.board_id, 'priority', coalesce(t.priority, 0)::text, count(*)
+        FROM tasks t JOIN board_columns c ON c.id = t.column_id
+        WHERE NOT t.is_deleted AND NOT c.is_deleted
+        GROUP BY c.board_id, coalesce(t.priority, 0)
+        UNION ALL
+        SELECT c.board_id, 'due', to_char(t.due_date AT TIME ZONE 'UTC', 'YYYY-MM-DD'), count(*)
+        FROM tasks t JOIN board_columns c ON c.id = t.column_id
+        WHERE NOT t.is_deleted AND NOT c.is_deleted AND t.due_date IS NOT NULL
+        GROUP BY c.board_id, to_char(t.due_date AT TIME ZONE 'UTC', 'YYYY-MM-DD')
+        UNION ALL
+        SELECT c.board_id, 'assignee', ta.user_id::text, count(*)
+        FROM tasks t JOIN board_columns c ON c.id = t.column_id
+        JOIN task_assignees ta ON ta.task_id = t.id
+        WHERE NOT t.is_deleted AND NOT c.is_deleted
+        GROUP BY c.board_id, ta.user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('board_counters')
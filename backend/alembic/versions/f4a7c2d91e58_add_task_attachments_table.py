@@ -0,0 +1,39 @@
+"""Add task_attachments table
+
+Revision ID: f4a7c2d91e58
+Revises: 2c8e5f7a9d31
+Create Date: 2026-10-19 06:02:51.337184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a7c2d91e58'
+down_revision = '2c8e5f7a9d31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('task_attachments',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('task_id', sa.UUID(), nullable=False),
+        sa.Column('board_id', sa.UUID(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('sha256', sa.String(), nullable=False),
+        sa.Column('uploaded_by', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['task_id', 'board_id'], ['tasks.id', 'tasks.board_id'], onupdate='CASCADE', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['uploaded_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_attachments_task_id_board_id', 'task_attachments', ['task_id', 'board_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_attachments_task_id_board_id', table_name='task_attachments')
+    op.drop_table('task_attachments')
@@ -1,44 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 from ..db.database import get_db
 from ..models.user import User
 from ..schemas.user import UserCreate, User as UserSchema
-from passlib.context import CryptContext
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
-import os
-from dotenv import load_dotenv
-from pydantic import ValidationError
-
-load_dotenv()
+from ..core.security import create_access_token, decode_token_subject, get_password_hash, verify_password
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
-# Load sensitive configuration from environment variables
-SECRET_KEY = os.getenv("SECRET_KEY")
-if not SECRET_KEY:
-    raise EnvironmentError("SECRET_KEY environment variable not set")
-
-ALGORITHM = "HS256"
-# Allow configuration of token expiry via environment variable, default to 30 minutes
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
 @router.get("/me", response_model=UserSchema)
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
@@ -46,15 +17,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    user_id = decode_token_subject(token)
+    if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    # Runs on every authenticated request. Lambda statements are built and cache-keyed once per
+    # call site; later calls only bind the closure's values (user_id here)
+    user = db.execute(lambda_stmt(lambda: select(User).where(User.id == user_id))).scalars().first()
     if user is None:
         raise credentials_exception
     return user
@@ -62,7 +31,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
 @router.post("/register", response_model=UserSchema)
 async def register(user: UserCreate, db: Session = Depends(get_db)):
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    email = user.email
+    db_user = db.execute(lambda_stmt(lambda: select(User).where(User.email == email))).scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -92,7 +62,8 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
 @router.post("/token")
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     # Find the user
-    user = db.query(User).filter(User.email == form_data.username).first()
+    email = form_data.username
+    user = db.execute(lambda_stmt(lambda: select(User).where(User.email == email))).scalars().first()
     
     # Check if user exists and password is correct
     if not user or not verify_password(form_data.password, user.hashed_password):
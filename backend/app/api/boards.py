@@ -1,18 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, selectinload
-from typing import List
-from sqlalchemy import func, update # Import func and update
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload, with_loader_criteria
+from typing import List, Optional
+from uuid import UUID
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import func, lambda_stmt, select, update # Import func and update
+from ..core.config import get_settings
 from ..db.database import get_db
 from ..models.board import Board, BoardColumn
 from ..models.task import Task 
 # Import the new request schema and the column response schema
 from ..schemas.board import BoardCreate, Board as BoardSchema, BoardColumn as BoardColumnSchema, AddColumnRequest, RenameColumnRequest, ColumnMoveRequest
 from ..schemas.board import BoardCreate, Board as BoardSchema, BoardColumn as BoardColumnSchema, AddColumnRequest, RenameColumnRequest
+from ..schemas.board import BoardCloneRequest, BoardTemplateCreate, BoardTemplate as BoardTemplateSchema
+from ..schemas.board import BoardStats as BoardStatsSchema, BoardFlow as BoardFlowSchema, ActivityPage as ActivityPageSchema
 from .auth import get_current_user
+from .concurrency import conflict_error, etag, is_write_conflict, parse_if_match
 from ..models.user import User
+from ..services.board_clone import clone_board
+from ..services.board_transfer import BoardImporter, iter_board_ndjson, iter_ndjson_records
+from ..services.board_stats import board_task_counts, read_board_stats, rebuild_board, uncount_column
+from ..services.board_stream import stream_board_json
+from ..services import task_flow
+from ..services.activity import board_activity_page, record_activity
+from ..services.ownership import column_board_if_owned, ownership_cache
+from ..services.board_cache import board_cache, bump_board_versions, cache_key
+from ..services.board_engine import BoardResident, board_engine
+from ..services.reminders import notify_board_changed
+from ..services import jobs
+from ..schemas.job import Job as JobSchema
 
 router = APIRouter()
 
+def _load_board_tree(db: Session, board_id, user_id):
+    # Eager load columns, tasks, and task assignees; the board_id criterion prunes the
+    # (board-partitioned) tasks and task_assignees to this board's partition. Assignees
+    # use subqueryload: selectin's (id, board_id) IN batches each rescan the board's assignees
+    return db.query(Board).options(
+        selectinload(Board.columns)
+        .selectinload(BoardColumn.tasks)
+        .subqueryload(Task.assignees), # Eager load assignees within tasks
+        with_loader_criteria(Task, Task.board_id == board_id),
+    ).filter(Board.id == board_id, Board.created_by == user_id).first()
+
+def _get_owned_column(db: Session, board_id, column_id, user_id):
+    # Ownership comes from the cached column -> (board, owner) mapping instead of a join
+    db_column = db.execute(lambda_stmt(lambda: select(BoardColumn).where(
+        BoardColumn.id == column_id,
+        BoardColumn.board_id == board_id,
+        BoardColumn.is_deleted == False
+    ))).scalars().first()
+    if db_column and column_board_if_owned(db, db_column.id, user_id) is None:
+        return None
+    return db_column
+
+def _lock_board_columns(db: Session, board_id):
+    # Column moves and deletes shift their siblings' order_index. They lock all of the board's live
+    # columns first, in id order like task writers claim columns (tasks._claim_columns), so they
+    # run one at a time per board and take every column lock before the board's stats lock
+    db.execute(
+        select(BoardColumn.id)
+        .where(BoardColumn.board_id == board_id, BoardColumn.is_deleted == False)
+        .order_by(BoardColumn.id)
+        .with_for_update()
+    ).all()
+
+def _render_board(board: Board) -> bytes:
+    return BoardSchema.model_validate(board).model_dump_json().encode()
+
+def _column_conflict(db: Session, column_id) -> HTTPException:
+    # Called after rollback: re-read the row so the client gets the state that won
+    current = db.query(BoardColumn).filter(BoardColumn.id == column_id).first()
+    return conflict_error(BoardColumnSchema.model_validate(current) if current else None)
+
+def _clone(db: Session, source: Board, owner_id, action: str, **options):
+    try:
+        new_board_id = clone_board(db, source, owner_id=owner_id, **options)
+        rebuild_board(db, new_board_id)
+        task_flow.record_board_created(db, new_board_id)
+        notify_board_changed(db, new_board_id)
+        record_activity(db, new_board_id, owner_id, action, source_board_id=source.id, mode=options.get("mode"))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return new_board_id
+
 @router.post("/", response_model=BoardSchema)
 async def create_board(board: BoardCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     db_board = Board(
@@ -36,6 +109,8 @@ async def create_board(board: BoardCreate, db: Session = Depends(get_db), curren
 
         # Add the board (which cascades to columns) and commit once
         db.add(db_board)
+        db.flush()
+        record_activity(db, db_board.id, current_user.id, "board.created", name=db_board.name)
         db.commit()
         db.refresh(db_board) # Refresh to load the board and its columns (incl. generated IDs)
     except Exception:
@@ -45,43 +120,283 @@ async def create_board(board: BoardCreate, db: Session = Depends(get_db), curren
 
 @router.get("/", response_model=List[BoardSchema])
 async def get_boards(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Reverted: Simple query, filtering happens in the BoardColumn.tasks relationship
-    # Eager load columns, tasks, and task assignees
-    boards = db.query(Board).options(
-        selectinload(Board.columns)
-        .selectinload(BoardColumn.tasks)
-        .selectinload(Task.assignees) # Eager load assignees within tasks
-    ).filter(Board.created_by == current_user.id).all()
-    return boards
+    # Versions first; only boards missing from the rendered-board cache are loaded and serialized.
+    # A lambda statement, like the other per-request lookups (see tasks._load_task)
+    user_id = current_user.id
+    versions = db.execute(lambda_stmt(lambda: select(Board.id, Board.version).where(
+        Board.created_by == user_id,
+        Board.is_template == False
+    ).order_by(Board.created_at))).all()
+    # Boards resident in this process's board engine are rendered from memory
+    resident = await board_engine.board_bodies([board_id for board_id, _ in versions])
+    bodies = {
+        board_id: resident.get(board_id) or board_cache.get(cache_key(board_id, version))
+        for board_id, version in versions
+    }
+    missing = [board_id for board_id, body in bodies.items() if body is None]
+    # Huge boards are streamed into the list rather than rendered (see get_board)
+    threshold = get_settings().board_stream_threshold
+    huge = {board_id for board_id, count in board_task_counts(db, missing).items() if count > threshold} if missing else set()
+    missing = [board_id for board_id in missing if board_id not in huge]
+    if missing:
+        # Eager load columns, tasks, and task assignees
+        boards = db.query(Board).options(
+            selectinload(Board.columns)
+            .selectinload(BoardColumn.tasks)
+            .subqueryload(Task.assignees), # Eager load assignees within tasks
+            with_loader_criteria(Task, Task.board_id.in_(missing)),
+        ).filter(Board.id.in_(missing)).all()
+        version_of = dict(versions)
+        for board in boards:
+            bodies[board.id] = _render_board(board)
+            board_cache.set(cache_key(board.id, version_of[board.id]), bodies[board.id])
+    if not huge:
+        return Response(content=b"[" + b",".join(bodies[board_id] for board_id, _ in versions) + b"]", media_type="application/json")
+
+    # user_id is read above: each streamed board ends the transaction, which expires current_user
+
+    def chunks():
+        yield b"["
+        for n, (board_id, _) in enumerate(versions):
+            if n:
+                yield b","
+            if board_id in huge:
+                # Boards are never deleted or handed to another owner, so this is never None
+                yield from stream_board_json(db, board_id, user_id)
+            else:
+                yield bodies[board_id]
+        yield b"]"
+    return StreamingResponse(chunks(), media_type="application/json")
+
+# --- Endpoint: List Board Templates ---
+@router.get("/templates", response_model=List[BoardTemplateSchema])
+async def get_board_templates(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return db.query(Board).filter(
+        Board.created_by == current_user.id,
+        Board.is_template == True
+    ).order_by(Board.created_at).all()
+
+# --- Endpoint: Create Board from Template ---
+@router.post("/templates/{template_id}/boards", response_model=BoardSchema)
+async def create_board_from_template(
+    template_id: str,
+    clone_data: BoardCloneRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    template = db.query(Board).filter(
+        Board.id == template_id,
+        Board.created_by == current_user.id,
+        Board.is_template == True
+    ).first()
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    new_board_id = _clone(
+        db, template, current_user.id, "board.created_from_template",
+        name=clone_data.name or template.name,
+        description=clone_data.description,
+        mode=clone_data.mode,
+    )
+    return _load_board_tree(db, new_board_id, current_user.id)
+
+# --- Endpoint: Import Board from NDJSON export ---
+@router.post("/import")
+async def import_board(
+    request: Request,
+    name: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # The request body is the NDJSON produced by GET /{board_id}/export. It is parsed
+    # as it arrives and bulk-inserted in batches; everything commits in one transaction.
+    importer = BoardImporter(db, owner_id=current_user.id, name=name)
+    try:
+        async for record in iter_ndjson_records(request.stream()):
+            importer.feed(record)
+        board_id = importer.finish()
+        rebuild_board(db, board_id)
+        task_flow.record_board_created(db, board_id)
+        notify_board_changed(db, board_id)
+        record_activity(db, board_id, current_user.id, "board.imported", **importer.counts)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid board export: {e}")
+    except Exception:
+        db.rollback()
+        raise
+    return {"board_id": board_id, **importer.counts}
 
 @router.get("/{board_id}", response_model=BoardSchema)
-async def get_board(board_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_board(
+    board_id: str,
+    stream: Optional[bool] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Resident in this process's board engine: served from memory, ahead of Postgres
+    if not stream:
+        body = await board_engine.board_body(board_id, current_user.id)
+        if body is not None:
+            return Response(content=body, media_type="application/json")
+
     # Reverted: Simple query, filtering happens in the BoardColumn.tasks relationship
-    # Eager load columns, tasks, and task assignees
-    board = db.query(Board).options(
-        selectinload(Board.columns)
-        .selectinload(BoardColumn.tasks)
-        .selectinload(Task.assignees) # Eager load assignees within tasks
-    ).filter(Board.id == board_id, Board.created_by == current_user.id).first()
-    
+    user_id = current_user.id
+    version = db.scalar(lambda_stmt(lambda: select(Board.version).where(Board.id == board_id, Board.created_by == user_id)))
+    if version is None:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    # Served from the rendered-board cache while the board's version is unchanged. The tree may
+    # be loaded after a newer commit; caching newer content under the older key is harmless.
+    key = cache_key(UUID(board_id), version)
+    board_engine.touch(board_id)
+    body = board_cache.get(key)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+
+    # Huge boards (or ?stream=true) are streamed column by column and not cached, so a
+    # request never holds the whole board in memory; ?stream=false forces the buffered path
+    if stream is None:
+        stream = board_task_counts(db, [board_id]).get(UUID(board_id), 0) > get_settings().board_stream_threshold
+    if stream:
+        chunks = stream_board_json(db, board_id, current_user.id)
+        if chunks is None:
+            raise HTTPException(status_code=404, detail="Board not found")
+        return StreamingResponse(chunks, media_type="application/json")
+
+    board = _load_board_tree(db, board_id, current_user.id)
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    body = _render_board(board)
+    board_cache.set(key, body)
+    return Response(content=body, media_type="application/json")
+
+# --- Endpoint: Board Statistics ---
+@router.get("/{board_id}/stats", response_model=BoardStatsSchema)
+async def get_board_stats(board_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    await board_engine.checkpoint(board_id) # Counters in Postgres catch up with the resident board
+    board = db.query(Board).filter(Board.id == board_id, Board.created_by == current_user.id).first()
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    # Read from the incrementally maintained counters, not by scanning tasks
+    return read_board_stats(db, board)
+
+# --- Endpoint: Board Flow (cumulative flow, cycle and lead time) ---
+@router.get("/{board_id}/flow", response_model=BoardFlowSchema)
+async def get_board_flow(
+    board_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    board = db.query(Board).filter(Board.id == board_id, Board.created_by == current_user.id).first()
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
-    return board 
+    # Defaults to the last 30 days (UTC); served from the daily rollups, so a year costs the same
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days > 366:
+        raise HTTPException(status_code=400, detail="start must be before end and at most 366 days apart")
+    return task_flow.read_board_flow(db, board, start, end)
+
+# --- Endpoint: Board Activity Feed ---
+@router.get("/{board_id}/activity", response_model=ActivityPageSchema)
+async def get_board_activity(
+    board_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    await board_engine.checkpoint(board_id) # Activity is recorded when the resident board is flushed
+    board = db.query(Board).filter(Board.id == board_id, Board.created_by == current_user.id).first()
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    # Newest first; pass next_cursor back to continue where the previous page ended
+    try:
+        items, next_cursor = board_activity_page(db, board.id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+# --- Endpoint: Export Board as NDJSON ---
+@router.get("/{board_id}/export")
+async def export_board(board_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    await board_engine.checkpoint(board_id) # Tasks are read from Postgres
+    board = db.query(Board).filter(Board.id == board_id, Board.created_by == current_user.id).first()
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    # Streamed from server-side cursors, so memory use does not grow with board size
+    return StreamingResponse(
+        iter_board_ndjson(db, board),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="board-{board.id}.ndjson"'},
+    )
+
+# --- Endpoint: Clone Board ---
+@router.post("/{board_id}/clone", response_model=BoardSchema)
+async def clone_existing_board(
+    board_id: str,
+    clone_data: BoardCloneRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    await board_engine.checkpoint(board_id) # Copied in SQL
+    source = db.query(Board).filter(Board.id == board_id, Board.created_by == current_user.id).first()
+    if not source:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    # Copied entirely in SQL, so cost does not depend on round trips per task
+    new_board_id = _clone(
+        db, source, current_user.id, "board.cloned",
+        name=clone_data.name or f"{source.name} (copy)",
+        description=clone_data.description,
+        mode=clone_data.mode,
+    )
+    return _load_board_tree(db, new_board_id, current_user.id)
+
+# --- Endpoint: Save Board as Template ---
+@router.post("/{board_id}/templates", response_model=BoardTemplateSchema)
+async def save_board_as_template(
+    board_id: str,
+    template_data: BoardTemplateCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    await board_engine.checkpoint(board_id) # Copied in SQL
+    source = db.query(Board).filter(Board.id == board_id, Board.created_by == current_user.id).first()
+    if not source:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    template_id = _clone(
+        db, source, current_user.id, "template.created",
+        name=template_data.name,
+        description=template_data.description,
+        mode=template_data.mode,
+        is_template=True,
+    )
+    return db.query(Board).filter(Board.id == template_id).first()
 
 # --- Endpoint: Add Column to Board --- 
 @router.post("/{board_id}/columns", response_model=BoardColumnSchema)
 async def add_column_to_board(
     board_id: str,
     column_data: AddColumnRequest,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    await board_engine.release(board_id) # Columns are only changed in Postgres
     # 1. Verify board exists and belongs to the user
     board = db.query(Board).filter(Board.id == board_id, Board.created_by == current_user.id).first()
     if not board:
         raise HTTPException(status_code=404, detail="Board not found or access denied")
 
-    # 2. Calculate the next order_index based on non-deleted columns
+    # 2. Calculate the next order_index based on non-deleted columns, after concurrent column
+    # moves/deletes/adds on this board have committed
+    _lock_board_columns(db, board_id)
     max_order = db.query(func.max(BoardColumn.order_index)).filter(
         BoardColumn.board_id == board_id,
         BoardColumn.is_deleted == False # << Added filter for non-deleted columns
@@ -98,13 +413,19 @@ async def add_column_to_board(
     
     try:
         db.add(db_column)
+        db.flush()
+        record_activity(db, board.id, current_user.id, "column.created", db_column.id, name=db_column.name)
+        bump_board_versions(db, board.id)
         db.commit()
         db.refresh(db_column) 
     except Exception as e:
         db.rollback()
+        if isinstance(e, BoardResident):
+            raise # 409 from board_resident_handler
         # Log the exception e
         raise HTTPException(status_code=500, detail=f"Failed to create column: {e}")
 
+    response.headers["ETag"] = etag(db_column.version)
     return db_column 
 
 # --- New Endpoint: Rename Column --- 
@@ -113,32 +434,42 @@ async def rename_column(
     board_id: str,
     column_id: str,
     column_data: RenameColumnRequest, # Use the new schema
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    expected_version = parse_if_match(if_match)
+    await board_engine.release(board_id) # The column's version is current in Postgres from here
+
     # 1. Verify the column exists, belongs to the board, belongs to the user, and is not deleted
-    db_column = db.query(BoardColumn).join(Board).filter(
-        BoardColumn.id == column_id,
-        BoardColumn.board_id == board_id,
-        Board.created_by == current_user.id,
-        BoardColumn.is_deleted == False
-    ).first()
+    db_column = _get_owned_column(db, board_id, column_id, current_user.id)
     
     if not db_column:
         raise HTTPException(status_code=404, detail="Column not found, access denied, or deleted")
+    if expected_version is not None and db_column.version != expected_version:
+        raise conflict_error(BoardColumnSchema.model_validate(db_column))
 
     # 2. Update the name and timestamp
+    old_name = db_column.name
     db_column.name = column_data.name
     db_column.updated_at = func.now()
 
     try:
+        db.flush() # Conditional on the version read above
+        record_activity(db, db_column.board_id, current_user.id, "column.renamed", db_column.id,
+                        old_name=old_name, name=db_column.name)
+        bump_board_versions(db, db_column.board_id)
         db.commit()
         db.refresh(db_column)
     except Exception as e:
         db.rollback()
+        if is_write_conflict(e):
+            raise _column_conflict(db, column_id)
         # Log exception e
         raise HTTPException(status_code=500, detail=f"Failed to rename column: {e}")
 
+    response.headers["ETag"] = etag(db_column.version)
     return db_column
 
 # --- New Endpoint: Move Column --- 
@@ -147,29 +478,43 @@ async def move_column(
     board_id: str,
     column_id: str,
     move_data: ColumnMoveRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    expected_version = parse_if_match(if_match)
+    await board_engine.release(board_id)
+
     # 1. Verify board and column exist, belong to user, and column is not deleted
-    db_column = db.query(BoardColumn).join(Board).filter(
-        BoardColumn.id == column_id,
-        BoardColumn.board_id == board_id,
-        Board.created_by == current_user.id,
-        BoardColumn.is_deleted == False
-    ).first()
+    db_column = _get_owned_column(db, board_id, column_id, current_user.id)
 
     if not db_column:
         raise HTTPException(status_code=404, detail="Column not found, access denied, or deleted")
+    if expected_version is not None and db_column.version != expected_version:
+        raise conflict_error(BoardColumnSchema.model_validate(db_column))
 
     original_index = db_column.order_index
-    # Use max(0, ...) to ensure new_index is not negative
-    new_index = max(0, move_data.new_order_index)
+    _lock_board_columns(db, db_column.board_id)
+    # Use max(0, ...) to ensure new_index is not negative, and clamp it to the last position so a
+    # move past the end does not leave a gap
+    live_columns = db.scalar(
+        select(func.count()).select_from(BoardColumn)
+        .where(BoardColumn.board_id == db_column.board_id, BoardColumn.is_deleted == False)
+    )
+    new_index = min(max(0, move_data.new_order_index), live_columns - 1)
 
     # Prevent moving to the same index
     if original_index == new_index:
-        return db_column # No change needed
+        db.rollback() # No change needed; don't hold the column locks while the response is sent
+        return db_column
 
     try:
+        # --- Claim the moved column first (conditional on the version read above) ---
+        db_column.order_index = new_index
+        db_column.updated_at = func.now()
+        db.flush()
+
         # --- Adjust indices of other non-deleted columns --- 
         if new_index > original_index:
             # Shift columns between old and new pos down
@@ -179,7 +524,8 @@ async def move_column(
                 .where(BoardColumn.is_deleted == False)
                 .where(BoardColumn.order_index > original_index)
                 .where(BoardColumn.order_index <= new_index)
-                .values(order_index=BoardColumn.order_index - 1)
+                .where(BoardColumn.id != db_column.id)
+                .values(order_index=BoardColumn.order_index - 1, version=BoardColumn.version + 1)
             )
         elif new_index < original_index:
             # Shift columns between new and old pos up
@@ -189,78 +535,86 @@ async def move_column(
                 .where(BoardColumn.is_deleted == False)
                 .where(BoardColumn.order_index >= new_index)
                 .where(BoardColumn.order_index < original_index)
-                .values(order_index=BoardColumn.order_index + 1)
+                .where(BoardColumn.id != db_column.id)
+                .values(order_index=BoardColumn.order_index + 1, version=BoardColumn.version + 1)
             )
 
-        # --- Update the moved column --- 
-        db_column.order_index = new_index
-        db_column.updated_at = func.now()
-
+        record_activity(db, db_column.board_id, current_user.id, "column.moved", db_column.id,
+                        name=db_column.name, from_index=original_index, to_index=new_index)
+        bump_board_versions(db, db_column.board_id)
         db.commit() # Commit transaction
         db.refresh(db_column)
+        response.headers["ETag"] = etag(db_column.version)
         return db_column
     except Exception as e:
         db.rollback()
+        if is_write_conflict(e):
+            raise _column_conflict(db, column_id)
         # Log exception e
         raise HTTPException(status_code=500, detail="Failed to move column")
 
 # --- Endpoint: Delete Column from Board --- 
-@router.delete("/{board_id}/columns/{column_id}")
+@router.delete("/{board_id}/columns/{column_id}", status_code=202, response_model=JobSchema)
 async def delete_column_from_board(
     board_id: str,
     column_id: str,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    expected_version = parse_if_match(if_match)
+    await board_engine.release(board_id)
+
     # 1. Verify the column exists, belongs to the board, belongs to the user, and is not already deleted
-    db_column = db.query(BoardColumn).join(Board).filter(
-        BoardColumn.id == column_id,
-        BoardColumn.board_id == board_id,
-        Board.created_by == current_user.id,
-        BoardColumn.is_deleted == False
-    ).first()
+    db_column = _get_owned_column(db, board_id, column_id, current_user.id)
     
     if not db_column:
         raise HTTPException(status_code=404, detail="Column not found, access denied, or already deleted")
+    if expected_version is not None and db_column.version != expected_version:
+        raise conflict_error(BoardColumnSchema.model_validate(db_column))
 
-    # --- Optional: Check if column has non-deleted tasks --- 
-    # Depending on requirements, you might prevent deletion if tasks exist,
-    # or soft-delete tasks within the column as well.
-    # For now, we'll allow deleting a column even if it has tasks.
-    # non_deleted_tasks = db.query(Task).filter(Task.column_id == column_id, Task.is_deleted == False).count()
-    # if non_deleted_tasks > 0:
-    #     raise HTTPException(status_code=400, detail="Cannot delete column with active tasks")
-    
     board_id_for_reorder = db_column.board_id # Store for reordering
     deleted_index = db_column.order_index
 
-    # --- Soft Delete: Set is_deleted = True --- 
-    db_column.is_deleted = True
-    db_column.updated_at = func.now() # Update timestamp
+    try:
+        # Column locks before the board's stats lock, in the same order as task writers
+        _lock_board_columns(db, board_id_for_reorder)
+        # Its tasks stop counting once the column is deleted, so uncount them all in one statement
+        uncount_column(db, board_id_for_reorder, db_column.id)
 
-    # --- Soft Delete Tasks within the Column (Recommended) ---
-    # To prevent orphaned tasks from reappearing if column is undeleted later
-    db.execute(
-        update(Task)
-        .where(Task.column_id == column_id)
-        .where(Task.is_deleted == False)
-        .values(is_deleted=True, updated_at=func.now()) 
-    )
+        # --- Soft Delete: Set is_deleted = True --- 
+        db_column.is_deleted = True
+        db_column.updated_at = func.now() # Update timestamp
+        db.flush() # Conditional on the version read above
 
-    # --- Adjust order_index for subsequent non-deleted columns --- 
-    db.execute(
-        update(BoardColumn)
-        .where(BoardColumn.board_id == board_id_for_reorder)
-        .where(BoardColumn.order_index > deleted_index)
-        .where(BoardColumn.is_deleted == False)
-        .values(order_index=BoardColumn.order_index - 1)
-    )
+        # --- Soft Delete Tasks within the Column ---
+        # To prevent orphaned tasks from reappearing if column is undeleted later. A column can
+        # hold tens of thousands of tasks, so this runs in batches in a background job.
+        job = jobs.enqueue(db, jobs.DELETE_COLUMN, current_user.id, board_id_for_reorder, column_id=str(db_column.id))
+        record_activity(db, board_id_for_reorder, current_user.id, "column.deleted", db_column.id,
+                        name=db_column.name, job_id=job.id)
 
-    try:
+        # --- Adjust order_index for subsequent non-deleted columns --- 
+        db.execute(
+            update(BoardColumn)
+            .where(BoardColumn.board_id == board_id_for_reorder)
+            .where(BoardColumn.order_index > deleted_index)
+            .where(BoardColumn.is_deleted == False)
+            .values(order_index=BoardColumn.order_index - 1, version=BoardColumn.version + 1)
+        )
+
+        bump_board_versions(db, board_id_for_reorder)
         db.commit()
     except Exception as e:
         db.rollback()
+        if is_write_conflict(e):
+            raise _column_conflict(db, column_id)
         # Log exception e
         raise HTTPException(status_code=500, detail=f"Failed to delete column: {e}")
+    ownership_cache.forget_column(column_id)
+    jobs.job_runner.notify()
 
-    return {"message": "Column marked as deleted"} 
\ No newline at end of file
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return job
+ 
\ No newline at end of file
@@ -0,0 +1,77 @@
+from fastapi import HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+from typing import Optional
+
+# SQLSTATEs Postgres raises when concurrent writers collide; both are safe to retry
+_RETRYABLE_SQLSTATES = {"40001", "40P01"} # serialization_failure, deadlock_detected
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Return the row version the client expects, or None for an unconditional write."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="If-Match must be a version ETag")
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+class ConflictStats:
+    """Write conflicts answered with 409, by cause (per worker)."""
+
+    def __init__(self):
+        self.stale = 0 # Conditional UPDATE matched no row: a concurrent writer got there first
+        self.serialization_failures = 0
+        self.deadlocks = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "stale": self.stale,
+            "serialization_failures": self.serialization_failures,
+            "deadlocks": self.deadlocks,
+        }
+
+conflict_stats = ConflictStats()
+
+def is_write_conflict(exc: Exception) -> bool:
+    """True for a failed conditional write or a deadlock/serialization failure; counts it in conflict_stats."""
+    if isinstance(exc, StaleDataError):
+        conflict_stats.stale += 1
+        return True
+    if isinstance(exc, OperationalError):
+        orig = exc.orig
+        sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+        if sqlstate in _RETRYABLE_SQLSTATES:
+            if sqlstate == "40P01":
+                conflict_stats.deadlocks += 1
+            else:
+                conflict_stats.serialization_failures += 1
+            return True
+    return False
+
+def conflict_error(current) -> HTTPException:
+    """409 carrying the current state of the row so the client can rebase and retry."""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "message": "Resource was modified by another request",
+            "current": jsonable_encoder(current) if current is not None else None,
+        },
+        headers={"ETag": etag(current.version)} if current is not None else None,
+    )
+
+async def board_resident_handler(request: Request, exc: Exception) -> JSONResponse:
+    """409 for writes to a board held by another process's board engine (BoardResident)
+    that the endpoint did not turn into a conflict itself; the board is being released."""
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "Board is being released by another worker; retry"},
+        headers={"Retry-After": "1"},
+    )
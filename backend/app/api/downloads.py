@@ -0,0 +1,89 @@
+import asyncio
+from typing import BinaryIO, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException, status
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+ZERO_COPY = "http.response.zerocopysend" # ASGI extension: the server sends the file with sendfile()
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """The [start, end) of a single ``bytes=`` range, or None to send the whole content.
+
+    Malformed and multi-range headers are ignored (a full response is always
+    allowed); a range that starts past the end is a 416.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if not first: # "-N": the last N bytes
+            suffix = int(last)
+            if suffix == 0:
+                raise _not_satisfiable(size)
+            start, end = max(0, size - suffix), size
+        else:
+            start = int(first)
+            if last and int(last) < start:
+                return None # e.g. "5-3", invalid and so ignored
+            end = min(size, int(last) + 1) if last else size
+    except ValueError:
+        return None
+    if start >= size:
+        raise _not_satisfiable(size)
+    return start, end
+
+def _not_satisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+class FileRangeResponse(Response):
+    """Sends ``[start, end)`` of an open file, which it closes when done.
+
+    Uses the server's zero-copy send extension when it offers one, so file
+    pages go to the socket without passing through Python; otherwise the file
+    is read in chunks in a thread. Memory use is one chunk either way.
+    """
+    chunk_size = 256 * 1024
+
+    def __init__(self, file: BinaryIO, size: int, byte_range: Optional[Tuple[int, int]] = None,
+                 headers: Optional[Mapping[str, str]] = None, media_type: Optional[str] = None):
+        self.file = file
+        self.start, self.end = byte_range or (0, size)
+        self.status_code = status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["content-length"] = str(self.end - self.start)
+        if byte_range:
+            self.headers["content-range"] = f"bytes {self.start}-{self.end - 1}/{size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if ZERO_COPY in scope.get("extensions", {}):
+                await send({"type": ZERO_COPY, "file": self.file, "offset": self.start, "count": self.end - self.start})
+                return
+            await asyncio.to_thread(self.file.seek, self.start)
+            remaining = self.end - self.start
+            more_body = True
+            while more_body:
+                chunk = await asyncio.to_thread(self.file.read, min(self.chunk_size, remaining)) if remaining else b""
+                remaining -= len(chunk)
+                # An empty read before the end means the file was truncated on disk: the
+                # server sees the short body and drops the connection
+                more_body = bool(chunk) and remaining > 0
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        finally:
+            self.file.close()
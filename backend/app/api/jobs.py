@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from uuid import UUID
+from ..db.database import get_db
+from ..models.job import Job
+from ..models.user import User
+from ..schemas.job import Job as JobSchema
+from .auth import get_current_user
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=JobSchema)
+async def get_job(job_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Poll this after a 202 until status is "succeeded" or "failed"
+    job = db.get(Job, job_id)
+    if not job or job.created_by != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
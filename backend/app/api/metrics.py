@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from ..models.user import User
+from ..services.board_cache import board_cache
+from ..services.board_engine import board_engine
+from ..services.outbox import webhook_dispatcher
+from ..services.ownership import ownership_cache, task_board_cache
+from ..middleware.idempotency import idempotency_stats
+from ..middleware.rate_limit import limiter_stats
+from .auth import get_current_user
+from .concurrency import conflict_stats
+
+router = APIRouter()
+
+@router.get("/")
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    """In-process cache, rate limiter, idempotency, write conflict, webhook delivery and board engine statistics for monitoring (per worker)."""
+    return {
+        "board_cache": board_cache.stats(),
+        "ownership_cache": ownership_cache.stats(),
+        "task_board_cache": task_board_cache.stats(),
+        "rate_limit": limiter_stats.as_dict(),
+        "idempotency": idempotency_stats.as_dict(),
+        "write_conflicts": conflict_stats.as_dict(),
+        "webhooks": webhook_dispatcher.stats(),
+        "board_engine": board_engine.stats(),
+    }
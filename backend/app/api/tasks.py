@@ -1,40 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
 from sqlalchemy.orm import Session, selectinload # Import selectinload
-from typing import List
-from sqlalchemy import func, update # Import func for max() and update for bulk updates
+from typing import List, Optional
+from uuid import UUID, uuid4
+from sqlalchemy import func, lambda_stmt, select, update # Import func for max() and update for bulk updates
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from ..db.database import get_db
 from ..models.task import Task
+from ..models.attachment import TaskAttachment
 from ..models.board import Board, BoardColumn # Import Board and BoardColumn models
 from ..models.user import User # Import User model
-from ..schemas.task import TaskCreate, Task as TaskSchema, TaskUpdate, TaskMove
+from ..schemas.task import TaskCreate, Task as TaskSchema, TaskUpdate, TaskMove, TaskBulkUpdate
+from ..schemas.task import SubtaskCreate, SubtaskUpdate, Subtask as SubtaskSchema
+from ..schemas.job import Job as JobSchema
+from ..schemas.attachment import Attachment as AttachmentSchema
 from .auth import get_current_user # Import get_current_user dependency
+from .concurrency import conflict_error, etag, is_write_conflict, parse_if_match
+from .downloads import FileRangeResponse, content_disposition, parse_range
+from ..services.board_stats import StatsDelta
+from ..services import task_flow
+from ..services.activity import record_activity
+from ..services.ownership import column_board_if_owned, task_board_cache
+from ..services.board_cache import bump_board_versions
+from ..services.board_engine import TaskVersionConflict, board_engine
+from ..services.reminders import notify_task_changed
+from ..services import jobs, outbox, subtasks
+from ..services.blob_store import BlobTooLarge, blob_store
+from ..core.config import get_settings
 
 router = APIRouter()
 
+def _task_conflict(db: Session, task_id) -> HTTPException:
+    # Called after rollback: re-read the row so the client gets the state that won
+    board_id = task_board_cache.board_of(db, task_id, refresh=True)
+    current = _load_task(db, task_id, board_id, selectinload(Task.assignees), live_only=False) if board_id else None
+    return conflict_error(TaskSchema.model_validate(current) if current else None)
+
+# The hot statements below are lambda statements: each is constructed and cache-keyed once per
+# call site, and later calls only bind the values the lambdas close over. The compiled SQL then
+# comes from the engine's statement cache, and psycopg prepares it server-side once it repeats.
+
+def _load_task(db: Session, task_id, board_id, *options, live_only: bool = True):
+    # tasks is partitioned by board: with board_id in the filter the planner reads one partition
+    stmt = lambda_stmt(lambda: select(Task).where(Task.id == task_id, Task.board_id == board_id))
+    if live_only:
+        stmt += lambda s: s.where(Task.is_deleted == False)
+    if options:
+        stmt += lambda s: s.options(*options)
+    return db.execute(stmt).scalars().first()
+
+def _claim_columns(db: Session, columns, conditional: bool = True):
+    # Every order_index rewrite in a column bumps the column's version first, so the column
+    # row is where concurrent writers meet. With conditional=True the UPDATE only matches the
+    # version read earlier in this request: if another create/move/delete committed in
+    # between, we fail with a conflict instead of shifting order_index from a stale view.
+    # Either way the column must still be live: a column deleted meanwhile has had its tasks
+    # uncounted and handed to the delete job, so nothing may be written into it.
+    # Columns are claimed in id order so two-column moves cannot deadlock each other.
+    for column in sorted({c.id: c for c in columns}.values(), key=lambda c: str(c.id)):
+        column_id, version = column.id, column.version
+        stmt = lambda_stmt(lambda: update(BoardColumn).where(
+            BoardColumn.id == column_id, BoardColumn.is_deleted == False
+        ).values(version=BoardColumn.version + 1))
+        if conditional:
+            stmt += lambda s: s.where(BoardColumn.version == version)
+        result = db.execute(stmt)
+        if result.rowcount != 1:
+            raise StaleDataError(f"Column {column.id} was modified concurrently")
+
+def _get_owned_task(db: Session, task_id, user_id, *options):
+    # Load the task by primary key from its board's partition, then check ownership of its
+    # column through the cache instead of joining board_columns and boards.
+    # Returns (task, board_id) or (None, None).
+    task_board_id = task_board_cache.board_of(db, task_id)
+    db_task = _load_task(db, task_id, task_board_id, *options) if task_board_id else None
+    if db_task is None and task_board_id is not None:
+        # The cached board may be stale: another worker may have moved the task to another board
+        task_board_id = task_board_cache.board_of(db, task_id, refresh=True)
+        db_task = _load_task(db, task_id, task_board_id, *options) if task_board_id else None
+    board_id = column_board_if_owned(db, db_task.column_id, user_id) if db_task else None
+    return (db_task, board_id) if board_id else (None, None)
+
 @router.post("/", response_model=TaskSchema)
-async def create_task(task: TaskCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_task(task: TaskCreate, response: Response, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     # Verify the column exists and belongs to the current user's board
-    column = db.query(BoardColumn).join(Board).filter(
-        BoardColumn.id == task.column_id,
-        Board.created_by == current_user.id
-    ).first()
-    if not column:
+    board_id = column_board_if_owned(db, task.column_id, current_user.id)
+    if board_id:
+        await board_engine.release(board_id) # Tasks are only created in Postgres
+    column = db.get(BoardColumn, task.column_id) if board_id else None
+    if not column or column.is_deleted:
+        # Another worker's ownership cache may not have seen the delete yet
         raise HTTPException(status_code=404, detail="Column not found or access denied")
 
-    # Calculate the next order_index based on non-deleted tasks
-    max_order = db.query(func.max(Task.order_index)).filter(
-        Task.column_id == task.column_id,
-        Task.is_deleted == False # Only consider non-deleted tasks
-    ).scalar()
-    next_order_index = 0 if max_order is None else max_order + 1
-    
     db_task = Task(
         title=task.title,
         description=task.description,
         column_id=task.column_id,
+        board_id=board_id,
         due_date=task.due_date,
         priority=task.priority,
-        order_index=next_order_index
     )
 
     # Assign users if provided
@@ -45,26 +110,102 @@ async def create_task(task: TaskCreate, db: Session = Depends(get_db), current_u
             raise HTTPException(status_code=404, detail="One or more assignees not found")
         db_task.assignees = assignees
 
-    db.add(db_task)
-    db.commit()
+    try:
+        # Appending does not depend on what the client saw, so wait for (rather than fail on)
+        # concurrent writers to this column before reading the current max. Fails only if the
+        # column was deleted since the check above
+        _claim_columns(db, [column], conditional=False)
+
+        # Calculate the next order_index based on non-deleted tasks
+        column_id = column.id
+        max_order = db.scalar(lambda_stmt(lambda: select(func.max(Task.order_index)).where(
+            Task.board_id == board_id,
+            Task.column_id == column_id,
+            Task.is_deleted == False # Only consider non-deleted tasks
+        )))
+        db_task.order_index = 0 if max_order is None else max_order + 1
+
+        db.add(db_task)
+        db.flush() # Assigns the id the transition log refers to
+        task_flow.record_transition(db, db_task.id, board_id, task_flow.CREATED, to_column_id=column.id)
+        record_activity(db, board_id, current_user.id, "task.created", db_task.id, title=db_task.title, column_id=column.id)
+        if db_task.due_date is not None:
+            notify_task_changed(db, db_task.id)
+        stats = StatsDelta()
+        stats.add_task(board_id, db_task, +1)
+        stats.apply(db)
+        bump_board_versions(db, board_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        if is_write_conflict(e):
+            raise conflict_error(None) # Nothing was created; retry
+        raise
+    task_board_cache.remember(db_task.id, board_id)
     # Refresh with assignees loaded
     db.refresh(db_task, attribute_names=['assignees']) # Refresh specific relationship if needed
     
     # Eager load assignees for the response
-    db_task_with_assignees = db.query(Task).options(selectinload(Task.assignees)).filter(Task.id == db_task.id).first()
+    db_task_with_assignees = _load_task(db, db_task.id, db_task.board_id, selectinload(Task.assignees), live_only=False)
 
+    response.headers["ETag"] = etag(db_task_with_assignees.version)
     return db_task_with_assignees # Return the task with assignees loaded
 
+@router.post("/bulk", status_code=202, response_model=JobSchema)
+async def bulk_update_tasks(
+    bulk_update: TaskBulkUpdate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Applied in batches by a background job; tasks that are deleted or not the user's are skipped
+    changes = bulk_update.model_dump(mode="json", include={"priority", "due_date"} & bulk_update.model_fields_set)
+    if not changes:
+        raise HTTPException(status_code=400, detail="Nothing to update: set priority and/or due_date")
+    task_ids = [str(task_id) for task_id in dict.fromkeys(bulk_update.task_ids)]
+
+    job = jobs.enqueue(db, jobs.BULK_UPDATE_TASKS, current_user.id, total=len(task_ids), task_ids=task_ids, changes=changes)
+    db.commit()
+    jobs.job_runner.notify()
+
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return job
+
 @router.put("/{task_id}", response_model=TaskSchema)
-async def update_task(task_id: str, task_update: TaskUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_task(
+    task_id: str,
+    task_update: TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    expected_version = parse_if_match(if_match)
+    if task_update.assignee_ids is None:
+        # Applied in memory if the task's board is resident in this process (app/services/board_engine.py)
+        try:
+            engine_task = await board_engine.update_task(
+                task_id, task_update.model_dump(exclude_unset=True, exclude={"assignee_ids"}),
+                sorted(task_update.model_fields_set), expected_version, current_user.id,
+            )
+        except TaskVersionConflict as e:
+            raise conflict_error(TaskSchema.model_validate(e.current))
+        if engine_task is not None:
+            response.headers["ETag"] = etag(engine_task["version"])
+            return engine_task
+    else:
+        await board_engine.release_task(task_id) # Assignees are only changed in Postgres
     # Find the task and verify ownership via board, load current assignees
-    db_task = db.query(Task).options(selectinload(Task.assignees)).join(BoardColumn).join(Board).filter(
-        Task.id == task_id,
-        Board.created_by == current_user.id,
-        Task.is_deleted == False # Add this check
-    ).first()
+    db_task, board_id = _get_owned_task(db, task_id, current_user.id, selectinload(Task.assignees))
     if not db_task:
         raise HTTPException(status_code=404, detail="Task not found or access denied")
+    if expected_version is not None and db_task.version != expected_version:
+        raise conflict_error(TaskSchema.model_validate(db_task))
+
+    # Uncount the task as it is now; it is counted again with its new values below
+    stats = StatsDelta()
+    stats.add_task(board_id, db_task, -1)
+    had_due_date = db_task.due_date is not None
     
     # Update allowed fields from the TaskUpdate schema
     update_data = task_update.dict(exclude_unset=True, exclude={'assignee_ids'}) # Exclude assignee_ids from direct attribute setting
@@ -89,45 +230,88 @@ async def update_task(task_id: str, task_update: TaskUpdate, db: Session = Depen
     if hasattr(db_task, 'updated_at'):
       db_task.updated_at = func.now()
 
-    db.commit()
+    # The flush is conditional on the version read above (version_id_col)
+    try:
+        db.flush()
+        stats.add_task(board_id, db_task, +1)
+        stats.apply(db)
+        record_activity(db, board_id, current_user.id, "task.updated", db_task.id, title=db_task.title,
+                        fields=sorted(task_update.model_fields_set))
+        if had_due_date or db_task.due_date is not None:
+            notify_task_changed(db, db_task.id)
+        bump_board_versions(db, board_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        if is_write_conflict(e):
+            raise _task_conflict(db, task_id)
+        raise
     # Refresh the task object to reflect changes, including potentially updated assignees
     db.refresh(db_task, attribute_names=['assignees']) 
     
     # Re-query with eager loading to ensure the response model gets populated correctly
     # This is often necessary after manual relationship manipulation
-    db_task_with_assignees = db.query(Task).options(selectinload(Task.assignees)).filter(Task.id == db_task.id).first()
+    db_task_with_assignees = _load_task(db, db_task.id, db_task.board_id, selectinload(Task.assignees), live_only=False)
 
+    board_engine.touch(board_id)
+    response.headers["ETag"] = etag(db_task_with_assignees.version)
     return db_task_with_assignees
 
 @router.delete("/{task_id}")
-async def delete_task(task_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_task(
+    task_id: str,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    expected_version = parse_if_match(if_match)
+    await board_engine.release_task(task_id) # Tasks are only deleted in Postgres
     # Find the task and verify ownership via board
-    db_task = db.query(Task).join(BoardColumn).join(Board).filter(
-        Task.id == task_id,
-        Board.created_by == current_user.id,
-        Task.is_deleted == False # Ensure we don't try to delete an already deleted task
-    ).first()
+    db_task, board_id = _get_owned_task(db, task_id, current_user.id)
     if not db_task:
         raise HTTPException(status_code=404, detail="Task not found or already deleted")
+    if expected_version is not None and db_task.version != expected_version:
+        raise conflict_error(TaskSchema.model_validate(db_task))
     
     column_id = db_task.column_id
     deleted_index = db_task.order_index
 
-    # --- Soft Delete: Set is_deleted = True --- 
-    db_task.is_deleted = True
-    db_task.updated_at = func.now() # Update timestamp
-    # db.delete(db_task) # Remove actual deletion
-
-    # Adjust order_index for subsequent non-deleted tasks in the same column
-    db.execute(
-        update(Task)
-        .where(Task.column_id == column_id)
-        .where(Task.order_index > deleted_index)
-        .where(Task.is_deleted == False) # Only adjust non-deleted tasks
-        .values(order_index=Task.order_index - 1)
-    )
+    try:
+        _claim_columns(db, [db_task.column], conditional=False)
 
-    db.commit()
+        # --- Soft Delete: Set is_deleted = True --- 
+        db_task.is_deleted = True
+        db_task.updated_at = func.now() # Update timestamp
+        # db.delete(db_task) # Remove actual deletion
+        db.flush() # Conditional on the version read above; fails before any shifting
+
+        # Adjust order_index for subsequent non-deleted tasks in the same column. The shifted rows
+        # are not in the session, so there is nothing to synchronize
+        db.execute(lambda_stmt(lambda:
+            update(Task)
+            .where(Task.board_id == board_id)
+            .where(Task.column_id == column_id)
+            .where(Task.order_index > deleted_index)
+            .where(Task.is_deleted == False) # Only adjust non-deleted tasks
+            .values(order_index=Task.order_index - 1, version=Task.version + 1)
+            .execution_options(synchronize_session=False)
+        ))
+
+        task_flow.record_transition(db, db_task.id, board_id, task_flow.DELETED, from_column_id=column_id)
+        record_activity(db, board_id, current_user.id, "task.deleted", db_task.id, title=db_task.title)
+        if db_task.due_date is not None:
+            notify_task_changed(db, db_task.id)
+        stats = StatsDelta()
+        stats.add_task(board_id, db_task, -1)
+        stats.apply(db)
+
+        bump_board_versions(db, board_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        if is_write_conflict(e):
+            raise _task_conflict(db, task_id)
+        raise
     # Return a different message or status code if preferred for soft delete
     return {"message": "Task marked as deleted"}
 
@@ -135,25 +319,37 @@ async def delete_task(task_id: str, db: Session = Depends(get_db), current_user:
 async def move_task(
     task_id: str,
     move_data: TaskMove,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    expected_version = parse_if_match(if_match)
+
+    # Applied in memory if the task's board is resident in this process (app/services/board_engine.py);
+    # a move to another board releases it and continues below
+    try:
+        engine_task = await board_engine.move_task(
+            db, task_id, move_data.column_id, move_data.order_index, expected_version, current_user.id
+        )
+    except TaskVersionConflict as e:
+        raise conflict_error(TaskSchema.model_validate(e.current))
+    if engine_task is not None:
+        response.headers["ETag"] = etag(engine_task["version"])
+        return engine_task
+
     # 1. Verify task exists and belongs to the user (and is not deleted)
-    db_task = db.query(Task).join(BoardColumn).join(Board).filter(
-        Task.id == task_id,
-        Board.created_by == current_user.id,
-        Task.is_deleted == False # Ensure the task being moved isn't deleted
-    ).first()
+    db_task, source_board_id = _get_owned_task(db, task_id, current_user.id)
     if not db_task:
         # Adjusted error message for clarity
         raise HTTPException(status_code=404, detail="Task not found, access denied, or already deleted")
+    if expected_version is not None and db_task.version != expected_version:
+        raise conflict_error(TaskSchema.model_validate(db_task))
 
     # 2. Verify destination column exists and belongs to the user
-    destination_column = db.query(BoardColumn).join(Board).filter(
-        BoardColumn.id == move_data.column_id,
-        Board.created_by == current_user.id
-    ).first()
-    if not destination_column:
+    destination_board_id = column_board_if_owned(db, move_data.column_id, current_user.id)
+    destination_column = db.get(BoardColumn, move_data.column_id) if destination_board_id else None
+    if not destination_column or destination_column.is_deleted:
         raise HTTPException(status_code=404, detail="Destination column not found or access denied")
 
     source_column_id = db_task.column_id
@@ -165,58 +361,358 @@ async def move_task(
     try:
         # --- Start Transaction --- 
 
-        # 3. Adjust indices based on whether it's the same column or different
+        # 3. Claim the affected column(s), then the moved task. Both UPDATEs are conditional
+        # on the versions read above, so if a concurrent create/move/delete got there first
+        # we stop here with a conflict instead of shifting neighbours from a stale position.
+        _claim_columns(db, [db_task.column, destination_column])
+        # Clamp to the end of the destination column (without the moved task), so a move past the
+        # end appends instead of leaving a gap. Exact: every writer to the column claimed it first
+        moved_id = db_task.id
+        new_index = min(new_index, db.scalar(lambda_stmt(lambda:
+            select(func.count()).select_from(Task)
+            .where(Task.board_id == destination_board_id)
+            .where(Task.column_id == destination_column_id)
+            .where(Task.is_deleted == False)
+            .where(Task.id != moved_id)
+        )))
+        stats = StatsDelta()
+        stats.add_task(source_board_id, db_task, -1)
+        db_task.column_id = destination_column_id
+        # Moving to another board moves the row to that board's partition; its assignments follow (ON UPDATE CASCADE)
+        db_task.board_id = destination_board_id
+        db_task.order_index = new_index
+        db_task.updated_at = func.now() # Update timestamp
+        db.flush()
+
+        # 4. Adjust indices of the other tasks based on whether it's the same column or different.
+        # Shifted rows get their version bumped so stale writers on them conflict too. The moved
+        # task is the only one in the session and none of these match it, so nothing is synchronized.
         if source_column_id == destination_column_id:
             # Moving within the same column
             if new_index > original_index:
                 # Shift non-deleted tasks between old and new pos down
-                db.execute(
+                db.execute(lambda_stmt(lambda:
                     update(Task)
+                    .where(Task.board_id == source_board_id)
                     .where(Task.column_id == source_column_id)
                     .where(Task.order_index > original_index)
                     .where(Task.order_index <= new_index)
                     .where(Task.is_deleted == False) # <<< Added filter
-                    .values(order_index=Task.order_index - 1)
-                )
+                    .where(Task.id != moved_id)
+                    .values(order_index=Task.order_index - 1, version=Task.version + 1)
+                    .execution_options(synchronize_session=False)
+                ))
             elif new_index < original_index:
                 # Shift non-deleted tasks between new and old pos up
-                db.execute(
+                db.execute(lambda_stmt(lambda:
                     update(Task)
+                    .where(Task.board_id == source_board_id)
                     .where(Task.column_id == source_column_id)
                     .where(Task.order_index >= new_index)
                     .where(Task.order_index < original_index)
                     .where(Task.is_deleted == False) # <<< Added filter
-                    .values(order_index=Task.order_index + 1)
-                )
+                    .where(Task.id != moved_id)
+                    .values(order_index=Task.order_index + 1, version=Task.version + 1)
+                    .execution_options(synchronize_session=False)
+                ))
         else:
             # Moving to a different column
             # Decrement non-deleted tasks in source column after original index
-            db.execute(
+            db.execute(lambda_stmt(lambda:
                 update(Task)
+                .where(Task.board_id == source_board_id)
                 .where(Task.column_id == source_column_id)
                 .where(Task.order_index > original_index)
                 .where(Task.is_deleted == False) # <<< Added filter
-                .values(order_index=Task.order_index - 1)
-            )
+                .values(order_index=Task.order_index - 1, version=Task.version + 1)
+                .execution_options(synchronize_session=False)
+            ))
             # Increment non-deleted tasks in destination column at or after new index
-            db.execute(
+            db.execute(lambda_stmt(lambda:
                 update(Task)
+                .where(Task.board_id == destination_board_id)
                 .where(Task.column_id == destination_column_id)
                 .where(Task.order_index >= new_index)
                 .where(Task.is_deleted == False) # <<< Added filter
-                .values(order_index=Task.order_index + 1)
-            )
-
-        # 4. Update the moved task itself
-        db_task.column_id = destination_column_id
-        db_task.order_index = new_index
-        db_task.updated_at = func.now() # Update timestamp
+                .where(Task.id != moved_id)
+                .values(order_index=Task.order_index + 1, version=Task.version + 1)
+                .execution_options(synchronize_session=False)
+            ))
 
+        if source_column_id != destination_column_id:
+            task_flow.record_transition(
+                db, db_task.id, destination_board_id, task_flow.MOVED,
+                from_column_id=source_column_id, to_column_id=destination_column_id,
+            )
+        stats.add_task(destination_board_id, db_task, +1)
+        stats.apply(db)
+        # Recorded on both boards when a task moves between boards
+        for activity_board_id in {source_board_id, destination_board_id}:
+            record_activity(
+                db, activity_board_id, current_user.id, "task.moved", db_task.id, title=db_task.title,
+                from_column_id=source_column_id, to_column_id=destination_column_id, order_index=new_index,
+            )
+        if db_task.due_date is not None:
+            notify_task_changed(db, db_task.id)
+        # Webhooks are delivered after the commit by the outbox dispatcher, never inline
+        outbox.record_event(
+            db, outbox.TASK_MOVED, task_id=db_task.id, title=db_task.title, actor_id=current_user.id,
+            from_board_id=source_board_id, from_column_id=source_column_id,
+            to_board_id=destination_board_id, to_column_id=destination_column_id, order_index=new_index,
+        )
+        bump_board_versions(db, source_board_id, destination_board_id)
         db.commit() # Commit transaction
+        outbox.webhook_dispatcher.notify()
+        task_board_cache.remember(db_task.id, destination_board_id)
         db.refresh(db_task)
+        board_engine.touch(source_board_id)
+        response.headers["ETag"] = etag(db_task.version)
         return db_task
     except Exception as e:
         db.rollback()
+        if is_write_conflict(e):
+            raise _task_conflict(db, task_id)
         # Log the exception for debugging
         # logger.error(f"Error moving task {task_id}: {e}")
-        raise HTTPException(status_code=500, detail="Failed to move task") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to move task") 
+# --- Attachments ---
+# Metadata is only read here, never with tasks or boards, so board reads stay as they were.
+# Uploads and downloads end the DB transaction before streaming, so a slow client holds no
+# pooled connection.
+
+def _clean_filename(filename: str) -> str:
+    # Only used for Content-Disposition; never as a path (blobs are stored by attachment id)
+    name = filename.replace("\\", "/").rsplit("/", 1)[-1]
+    return "".join(ch for ch in name if ch.isprintable()).strip()
+
+@router.post("/{task_id}/attachments", status_code=201, response_model=AttachmentSchema)
+async def upload_attachment(
+    task_id: str,
+    request: Request,
+    response: Response,
+    filename: str = Query(..., max_length=255),
+    content_type: Optional[str] = Header(None),
+    content_length: Optional[int] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # The request body is the file itself, streamed to the blob store as it arrives
+    db_task, _ = _get_owned_task(db, task_id, current_user.id)
+    if not db_task:
+        raise HTTPException(status_code=404, detail="Task not found or access denied")
+    name = _clean_filename(filename)
+    if not name:
+        raise HTTPException(status_code=400, detail="filename must name a file")
+    max_bytes = get_settings().attachment_max_bytes
+    if content_length is not None and content_length > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Attachments are limited to {max_bytes} bytes")
+    task_uuid = db_task.id
+    db.rollback()
+
+    attachment_id = uuid4()
+    try:
+        size, sha256 = await blob_store.write(str(attachment_id), request.stream(), max_bytes)
+    except BlobTooLarge:
+        raise HTTPException(status_code=413, detail=f"Attachments are limited to {max_bytes} bytes")
+
+    try:
+        # Checked again: the task may have been deleted or moved while the upload streamed in
+        db_task, board_id = _get_owned_task(db, task_uuid, current_user.id)
+        if not db_task:
+            raise HTTPException(status_code=404, detail="Task not found or access denied")
+        attachment = TaskAttachment(
+            id=attachment_id, task_id=db_task.id, board_id=board_id, filename=name,
+            content_type=content_type or "application/octet-stream", size=size, sha256=sha256,
+            uploaded_by=current_user.id,
+        )
+        db.add(attachment)
+        record_activity(db, board_id, current_user.id, "attachment.added", db_task.id,
+                        attachment_id=attachment_id, filename=name, size=size)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        blob_store.delete(str(attachment_id))
+        if isinstance(e, IntegrityError): # Moved to another board between the check and the insert
+            raise HTTPException(status_code=409, detail="Task was moved during the upload; retry")
+        raise
+    response.headers["Location"] = f"/api/v1/tasks/{task_uuid}/attachments/{attachment_id}"
+    return attachment
+
+@router.get("/{task_id}/attachments", response_model=List[AttachmentSchema])
+async def list_attachments(
+    task_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    db_task, _ = _get_owned_task(db, task_id, current_user.id)
+    if not db_task:
+        raise HTTPException(status_code=404, detail="Task not found or access denied")
+    return db.query(TaskAttachment).filter(
+        TaskAttachment.task_id == db_task.id,
+        TaskAttachment.board_id == db_task.board_id,
+    ).order_by(TaskAttachment.created_at).all()
+
+@router.get("/{task_id}/attachments/{attachment_id}")
+async def download_attachment(
+    task_id: str,
+    attachment_id: UUID,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    db_task, _ = _get_owned_task(db, task_id, current_user.id)
+    attachment = db.execute(
+        select(TaskAttachment.filename, TaskAttachment.content_type, TaskAttachment.size, TaskAttachment.sha256)
+        .where(
+            TaskAttachment.id == attachment_id,
+            TaskAttachment.task_id == db_task.id,
+            TaskAttachment.board_id == db_task.board_id,
+        )
+    ).first() if db_task else None
+    db.rollback()
+    if attachment is None:
+        raise HTTPException(status_code=404, detail="Attachment not found or access denied")
+
+    # Blobs never change, so the digest is a strong ETag; a Range is only honoured if the
+    # client's copy (If-Range) is still this one
+    attachment_etag = f'"{attachment.sha256}"'
+    byte_range = parse_range(range_header, attachment.size) if if_range in (None, attachment_etag) else None
+    try:
+        file = await asyncio.to_thread(blob_store.open, str(attachment_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Attachment content is missing")
+    return FileRangeResponse(
+        file, attachment.size, byte_range, media_type=attachment.content_type,
+        headers={"ETag": attachment_etag, "Content-Disposition": content_disposition(attachment.filename)},
+    )
+
+
+# --- Subtasks ---
+# A card's subtasks (and theirs) are addressed under the card, whose column decides ownership.
+# Changes lock the card row before reading the tree, so they apply one at a time per card and
+# the progress counters on the card and the subtasks in between stay exact.
+
+def _get_locked_card(db: Session, task_id, user_id) -> Task:
+    card, _ = _get_owned_task(db, task_id, user_id)
+    if not card or not subtasks.lock_card(db, card):
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Task not found or access denied")
+    return card
+
+def _get_subtask(db: Session, card: Task, subtask_id) -> Task:
+    db_subtask = subtasks.load_subtask(db, card, subtask_id)
+    if not db_subtask:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Subtask not found")
+    return db_subtask
+
+@router.get("/{task_id}/subtasks", response_model=List[SubtaskSchema])
+async def list_subtasks(
+    task_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # The whole tree, nested; board responses only carry the card's subtasks_done/subtasks_total
+    card, _ = _get_owned_task(db, task_id, current_user.id)
+    if not card:
+        raise HTTPException(status_code=404, detail="Task not found or access denied")
+    return subtasks.subtree(db, card, [name for name in SubtaskSchema.model_fields if name != "subtasks"])
+
+@router.post("/{task_id}/subtasks", status_code=201, response_model=SubtaskSchema)
+async def create_subtask(
+    task_id: str,
+    subtask: SubtaskCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    await board_engine.release_task(task_id) # The card's progress changes in Postgres
+    card = _get_locked_card(db, task_id, current_user.id)
+    parent = card if subtask.parent_id in (None, card.id) else _get_subtask(db, card, subtask.parent_id)
+    path = subtasks.child_path(parent)
+    if subtasks.depth(path) > subtasks.MAX_DEPTH:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Subtasks can be nested at most {subtasks.MAX_DEPTH} levels deep")
+
+    db_subtask = Task(
+        title=subtask.title,
+        description=subtask.description,
+        board_id=card.board_id,
+        parent_id=parent.id,
+        path=path,
+        order_index=subtasks.next_order_index(db, card.board_id, path),
+    )
+    db.add(db_subtask)
+    db.flush()
+    subtasks.add_progress(db, card.board_id, path, total=1)
+    record_activity(db, card.board_id, current_user.id, "subtask.created", db_subtask.id,
+                    task_id=card.id, title=db_subtask.title)
+    bump_board_versions(db, card.board_id) # The card's progress changed
+    db.commit()
+
+    response.headers["ETag"] = etag(db_subtask.version)
+    return db_subtask
+
+@router.put("/{task_id}/subtasks/{subtask_id}", response_model=SubtaskSchema)
+async def update_subtask(
+    task_id: str,
+    subtask_id: UUID,
+    subtask_update: SubtaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    expected_version = parse_if_match(if_match)
+    await board_engine.release_task(task_id)
+    card = _get_locked_card(db, task_id, current_user.id)
+    db_subtask = _get_subtask(db, card, subtask_id)
+    if expected_version is not None and db_subtask.version != expected_version:
+        current = SubtaskSchema.model_validate(db_subtask)
+        db.rollback()
+        raise conflict_error(current)
+
+    # An explicit null for a non-nullable field is ignored, like an omitted one
+    changes = {key: value for key, value in subtask_update.model_dump(exclude_unset=True).items()
+               if value is not None or key == "description"}
+    was_done = db_subtask.is_done
+    for key, value in changes.items():
+        setattr(db_subtask, key, value)
+    db_subtask.updated_at = func.now()
+    db.flush()
+    if db_subtask.is_done != was_done:
+        subtasks.add_progress(db, card.board_id, db_subtask.path, done=1 if db_subtask.is_done else -1)
+        bump_board_versions(db, card.board_id)
+    record_activity(db, card.board_id, current_user.id, "subtask.updated", db_subtask.id,
+                    task_id=card.id, title=db_subtask.title, fields=sorted(changes))
+    db.commit()
+
+    response.headers["ETag"] = etag(db_subtask.version)
+    return db_subtask
+
+@router.delete("/{task_id}/subtasks/{subtask_id}")
+async def delete_subtask(
+    task_id: str,
+    subtask_id: UUID,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Soft-deletes the subtask together with its own subtasks
+    expected_version = parse_if_match(if_match)
+    await board_engine.release_task(task_id)
+    card = _get_locked_card(db, task_id, current_user.id)
+    db_subtask = _get_subtask(db, card, subtask_id)
+    if expected_version is not None and db_subtask.version != expected_version:
+        current = SubtaskSchema.model_validate(db_subtask)
+        db.rollback()
+        raise conflict_error(current)
+
+    deleted, deleted_done = subtasks.delete_subtree(db, card.board_id, db_subtask)
+    subtasks.add_progress(db, card.board_id, db_subtask.path, total=-deleted, done=-deleted_done)
+    record_activity(db, card.board_id, current_user.id, "subtask.deleted", db_subtask.id,
+                    task_id=card.id, title=db_subtask.title, deleted=deleted)
+    bump_board_versions(db, card.board_id)
+    db.commit()
+    return {"message": "Subtask marked as deleted"}
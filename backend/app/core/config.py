@@ -0,0 +1,219 @@
+"""Application settings, read once from the environment (and ``.env``).
+
+Everything configurable lives on ``Settings``; modules call ``get_settings()``
+when they need a value instead of reading ``os.environ`` themselves, and
+module-level services configured from settings are ``SettingsBound``. Nothing
+reads settings at import, so ``create_app(settings)`` (or ``configure``) lets
+tests and tools run the app without touching the environment.
+"""
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+def _bool(value: str) -> bool:
+    return value.strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def _optional_int(value: Optional[str], default: Optional[int]) -> Optional[int]:
+    # An integer, or "none"/"off" for no value
+    if value is None:
+        return default
+    return None if value.strip().lower() in ("none", "off", "") else int(value)
+
+
+def _rate(value: Optional[str], default: Tuple[float, int]) -> Tuple[float, int]:
+    # "<tokens per second>,<burst>"; burst defaults to one second's worth
+    if not value:
+        return default
+    rate, _, burst = value.partition(",")
+    return float(rate), int(burst) if burst else math.ceil(float(rate))
+
+
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "auth": (1.0, 10),
+    "heavy": (5.0, 20),
+    "write": (20.0, 60),
+    "read": (50.0, 100),
+}
+
+
+@dataclass(frozen=True)
+class Settings:
+    secret_key: str
+    database_url: str = "postgresql://localhost/kanban_dev"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    # Compiled SQL kept per engine (SQLAlchemy's query_cache_size); lambda statements and ORM
+    # queries skip compilation while theirs is cached
+    db_statement_cache_size: int = 1000
+    # psycopg prepares a statement server-side once it has run this many times on a connection;
+    # None turns prepared statements off (needed behind PgBouncer in transaction pooling mode)
+    db_prepare_threshold: Optional[int] = 2
+    db_prepared_max: int = 200 # Prepared statements kept per connection
+    access_token_expire_minutes: int = 30
+    allowed_origins: List[str] = field(default_factory=lambda: ["http://localhost:5173", "http://localhost:5174"])
+
+    # Rate limiting (app/middleware/rate_limit.py)
+    rate_limit_enabled: bool = True
+    rate_limits: Dict[str, Tuple[float, int]] = field(default_factory=lambda: dict(DEFAULT_RATE_LIMITS))
+    rate_limit_store: str = "memory"
+    rate_limit_redis_url: str = "redis://localhost:6379/1"
+    heavy_concurrency: int = 8
+    heavy_queue_timeout: float = 0.25
+
+    # Idempotency-Key replays for task and board writes (app/middleware/idempotency.py)
+    idempotency_store: str = "memory"
+    idempotency_redis_url: str = "redis://localhost:6379/2"
+    idempotency_ttl: int = 900 # Seconds a completed response is replayed for
+    idempotency_lease: int = 60 # Seconds a key stays claimed by a request that never finishes
+    idempotency_max_bytes: int = 1024 * 1024 # Largest request body fingerprinted and response stored
+    idempotency_memory_max_bytes: int = 64 * 1024 * 1024
+
+    # Caches (app/services/board_cache.py, app/services/ownership.py)
+    board_cache_backend: str = "memory"
+    board_cache_max_bytes: int = 64 * 1024 * 1024
+    board_cache_redis_url: str = "redis://localhost:6379/0"
+    board_cache_ttl: int = 3600
+    ownership_cache_size: int = 100_000
+    # Boards with more live tasks than this are streamed instead of rendered and cached (app/services/board_stream.py)
+    board_stream_threshold: int = 20_000
+
+    # Background jobs (app/services/jobs.py)
+    job_workers: int = 1
+    job_poll_interval: float = 1.0
+    job_batch_size: int = 1000
+    job_lease_seconds: float = 60.0
+
+    # Outgoing webhooks (app/services/outbox.py); no URLs means no events are recorded
+    webhook_urls: List[str] = field(default_factory=list)
+    webhook_concurrency: int = 2 # Batches in flight per endpoint and process; 0 dispatches elsewhere
+    webhook_batch_size: int = 100
+    webhook_timeout: float = 10.0
+    webhook_poll_interval: float = 1.0
+    webhook_max_backoff: float = 300.0
+
+    # Task attachments (app/services/blob_store.py)
+    attachment_store: str = "local"
+    attachment_dir: str = "attachments"
+    attachment_max_bytes: int = 100 * 1024 * 1024
+
+    # In-memory engine for hot boards (app/services/board_engine.py)
+    board_engine_enabled: bool = False
+    board_engine_wal_dir: str = "board_engine_wal" # Shared by the processes of a host, so survivors recover the dead
+    board_engine_max_bytes: int = 256 * 1024 * 1024 # Roughly, of resident boards per process
+    board_engine_idle_seconds: float = 300.0
+    board_engine_promote_after: int = 20 # Requests to a board within a minute that make it resident
+    board_engine_flush_interval: float = 0.05 # Seconds between writes to Postgres
+
+    @classmethod
+    def from_env(cls, env_file: Optional[str] = None) -> "Settings":
+        """Read settings from the environment. A ``.env`` file (found by searching up from
+        this package unless ``env_file`` is given) only fills in variables that are unset."""
+        from dotenv import load_dotenv
+        load_dotenv(env_file)
+        env = os.environ.get
+
+        secret_key = env("SECRET_KEY")
+        if not secret_key:
+            raise EnvironmentError("SECRET_KEY environment variable not set")
+        defaults = cls(secret_key=secret_key)
+        return cls(
+            secret_key=secret_key,
+            database_url=env("DATABASE_URL", defaults.database_url),
+            db_pool_size=int(env("DB_POOL_SIZE", defaults.db_pool_size)),
+            db_max_overflow=int(env("DB_MAX_OVERFLOW", defaults.db_max_overflow)),
+            db_statement_cache_size=int(env("DB_STATEMENT_CACHE_SIZE", defaults.db_statement_cache_size)),
+            db_prepare_threshold=_optional_int(env("DB_PREPARE_THRESHOLD"), defaults.db_prepare_threshold),
+            db_prepared_max=int(env("DB_PREPARED_MAX", defaults.db_prepared_max)),
+            access_token_expire_minutes=int(env("ACCESS_TOKEN_EXPIRE_MINUTES", defaults.access_token_expire_minutes)),
+            allowed_origins=[
+                origin.strip() for origin in env("ALLOWED_ORIGINS", ",".join(defaults.allowed_origins)).split(",")
+            ],
+            rate_limit_enabled=_bool(env("RATE_LIMIT_ENABLED", "true")),
+            rate_limits={
+                route_class: _rate(env(f"RATE_LIMIT_{route_class.upper()}"), default)
+                for route_class, default in DEFAULT_RATE_LIMITS.items()
+            },
+            rate_limit_store=env("RATE_LIMIT_STORE", defaults.rate_limit_store),
+            rate_limit_redis_url=env("RATE_LIMIT_REDIS_URL", defaults.rate_limit_redis_url),
+            heavy_concurrency=int(env("HEAVY_CONCURRENCY", defaults.heavy_concurrency)),
+            heavy_queue_timeout=float(env("HEAVY_QUEUE_TIMEOUT", defaults.heavy_queue_timeout)),
+            idempotency_store=env("IDEMPOTENCY_STORE", defaults.idempotency_store),
+            idempotency_redis_url=env("IDEMPOTENCY_REDIS_URL", defaults.idempotency_redis_url),
+            idempotency_ttl=int(env("IDEMPOTENCY_TTL", defaults.idempotency_ttl)),
+            idempotency_lease=int(env("IDEMPOTENCY_LEASE", defaults.idempotency_lease)),
+            idempotency_max_bytes=int(env("IDEMPOTENCY_MAX_BYTES", defaults.idempotency_max_bytes)),
+            idempotency_memory_max_bytes=int(env("IDEMPOTENCY_MEMORY_MAX_BYTES", defaults.idempotency_memory_max_bytes)),
+            board_cache_backend=env("BOARD_CACHE_BACKEND", defaults.board_cache_backend),
+            board_cache_max_bytes=int(env("BOARD_CACHE_MAX_BYTES", defaults.board_cache_max_bytes)),
+            board_cache_redis_url=env("BOARD_CACHE_REDIS_URL", defaults.board_cache_redis_url),
+            board_cache_ttl=int(env("BOARD_CACHE_TTL", defaults.board_cache_ttl)),
+            ownership_cache_size=int(env("OWNERSHIP_CACHE_SIZE", defaults.ownership_cache_size)),
+            board_stream_threshold=int(env("BOARD_STREAM_THRESHOLD", defaults.board_stream_threshold)),
+            job_workers=int(env("JOB_WORKERS", defaults.job_workers)),
+            job_poll_interval=float(env("JOB_POLL_INTERVAL", defaults.job_poll_interval)),
+            job_batch_size=int(env("JOB_BATCH_SIZE", defaults.job_batch_size)),
+            job_lease_seconds=float(env("JOB_LEASE_SECONDS", defaults.job_lease_seconds)),
+            webhook_urls=[url.strip() for url in env("WEBHOOK_URLS", "").split(",") if url.strip()],
+            webhook_concurrency=int(env("WEBHOOK_CONCURRENCY", defaults.webhook_concurrency)),
+            webhook_batch_size=int(env("WEBHOOK_BATCH_SIZE", defaults.webhook_batch_size)),
+            webhook_timeout=float(env("WEBHOOK_TIMEOUT", defaults.webhook_timeout)),
+            webhook_poll_interval=float(env("WEBHOOK_POLL_INTERVAL", defaults.webhook_poll_interval)),
+            webhook_max_backoff=float(env("WEBHOOK_MAX_BACKOFF", defaults.webhook_max_backoff)),
+            attachment_store=env("ATTACHMENT_STORE", defaults.attachment_store),
+            attachment_dir=env("ATTACHMENT_DIR", defaults.attachment_dir),
+            attachment_max_bytes=int(env("ATTACHMENT_MAX_BYTES", defaults.attachment_max_bytes)),
+            board_engine_enabled=_bool(env("BOARD_ENGINE_ENABLED", "false")),
+            board_engine_wal_dir=env("BOARD_ENGINE_WAL_DIR", defaults.board_engine_wal_dir),
+            board_engine_max_bytes=int(env("BOARD_ENGINE_MAX_BYTES", defaults.board_engine_max_bytes)),
+            board_engine_idle_seconds=float(env("BOARD_ENGINE_IDLE_SECONDS", defaults.board_engine_idle_seconds)),
+            board_engine_promote_after=int(env("BOARD_ENGINE_PROMOTE_AFTER", defaults.board_engine_promote_after)),
+            board_engine_flush_interval=float(env("BOARD_ENGINE_FLUSH_INTERVAL", defaults.board_engine_flush_interval)),
+        )
+
+
+_settings: Optional[Settings] = None
+
+
+def configure(settings: Settings):
+    """Use ``settings`` for this process. Call before the modules that read them are imported."""
+    global _settings
+    _settings = settings
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings.from_env()
+    return _settings
+
+
+class SettingsBound:
+    """A module-level service built by ``factory()`` from the settings in effect.
+
+    It is built on first use, not at import, and built again when ``configure``
+    installs other settings. Attribute access goes to the current instance.
+    Install settings before an app starts: a runner started under the old ones
+    is not stopped by a change.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._settings: Optional[Settings] = None
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        settings = get_settings()
+        if settings is not self._settings:
+            with self._lock:
+                if settings is not self._settings:
+                    self._instance = self._factory()
+                    self._settings = settings
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self.current(), name)
@@ -0,0 +1,44 @@
+"""Password hashing and access tokens.
+
+passlib (with bcrypt) and jose (with cryptography) are imported on first use
+rather than at import time; together they are a large share of a cold import
+of the app, and most requests only ever need ``decode_token_subject``.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+from .config import get_settings
+
+ALGORITHM = "HS256"
+
+
+@lru_cache(maxsize=1)
+def _pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def verify_password(plain_password, hashed_password):
+    return _pwd_context().verify(plain_password, hashed_password)
+
+
+def get_password_hash(password):
+    return _pwd_context().hash(password)
+
+
+def create_access_token(data: dict):
+    from jose import jwt
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(minutes=get_settings().access_token_expire_minutes)
+    to_encode.update({"exp": expire})
+    return jwt.encode(to_encode, get_settings().secret_key, algorithm=ALGORITHM)
+
+
+def decode_token_subject(token: str) -> Optional[str]:
+    """The "sub" of a valid, unexpired token, else None."""
+    from jose import JWTError, jwt
+    try:
+        return jwt.decode(token, get_settings().secret_key, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
@@ -1,18 +1,50 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
-import os
-from dotenv import load_dotenv
+import threading
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
+from ..core.config import get_settings
 
-load_dotenv()
+# The engine (and with it the DB driver import and the pool) is created on first use,
+# not at import, so importing the app stays cheap. The app's lifespan disposes it.
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
 
-SQLALCHEMY_DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    "postgresql://localhost/kanban_dev"
-)
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                settings = get_settings()
+                psycopg = make_url(settings.database_url).get_driver_name() == "psycopg"
+                _engine = create_engine(
+                    settings.database_url,
+                    pool_size=settings.db_pool_size,
+                    max_overflow=settings.db_max_overflow,
+                    query_cache_size=settings.db_statement_cache_size,
+                    # Server-side prepared statements: the hot statements' SQL repeats exactly, so
+                    # Postgres parses and plans them once per connection
+                    connect_args={"prepare_threshold": settings.db_prepare_threshold} if psycopg else {},
+                )
+                if psycopg:
+                    @event.listens_for(_engine, "connect")
+                    def _set_prepared_max(dbapi_connection, connection_record):
+                        dbapi_connection.prepared_max = settings.db_prepared_max
+                _session_factory.configure(bind=_engine)
+    return _engine
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def dispose_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+def SessionLocal() -> Session:
+    # Kept callable like the sessionmaker it replaces, so existing callers are unchanged
+    get_engine()
+    return _session_factory()
 
 # Dependency
 def get_db():
@@ -20,4 +52,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
@@ -1,40 +1,93 @@
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .api import auth, boards, tasks, users
-from .db.database import engine
-from .models import base
-from .middleware.logging import LoggingMiddleware
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-app = FastAPI(title="Kanban API")
-
-# Add logging middleware
-app.add_middleware(LoggingMiddleware)
-
-# Get allowed origins from environment variable, default to dev server
-allowed_origins_str = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:5174")
-allowed_origins = [origin.strip() for origin in allowed_origins_str.split(',')]
-
-# CORS middleware configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization", "Accept"],
-    expose_headers=["Content-Type", "Authorization"],
-)
-
-# Include routers
-app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
-app.include_router(boards.router, prefix="/api/v1/boards", tags=["boards"])
-app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["tasks"])
-app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
-
-@app.get("/")
-async def root():
-    return {"message": "Welcome to Kanban API"} 
\ No newline at end of file
+from .core.config import Settings, configure, get_settings
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Build the API. ``settings`` defaults to the environment (and ``.env``).
+
+    Routers and services are imported here, so importing this module stays
+    cheap. Services take their configuration from the settings installed when
+    they are first used. Nothing here touches the database: the engine and its
+    pool are created by the first request or job.
+    """
+    if settings is not None:
+        configure(settings)
+    settings = get_settings()
+
+    from .api import auth, boards, tasks, users, metrics, jobs
+    from .api.concurrency import board_resident_handler
+    from .db.database import dispose_engine
+    from .middleware.idempotency import IdempotencyMiddleware
+    from .middleware.logging import LoggingMiddleware
+    from .middleware.rate_limit import RateLimitMiddleware
+    from .services.board_engine import BoardResident, board_engine
+    from .services.jobs import job_runner
+    from .services.outbox import webhook_dispatcher
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Background job workers (JOB_WORKERS per process) and webhook delivery (WEBHOOK_CONCURRENCY)
+        await job_runner.start()
+        await webhook_dispatcher.start()
+        # Hot boards held in memory (BOARD_ENGINE_ENABLED); recovers dead engines' logs first
+        await board_engine.start()
+        try:
+            yield
+        finally:
+            await board_engine.stop() # Flushes and releases its boards
+            await webhook_dispatcher.stop()
+            await job_runner.stop()
+            dispose_engine()
+
+    app = FastAPI(title="Kanban API", lifespan=lifespan)
+    app.add_exception_handler(BoardResident, board_resident_handler)
+
+    # Idempotency-Key replays (innermost, so replays are logged and rate-limited like other requests)
+    app.add_middleware(IdempotencyMiddleware)
+
+    # Add logging middleware
+    app.add_middleware(LoggingMiddleware)
+
+    # Rate limiting / admission control (inside CORS so 429s still carry CORS headers)
+    app.add_middleware(RateLimitMiddleware)
+
+    # CORS middleware configuration
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.allowed_origins,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=["Content-Type", "Authorization", "Accept", "If-Match", "Range", "If-Range",
+                       "Idempotency-Key"],
+        expose_headers=["Content-Type", "Authorization", "ETag", "Retry-After", "Location",
+                        "Accept-Ranges", "Content-Range", "Content-Disposition", "Idempotent-Replayed"],
+    )
+
+    # Include routers
+    app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
+    app.include_router(boards.router, prefix="/api/v1/boards", tags=["boards"])
+    app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["tasks"])
+    app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
+    app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["metrics"])
+    app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
+
+    @app.get("/")
+    async def root():
+        return {"message": "Welcome to Kanban API"}
+
+    return app
+
+_app: Optional[FastAPI] = None
+
+
+def __getattr__(name):
+    # `uvicorn app.main:app`: the app is built from the environment on first access, not at import,
+    # so create_app(settings) callers import this module without side effects
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _app is None:
+        _app = create_app()
+    return _app
@@ -0,0 +1,313 @@
+"""Idempotency-Key support for task and board writes.
+
+A client that may retry a POST/PUT/PATCH/DELETE under /api/v1/tasks or
+/api/v1/boards sends ``Idempotency-Key: <unique string>``. The first request
+with a key claims it (per user) and runs; its response is stored for
+``IDEMPOTENCY_TTL`` seconds together with a fingerprint of the request
+(method, path, query and body). A retry with the same key then gets:
+
+- the stored response, marked ``Idempotent-Replayed: true``, if the request is
+  the same; the endpoint is not called, so nothing touches the database;
+- ``422`` if a different request reuses the key;
+- ``409`` with ``Retry-After`` while the first request is still running.
+
+5xx responses are not stored, so retrying them runs the request again. A key
+is claimed for at most ``IDEMPOTENCY_LEASE`` seconds, so a worker that dies
+mid-request does not hold it for the whole TTL.
+
+Request bodies over ``IDEMPOTENCY_MAX_BYTES`` (attachment uploads, board
+imports) are streamed through unread and fingerprinted by length and content
+type only. Responses over it are remembered without their body: a retry gets
+``409`` saying the request already completed, rather than running it twice.
+
+Stores (``IDEMPOTENCY_STORE``):
+
+``memory`` (default)
+    Per worker, bounded by ``IDEMPOTENCY_MEMORY_MAX_BYTES``; a retry that lands
+    on another worker runs again.
+``redis``
+    Shared by all workers through ``IDEMPOTENCY_REDIS_URL`` (SET NX claims);
+    fails open, i.e. without idempotency, while the server is unreachable.
+``none``
+    Disabled.
+"""
+import base64
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from ..core.config import get_settings
+from .rate_limit import API, bearer_subject
+
+SCOPES = (f"{API}/tasks", f"{API}/boards")
+METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+REPLAYED = (b"idempotent-replayed", b"true")
+
+
+class IdempotencyStats:
+    def __init__(self):
+        self.executed = 0 # Requests that claimed a key and ran
+        self.replayed = 0
+        self.in_progress = 0 # Retries turned away while the first request ran
+        self.mismatched = 0 # Keys reused for a different request
+        self.store_errors = 0 # Store failures (requests ran without idempotency)
+
+    def as_dict(self) -> dict:
+        return {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "in_progress": self.in_progress,
+            "mismatched": self.mismatched,
+            "store_errors": self.store_errors,
+        }
+
+
+idempotency_stats = IdempotencyStats()
+
+# A record is {"fingerprint": str, "status": int or None while the request runs,
+# "headers": [[name, value], ...] (bytes), "body": bytes, or None if it was too large to keep}
+
+
+class MemoryIdempotencyStore:
+    """Records in an LRU dict bounded by size, expired lazily. Only used from the event loop."""
+
+    backend = "memory"
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, int, dict]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            return None
+        return entry[2]
+
+    async def claim(self, key: str, record: dict, ttl: int) -> bool:
+        if await self.get(key) is not None:
+            return False
+        self._put(key, record, ttl)
+        return True
+
+    async def put(self, key: str, record: dict, ttl: int):
+        self._put(key, record, ttl)
+
+    async def delete(self, key: str):
+        self._drop(key)
+
+    def _put(self, key: str, record: dict, ttl: int):
+        self._drop(key)
+        size = len(key) + len(record.get("body") or b"") + sum(len(n) + len(v) for n, v in record.get("headers", ()))
+        self._entries[key] = (time.monotonic() + ttl, size, record)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+
+class RedisIdempotencyStore:
+    """Records as JSON on a Redis-compatible server, expiring with the server's TTLs."""
+
+    backend = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisIdempotencyStore":
+        import redis.asyncio # Optional dependency, only needed for this store
+        return cls(redis.asyncio.Redis.from_url(url, socket_timeout=0.2))
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = await self.client.get(key)
+        return _decode(value) if value is not None else None
+
+    async def claim(self, key: str, record: dict, ttl: int) -> bool:
+        return bool(await self.client.set(key, _encode(record), nx=True, ex=ttl))
+
+    async def put(self, key: str, record: dict, ttl: int):
+        await self.client.set(key, _encode(record), ex=ttl)
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+
+def _encode(record: dict) -> bytes:
+    body = record.get("body")
+    return json.dumps({
+        "fingerprint": record["fingerprint"],
+        "status": record["status"],
+        "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in record.get("headers", ())],
+        "body": base64.b64encode(body).decode() if body is not None else None,
+    }).encode()
+
+
+def _decode(value: bytes) -> dict:
+    record = json.loads(value)
+    record["headers"] = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]]
+    if record["body"] is not None:
+        record["body"] = base64.b64decode(record["body"])
+    return record
+
+
+def create_store():
+    settings = get_settings()
+    if settings.idempotency_store == "memory":
+        return MemoryIdempotencyStore(settings.idempotency_memory_max_bytes)
+    if settings.idempotency_store == "redis":
+        return RedisIdempotencyStore.from_url(settings.idempotency_redis_url)
+    if settings.idempotency_store == "none":
+        return None
+    raise ValueError(f"Unknown IDEMPOTENCY_STORE '{settings.idempotency_store}'")
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware, so the stored response is exactly the bytes that were sent."""
+
+    def __init__(self, app, store=None):
+        settings = get_settings()
+        self.app = app
+        self.store = store or create_store()
+        self.ttl = settings.idempotency_ttl
+        self.lease = settings.idempotency_lease
+        self.max_bytes = settings.idempotency_max_bytes
+
+    async def __call__(self, scope, receive, send):
+        headers = dict(scope["headers"]) if scope["type"] == "http" else {}
+        key = headers.get(b"idempotency-key")
+        if (key is None or self.store is None or scope["method"] not in METHODS
+                or not scope["path"].startswith(SCOPES)):
+            await self.app(scope, receive, send)
+            return
+        user_id = bearer_subject(scope)
+        if user_id is None:
+            await self.app(scope, receive, send) # Rejected by the endpoint
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _respond(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        body, receive = await self._read_body(headers, receive)
+        if receive is None:
+            return # The client disconnected while sending the body
+        fingerprint = self._fingerprint(scope, headers, body)
+        store_key = f"idempotency:{user_id}:{key.decode('latin-1')}"
+        try:
+            record = await self.store.get(store_key)
+            claimed = record is None and await self.store.claim(
+                store_key, {"fingerprint": fingerprint, "status": None}, self.lease
+            )
+            if record is None and not claimed: # Claimed by a concurrent request just now
+                record = await self.store.get(store_key) or {"fingerprint": fingerprint, "status": None}
+        except Exception:
+            idempotency_stats.store_errors += 1
+            await self.app(scope, receive, send)
+            return
+
+        if claimed:
+            idempotency_stats.executed += 1
+            await self._execute(scope, receive, send, store_key, fingerprint)
+        elif record["fingerprint"] != fingerprint:
+            idempotency_stats.mismatched += 1
+            await _respond(send, 422, "Idempotency-Key was already used for a different request")
+        elif record["status"] is None:
+            idempotency_stats.in_progress += 1
+            await _respond(send, 409, "A request with this Idempotency-Key is still in progress", retry_after=1)
+        elif record["body"] is None:
+            idempotency_stats.replayed += 1
+            await _respond(send, 409, "The request with this Idempotency-Key already completed; "
+                                      "its response is too large to replay")
+        else:
+            idempotency_stats.replayed += 1
+            await send({"type": "http.response.start", "status": record["status"],
+                        "headers": [*record["headers"], REPLAYED]})
+            await send({"type": "http.response.body", "body": record["body"]})
+
+    async def _read_body(self, headers: Dict[bytes, bytes], receive):
+        """(body, receive replaying it), (None, receive) to leave a large body unread, or (None, None)."""
+        length = headers.get(b"content-length", b"")
+        if not length.isdigit() or int(length) > self.max_bytes:
+            return None, receive
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None, None
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return body, replay
+
+    @staticmethod
+    def _fingerprint(scope, headers: Dict[bytes, bytes], body: Optional[bytes]) -> str:
+        digest = hashlib.sha256()
+        for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b"")):
+            digest.update(part + b"\0")
+        if body is not None:
+            digest.update(body)
+        else:
+            digest.update(b"unread\0" + headers.get(b"content-length", b"") + b"\0" + headers.get(b"content-type", b""))
+        return digest.hexdigest()
+
+    async def _execute(self, scope, receive, send, store_key: str, fingerprint: str):
+        response = {"status": None, "headers": [], "chunks": [], "size": 0, "complete": False}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                response["size"] += len(body)
+                if response["size"] <= self.max_bytes:
+                    response["chunks"].append(body)
+                response["complete"] = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            await self._finish(store_key, fingerprint, response)
+
+    async def _finish(self, store_key: str, fingerprint: str, response: dict):
+        try:
+            if response["complete"] and response["status"] < 500:
+                await self.store.put(store_key, {
+                    "fingerprint": fingerprint,
+                    "status": response["status"],
+                    "headers": response["headers"],
+                    "body": b"".join(response["chunks"]) if response["size"] <= self.max_bytes else None,
+                }, self.ttl)
+            else:
+                await self.store.delete(store_key) # Let a retry run it again
+        except Exception:
+            idempotency_stats.store_errors += 1
+
+
+async def _respond(send, status: int, detail: str, retry_after: Optional[int] = None):
+    body = json.dumps({"detail": detail}).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,210 @@
+"""Admission control: per-user token buckets per route class, plus a per-worker cap
+on concurrent heavy requests so one client cannot exhaust the DB pool.
+
+Route classes (checked in this order):
+
+``auth``   POSTs under /api/v1/auth (login/register), limited per client IP
+``heavy``  full-board reads, exports, imports, clones, stats/flow/activity
+``write``  any other POST/PUT/PATCH/DELETE
+``read``   everything else
+
+Requests are keyed by the verified ``sub`` of the bearer token, falling back
+to the client IP. Limits are ``RATE_LIMIT_<CLASS>=<tokens per second>,<burst>``
+(e.g. ``RATE_LIMIT_HEAVY=5,20``); ``HEAVY_CONCURRENCY`` caps in-flight heavy
+requests per worker and ``RATE_LIMIT_ENABLED=false`` turns everything off.
+Rejections are ``429`` with ``Retry-After``.
+
+Bucket state lives in memory by default. ``RATE_LIMIT_STORE=redis`` (with
+``RATE_LIMIT_REDIS_URL``) shares it between workers using INCR/PEXPIRE
+windows of ``burst`` requests per ``burst / rate`` seconds, which only needs
+commands every Redis-compatible server supports.
+"""
+import asyncio
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from ..core.config import get_settings
+from ..core.security import decode_token_subject
+
+API = "/api/v1"
+
+HEAVY_ROUTES = [
+    ("GET", re.compile(rf"^{API}/boards/?$")),
+    ("GET", re.compile(rf"^{API}/boards/(?!templates/?$)[^/]+/?$")), # A board, not the template listing
+    ("GET", re.compile(rf"^{API}/boards/[^/]+/(export|stats|flow|activity)/?$")),
+    ("POST", re.compile(rf"^{API}/boards/(import|[^/]+/clone|[^/]+/templates|templates/[^/]+/boards)/?$")),
+]
+
+def bearer_subject(scope) -> Optional[str]:
+    """Verified ``sub`` of the request's bearer token, or None if it has no valid one."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            return decode_token_subject(token)
+    return None
+
+def classify(method: str, path: str) -> str:
+    if method == "POST" and path.startswith(f"{API}/auth/"):
+        return "auth"
+    for route_method, pattern in HEAVY_ROUTES:
+        if method == route_method and pattern.match(path):
+            return "heavy"
+    if method in ("POST", "PUT", "PATCH", "DELETE"):
+        return "write"
+    return "read"
+
+
+class LimiterStats:
+    def __init__(self):
+        self.allowed: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+        self.shed = 0 # Heavy requests turned away by the concurrency cap
+        self.heavy_in_flight = 0
+        self.store_errors = 0 # Shared-store failures (requests were let through)
+
+    def as_dict(self) -> dict:
+        return {
+            "allowed": dict(self.allowed),
+            "rejected": dict(self.rejected),
+            "heavy_shed": self.shed,
+            "heavy_in_flight": self.heavy_in_flight,
+            "store_errors": self.store_errors,
+        }
+
+
+limiter_stats = LimiterStats()
+
+
+class MemoryBucketStore:
+    """Token buckets in a bounded LRU dict (per worker)."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(burst), now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True, 0.0
+        return False, (1 - bucket[0]) / rate
+
+
+class RedisWindowStore:
+    """Fixed windows shared through a Redis-compatible server; fails open on errors."""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisWindowStore":
+        import redis.asyncio # Optional dependency, only needed for this store
+        return cls(redis.asyncio.Redis.from_url(url, socket_timeout=0.2))
+
+    async def consume(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        window = burst / rate
+        now = time.time()
+        window_index = int(now // window)
+        window_key = f"ratelimit:{key}:{window_index}"
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.incr(window_key)
+            pipe.pexpire(window_key, int(window * 1000) + 1000)
+            count, _ = await pipe.execute()
+        except Exception:
+            limiter_stats.store_errors += 1
+            return True, 0.0
+        if count <= burst:
+            return True, 0.0
+        return False, (window_index + 1) * window - now
+
+
+def create_store():
+    settings = get_settings()
+    if settings.rate_limit_store == "redis":
+        return RedisWindowStore.from_url(settings.rate_limit_redis_url)
+    return MemoryBucketStore()
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware, so the heavy-request slot is held until the body is fully sent."""
+
+    def __init__(self, app, store=None):
+        settings = get_settings()
+        self.app = app
+        self.enabled = settings.rate_limit_enabled
+        self.limits: Dict[str, Tuple[float, int]] = settings.rate_limits
+        self.store = store or create_store()
+        self.heavy_slots = asyncio.Semaphore(settings.heavy_concurrency)
+        # How long a heavy request may wait for a slot before being shed
+        self.heavy_wait = settings.heavy_queue_timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify(scope["method"], scope["path"])
+        rate, burst = self.limits[route_class]
+        key = f"{route_class}:{self._identity(scope, route_class)}"
+        allowed, retry_after = await self.store.consume(key, rate, burst)
+        if not allowed:
+            limiter_stats.rejected[route_class] = limiter_stats.rejected.get(route_class, 0) + 1
+            await self._reject(send, retry_after, "Rate limit exceeded")
+            return
+        limiter_stats.allowed[route_class] = limiter_stats.allowed.get(route_class, 0) + 1
+
+        if route_class != "heavy":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await asyncio.wait_for(self.heavy_slots.acquire(), self.heavy_wait)
+        except asyncio.TimeoutError:
+            limiter_stats.shed += 1
+            await self._reject(send, 1, "Server busy, retry shortly")
+            return
+        limiter_stats.heavy_in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter_stats.heavy_in_flight -= 1
+            self.heavy_slots.release()
+
+    def _identity(self, scope, route_class: str) -> str:
+        if route_class != "auth":
+            # None if the token is invalid: limited by IP, rejected later by the endpoint
+            user_id = bearer_subject(scope)
+            if user_id:
+                return f"user:{user_id}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    @staticmethod
+    async def _reject(send, retry_after: float, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from uuid import uuid4
+from .base import Base
+
+class BoardActivity(Base):
+    """Append-only "what changed on this board" feed.
+
+    Range-partitioned by month on created_at (see app/services/activity.py), so
+    retention drops whole partitions instead of deleting rows.
+    """
+    __tablename__ = "board_activity"
+
+    id = Column(UUID, primary_key=True, default=uuid4)
+    # Part of the primary key because Postgres requires the partition key in it
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.clock_timestamp())
+    board_id = Column(UUID, ForeignKey("boards.id"), nullable=False)
+    actor_id = Column(UUID, ForeignKey("users.id"))
+    action = Column(String, nullable=False) # e.g. "task.moved", "column.renamed"
+    entity_id = Column(UUID) # The task or column acted on, if any
+    details = Column(JSONB)
+
+    __table_args__ = (
+        # Keyset pagination of a board's feed, newest first
+        Index("ix_board_activity_board_id_created_at_id", "board_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
@@ -1,9 +1,18 @@
-from sqlalchemy import Table, Column, UUID, ForeignKey
+from sqlalchemy import Table, Column, UUID, ForeignKey, ForeignKeyConstraint, PrimaryKeyConstraint
 from .base import Base
 
 task_assignees_table = Table(
     "task_assignees",
     Base.metadata,
-    Column("task_id", UUID, ForeignKey("tasks.id"), primary_key=True),
-    Column("user_id", UUID, ForeignKey("users.id"), primary_key=True),
-) 
\ No newline at end of file
+    Column("task_id", UUID, nullable=False),
+    # The task's board, so assignments are hash-partitioned alongside their tasks
+    Column("board_id", UUID, nullable=False),
+    Column("user_id", UUID, ForeignKey("users.id"), nullable=False),
+    # Board first: loading a board's assignments is one range scan of its partition
+    PrimaryKeyConstraint("board_id", "task_id", "user_id"),
+    # Follows the task when a move changes its board (and partition)
+    ForeignKeyConstraint(
+        ["task_id", "board_id"], ["tasks.id", "tasks.board_id"], onupdate="CASCADE", ondelete="CASCADE"
+    ),
+    postgresql_partition_by="HASH (board_id)",
+)
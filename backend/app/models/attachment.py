@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, UUID, ForeignKey, ForeignKeyConstraint, BigInteger, DateTime, Index
+from sqlalchemy.sql import func
+from uuid import uuid4
+from .base import Base
+
+class TaskAttachment(Base):
+    """Metadata of a file attached to a task; the content lives in the blob store under ``id``.
+
+    Not loaded with tasks or boards: it is only read by the attachment endpoints.
+    """
+    __tablename__ = "task_attachments"
+
+    id = Column(UUID, primary_key=True, default=uuid4)
+    task_id = Column(UUID, nullable=False)
+    board_id = Column(UUID, nullable=False) # The task's board; follows the task when it moves (ON UPDATE CASCADE)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String, nullable=False) # Hex digest, computed while the upload streams in; also the ETag
+    uploaded_by = Column(UUID, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        ForeignKeyConstraint(["task_id", "board_id"], ["tasks.id", "tasks.board_id"],
+                             onupdate="CASCADE", ondelete="CASCADE"),
+        # Lists a task's attachments (and backs the foreign key)
+        Index("ix_task_attachments_task_id_board_id", "task_id", "board_id"),
+    )
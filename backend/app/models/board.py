@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, UUID, ForeignKey, Integer, Boolean
+from sqlalchemy import BigInteger, Column, String, UUID, ForeignKey, Integer, Boolean
 from sqlalchemy.orm import relationship
 from uuid import uuid4
 from .base import Base, TimestampMixin
@@ -11,6 +11,14 @@ class Board(Base, TimestampMixin):
     name = Column(String, nullable=False)
     description = Column(String)
     created_by = Column(UUID, ForeignKey("users.id"))
+    # Templates are regular boards hidden from the board list and used as clone sources
+    is_template = Column(Boolean, default=False, nullable=False)
+    # Bumped by every change to the board, its columns or tasks; keys the rendered-board cache
+    version = Column(Integer, nullable=False, server_default="1")
+    # Process holding the board in its in-memory engine (app/services/board_engine.py), and the
+    # last write-ahead log entry of that process applied here. While set, only that process writes
+    engine_owner = Column(String)
+    engine_lsn = Column(BigInteger, nullable=False, server_default="0")
     
     # Modified columns relationship to filter is_deleted and order by order_index
     columns = relationship(
@@ -30,6 +38,8 @@ class BoardColumn(Base, TimestampMixin):
     order_index = Column(Integer, nullable=False)
     board_id = Column(UUID, ForeignKey("boards.id"))
     is_deleted = Column(Boolean, default=False, nullable=False, index=True)
+    # Optimistic concurrency: every UPDATE is conditional on the version that was read
+    version = Column(Integer, nullable=False, server_default="1")
 
     # Modified board relationship to use the filtered columns relationship defined in Board
     board = relationship("Board", back_populates="columns")
@@ -39,4 +49,6 @@ class BoardColumn(Base, TimestampMixin):
         order_by="Task.order_index",
         back_populates="column", 
         cascade="all, delete-orphan"
-    ) 
\ No newline at end of file
+    )
+
+    __mapper_args__ = {"version_id_col": version} 
\ No newline at end of file
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, UUID, ForeignKey, Integer
+from .base import Base
+
+class BoardCounter(Base):
+    """One incrementally maintained count per (board, dimension, key).
+
+    Dimensions: "column" (key = column id), "priority" (key = priority),
+    "due" (key = UTC due date, YYYY-MM-DD) and "assignee" (key = user id).
+    """
+    __tablename__ = "board_counters"
+
+    board_id = Column(UUID, ForeignKey("boards.id"), primary_key=True)
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
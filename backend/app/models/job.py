@@ -0,0 +1,37 @@
+from sqlalchemy import Column, String, UUID, ForeignKey, Integer, DateTime, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from uuid import uuid4
+from .base import Base
+
+class Job(Base):
+    """Background job, claimed by workers with SELECT ... FOR UPDATE SKIP LOCKED.
+
+    status goes queued -> running -> succeeded | failed. A running job holds a
+    lease (locked_by/locked_until); if its worker dies, another worker picks it
+    up once the lease expires and resumes from the committed progress.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(UUID, primary_key=True, default=uuid4)
+    kind = Column(String, nullable=False) # e.g. "column.delete", "tasks.bulk_update"
+    status = Column(String, nullable=False, server_default="queued")
+    created_by = Column(UUID, ForeignKey("users.id"), nullable=False)
+    board_id = Column(UUID, ForeignKey("boards.id"))
+    params = Column(JSONB, nullable=False, server_default="{}")
+    progress = Column(Integer, nullable=False, server_default="0") # Items processed so far
+    total = Column(Integer) # Items to process, once known
+    result = Column(JSONB)
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    locked_by = Column(String)
+    locked_until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Workers only ever scan unfinished jobs, oldest first
+        Index("ix_jobs_pending_created_at", "created_at", postgresql_where=status.in_(["queued", "running"])),
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, UUID, Integer, BigInteger, DateTime, Identity, Index, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from .base import Base
+
+class OutboxEvent(Base):
+    """Webhook event waiting to be delivered to one endpoint (transactional outbox).
+
+    Written in the same transaction as the change it describes, one row per
+    configured endpoint, and deleted once the endpoint acknowledged it.
+    available_at doubles as the lease: a dispatcher that claims a row pushes it
+    into the future, and a failed delivery sets it to the next retry time.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    event_id = Column(UUID, nullable=False) # Shared by an event's rows for every endpoint; receivers dedupe on it
+    endpoint = Column(String, nullable=False)
+    event_type = Column(String, nullable=False) # e.g. "task.moved"
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text)
+
+    __table_args__ = (
+        # Dispatchers claim an endpoint's due rows, oldest first
+        Index("ix_outbox_events_endpoint_available_at", "endpoint", "available_at"),
+    )
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, UUID, DateTime
+from sqlalchemy.sql import func
+from .base import Base
+
+class TaskReminder(Base):
+    """Last due-date reminder sent per task, so a restarted scheduler does not repeat it.
+
+    A new reminder is due once the task's due_date differs from the one recorded here.
+    """
+    __tablename__ = "task_reminders"
+
+    task_id = Column(UUID, primary_key=True) # No foreign key, as on task_transitions.task_id
+    due_date = Column(DateTime(timezone=True), nullable=False)
+    sent_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, UUID, ForeignKey, Integer, DateTime, Boolean
+from sqlalchemy import Column, String, UUID, ForeignKey, ForeignKeyConstraint, Integer, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from uuid import uuid4
 from .base import Base, TimestampMixin
@@ -11,10 +11,25 @@ class Task(Base, TimestampMixin):
     title = Column(String, nullable=False)
     description = Column(String)
     column_id = Column(UUID, ForeignKey("board_columns.id"))
+    # Denormalized from the column: tasks is hash-partitioned on it, so board queries touch one
+    # partition. Part of the primary key because Postgres requires the partition key in it
+    board_id = Column(UUID, ForeignKey("boards.id"), primary_key=True)
     due_date = Column(DateTime(timezone=True))
     priority = Column(Integer, default=0)
     order_index = Column(Integer, nullable=False)
     is_deleted = Column(Boolean, default=False, nullable=False, index=True)
+    # Optimistic concurrency: every UPDATE is conditional on the version that was read
+    version = Column(Integer, nullable=False, server_default="1")
+    # Subtasks are tasks with a parent and no column; they live on their card's board and
+    # follow it when it moves (ON UPDATE CASCADE). See app/services/subtasks.py
+    parent_id = Column(UUID)
+    # Materialized path: the ids of the task's ancestors, root card first, each followed by
+    # "/" ('' for a card), so a subtree is one prefix scan
+    path = Column(String, nullable=False, server_default="")
+    is_done = Column(Boolean, nullable=False, server_default="false")
+    # Live descendants, and how many of them are done; maintained by every subtask change
+    subtasks_total = Column(Integer, nullable=False, server_default="0")
+    subtasks_done = Column(Integer, nullable=False, server_default="0")
 
     column = relationship("BoardColumn", back_populates="tasks")
     
@@ -22,4 +37,21 @@ class Task(Base, TimestampMixin):
         "User",
         secondary=task_assignees_table,
         back_populates="assigned_tasks"
-    ) 
\ No newline at end of file
+    )
+
+    __table_args__ = (
+        # Live tasks of a column in board order: board loads, order_index shifts, column deletes
+        Index("ix_tasks_column_id_order_index_live", "column_id", "order_index", postgresql_where=text("NOT is_deleted")),
+        # Upcoming due dates for the reminder scheduler (app/services/reminders.py)
+        Index("ix_tasks_due_date_live", "due_date", postgresql_where=text("NOT is_deleted")),
+        ForeignKeyConstraint(["parent_id", "board_id"], ["tasks.id", "tasks.board_id"], onupdate="CASCADE"),
+        # Subtrees by path prefix (and children by exact path); cards are not indexed
+        Index("ix_tasks_path_subtasks", "board_id", "path", postgresql_ops={"path": "text_pattern_ops"},
+              postgresql_where=text("parent_id IS NOT NULL")),
+        # Backs the parent foreign key, whose cascade looks children up when a card changes board
+        Index("ix_tasks_parent_id_board_id", "parent_id", "board_id", postgresql_where=text("parent_id IS NOT NULL")),
+        # Partitions tasks_p00.. are created by migration (app/services/task_partitioning.py)
+        {"postgresql_partition_by": "HASH (board_id)"},
+    )
+
+    __mapper_args__ = {"version_id_col": version} 
\ No newline at end of file
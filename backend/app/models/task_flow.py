@@ -0,0 +1,58 @@
+from sqlalchemy import Column, String, UUID, ForeignKey, Integer, BigInteger, Float, Date, DateTime, Identity, Index
+from sqlalchemy.sql import func
+from .base import Base
+
+class TaskTransition(Base):
+    """Append-only log of tasks entering and leaving columns.
+
+    kind is "created" (to_column_id set), "moved" (both set, different columns)
+    or "deleted" (from_column_id set). Rows are never updated or deleted.
+    """
+    __tablename__ = "task_transitions"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    # No foreign key: tasks is partitioned by board, so its id alone is not a referenceable
+    # key. Tasks are only ever soft-deleted, so the id stays valid
+    task_id = Column(UUID, nullable=False)
+    board_id = Column(UUID, ForeignKey("boards.id"), nullable=False)
+    kind = Column(String, nullable=False)
+    from_column_id = Column(UUID, ForeignKey("board_columns.id"))
+    to_column_id = Column(UUID, ForeignKey("board_columns.id"))
+    occurred_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Finds the previous transition of a task (when it entered its current column)
+        Index("ix_task_transitions_task_id_id", "task_id", "id"),
+    )
+
+class ColumnFlowDaily(Base):
+    """Per column and UTC day: tasks that entered/left it, and time spent by those that left."""
+    __tablename__ = "column_flow_daily"
+
+    board_id = Column(UUID, ForeignKey("boards.id"), primary_key=True)
+    column_id = Column(UUID, ForeignKey("board_columns.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    entered = Column(Integer, nullable=False, default=0)
+    exited = Column(Integer, nullable=False, default=0)
+    dwell_seconds = Column(Float, nullable=False, default=0) # Summed over exits with a known entry time
+    dwell_count = Column(Integer, nullable=False, default=0)
+
+class BoardFlowDaily(Base):
+    """Per board and UTC day: created/moved/deleted tasks, and lead time of the deleted ones."""
+    __tablename__ = "board_flow_daily"
+
+    board_id = Column(UUID, ForeignKey("boards.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    created = Column(Integer, nullable=False, default=0)
+    moved = Column(Integer, nullable=False, default=0)
+    deleted = Column(Integer, nullable=False, default=0)
+    lead_seconds = Column(Float, nullable=False, default=0) # Creation to deletion, summed over deletions
+
+class RollupWatermark(Base):
+    """How far each rollup has consumed an append-only log."""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    last_event_id = Column(BigInteger, nullable=False, default=0)
+    last_event_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
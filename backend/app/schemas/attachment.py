@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+
+class Attachment(BaseModel):
+    id: UUID
+    task_id: UUID
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    uploaded_by: UUID
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
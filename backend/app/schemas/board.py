@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from uuid import UUID
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Any, Dict, Optional, List, Literal
 from .task import Task as TaskSchema # Assuming Task schema is needed for response
 
 class BoardColumnBase(BaseModel):
@@ -14,6 +14,7 @@ class BoardColumnCreate(BoardColumnBase):
 class BoardColumn(BoardColumnBase):
     id: UUID
     board_id: UUID
+    version: int # Row version; send back as If-Match for conditional updates
     created_at: datetime
     updated_at: Optional[datetime] = None
     tasks: List[TaskSchema] = [] # Include tasks in the response
@@ -35,6 +36,7 @@ class Board(BoardBase):
     created_by: UUID
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int
     columns: List[BoardColumn] = [] # Use the detailed BoardColumn schema
 
     class Config:
@@ -50,4 +52,90 @@ class RenameColumnRequest(BaseModel):
 
 # New schema for moving a column
 class ColumnMoveRequest(BaseModel):
-    new_order_index: int = Field(ge=0) # Ensure index is not negative 
\ No newline at end of file
+    new_order_index: int = Field(ge=0) # Ensure index is not negative 
+
+# Schema for cloning a board (or instantiating a template) server-side
+class BoardCloneRequest(BaseModel):
+    name: Optional[str] = Field(None, min_length=1)
+    description: Optional[str] = None
+    mode: Literal["columns", "tasks", "tasks_with_assignees"] = "tasks"
+
+# Schema for saving an existing board as a template
+class BoardTemplateCreate(BaseModel):
+    name: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    mode: Literal["columns", "tasks", "tasks_with_assignees"] = "columns"
+
+# Template summary; templates are listed without their columns and tasks
+class BoardTemplate(BoardBase):
+    id: UUID
+    created_by: UUID
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Board statistics, served from incrementally maintained counters
+class ColumnCount(BaseModel):
+    column_id: UUID
+    name: str
+    count: int
+
+class AssigneeCount(BaseModel):
+    user_id: UUID
+    count: int
+
+class BoardStats(BaseModel):
+    board_id: UUID
+    total: int
+    columns: List[ColumnCount] = []
+    priorities: Dict[int, int] = {} # priority -> number of tasks
+    overdue: int # Due before today (UTC)
+    due_today: int
+    assignees: List[AssigneeCount] = []
+
+# Cumulative flow and cycle/lead time, served from the daily flow rollups
+class BoardFlowDay(BaseModel):
+    day: date
+    created: int
+    moved: int
+    deleted: int
+    avg_lead_hours: Optional[float] = None # Creation to deletion, for tasks deleted that day
+
+class ColumnFlowPoint(BaseModel):
+    day: date
+    entered: int
+    exited: int
+    wip: int # Tasks in the column at the end of the day
+    avg_dwell_hours: Optional[float] = None # Time spent in the column by tasks that left it that day
+
+class ColumnFlow(BaseModel):
+    column_id: UUID
+    name: str
+    points: List[ColumnFlowPoint] = []
+
+class BoardFlow(BaseModel):
+    board_id: UUID
+    start: date
+    end: date
+    as_of: Optional[datetime] = None # Transitions up to this time are included
+    days: List[BoardFlowDay] = []
+    columns: List[ColumnFlow] = []
+
+# Board activity feed entry and keyset-paginated page
+class ActivityEntry(BaseModel):
+    id: UUID
+    board_id: UUID
+    actor_id: Optional[UUID] = None
+    action: str
+    entity_id: Optional[UUID] = None
+    details: Optional[Dict[str, Any]] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ActivityPage(BaseModel):
+    items: List[ActivityEntry] = []
+    next_cursor: Optional[str] = None # None on the last page
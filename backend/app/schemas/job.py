@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+class Job(BaseModel):
+    id: UUID
+    kind: str
+    status: str # queued, running, succeeded or failed
+    board_id: Optional[UUID] = None
+    progress: int
+    total: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
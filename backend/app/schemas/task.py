@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
 from typing import Optional, List
@@ -30,6 +30,38 @@ class Task(TaskBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     is_deleted: bool # Add the is_deleted field
+    version: int # Row version; send back as If-Match for conditional updates
+    subtasks_total: int = 0 # Progress of the card's checklist: subtasks_done of subtasks_total
+    subtasks_done: int = 0
+
+    class Config:
+        from_attributes = True
+
+# Subtasks: checklist items nested under a card, up to subtasks.MAX_DEPTH levels
+class SubtaskCreate(BaseModel):
+    title: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    parent_id: Optional[UUID] = None # Another subtask of the same card; defaults to the card
+
+class SubtaskUpdate(BaseModel):
+    # Only the fields sent are changed
+    title: Optional[str] = Field(None, min_length=1)
+    description: Optional[str] = None
+    is_done: Optional[bool] = None
+
+class Subtask(BaseModel):
+    id: UUID
+    parent_id: UUID
+    title: str
+    description: Optional[str] = None
+    is_done: bool
+    order_index: int
+    subtasks_total: int
+    subtasks_done: int
+    version: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    subtasks: List["Subtask"] = [] # Filled in by GET /tasks/{id}/subtasks only
 
     class Config:
         from_attributes = True
@@ -37,4 +69,9 @@ class Task(TaskBase):
 # Schema for moving a task
 class TaskMove(BaseModel):
     column_id: UUID # Destination column ID
-    order_index: int # New index within the destination column 
\ No newline at end of file
+    order_index: int # New index within the destination column 
+# Schema for editing many tasks at once (runs as a background job)
+class TaskBulkUpdate(BaseModel):
+    task_ids: List[UUID] = Field(..., min_length=1, max_length=100000)
+    priority: Optional[int] = None
+    due_date: Optional[datetime] = None # Set due_date to None explicitly to clear it
@@ -0,0 +1,174 @@
+"""Board activity feed on a monthly range-partitioned table.
+
+``record_activity`` appends in the caller's transaction. Partitions are named
+``board_activity_pYYYYMM``; rows outside every monthly partition land in
+``board_activity_default`` and are moved into their month by
+``ensure_partitions``, so inserts never fail for lack of a partition.
+Retention detaches and drops whole months (``drop_partitions_before``).
+
+Maintenance: ``python -m app.services.activity --months-ahead 3 --retention-months 12``
+"""
+import argparse
+import base64
+import re
+from datetime import date, datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from ..models.activity import BoardActivity
+
+TABLE = BoardActivity.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def record_activity(db: Session, board_id, actor_id, action: str, entity_id=None, **details):
+    """Append one activity entry; ``details`` is stored as JSON (UUIDs/datetimes as strings)."""
+    record_activities(db, [(board_id, actor_id, action, entity_id, details)])
+
+
+def record_activities(db: Session, entries: Iterable[Tuple]):
+    """Append (board_id, actor_id, action, entity_id, details) entries in one statement, in order."""
+    rows = [
+        {
+            "board_id": board_id,
+            "actor_id": actor_id,
+            "action": action,
+            "entity_id": entity_id,
+            "details": {key: _jsonable(value) for key, value in details.items()} or None,
+        }
+        for board_id, actor_id, action, entity_id, details in entries
+    ]
+    if rows:
+        db.execute(insert(BoardActivity.__table__), rows)
+
+
+def _jsonable(value):
+    if isinstance(value, (UUID, datetime, date)):
+        return str(value)
+    return value
+
+
+# --- Keyset pagination ---
+
+def encode_cursor(created_at: datetime, entry_id: UUID) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{entry_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Raises ValueError for a cursor this module did not produce."""
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(entry_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid cursor: {e}")
+
+
+def board_activity_page(db: Session, board_id, limit: int, cursor: Optional[str] = None):
+    """Newest-first page of a board's feed and the cursor for the next page (or None).
+
+    Row comparisons do not drive partition pruning, so the cursor is also applied
+    as a plain bound on created_at: deep pages skip every newer month and cost
+    the same as the first one.
+    """
+    query = select(BoardActivity).where(BoardActivity.board_id == board_id)
+    if cursor:
+        created_at, entry_id = decode_cursor(cursor)
+        query = query.where(
+            BoardActivity.created_at <= created_at,
+            tuple_(BoardActivity.created_at, BoardActivity.id) < (created_at, entry_id),
+        )
+    rows = db.execute(
+        query.order_by(BoardActivity.created_at.desc(), BoardActivity.id.desc()).limit(limit + 1)
+    ).scalars().all()
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+# --- Partition maintenance ---
+
+def _month_start(year: int, month: int) -> date:
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return date(year, month, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+def list_partitions(db: Session) -> List[str]:
+    return db.execute(text("""
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table ORDER BY child.relname
+    """), {"table": TABLE}).scalars().all()
+
+
+def ensure_partitions(db: Session, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    """Create monthly partitions from this month to ``months_ahead`` months out. Does not commit.
+
+    Rows already sitting in the default partition for a new month are moved into
+    it before it is attached, otherwise ATTACH would fail.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    existing = set(list_partitions(db))
+    created = []
+    for offset in range(months_ahead + 1):
+        start = _month_start(today.year, today.month + offset)
+        end = _month_start(start.year, start.month + 1)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        bounds = {"start": start, "end": end}
+        db.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        db.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), bounds)
+        db.execute(text(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+        created.append(name)
+    return created
+
+
+def drop_partitions_before(db: Session, cutoff: date) -> List[str]:
+    """Drop monthly partitions that end on or before ``cutoff``. Does not commit."""
+    dropped = []
+    for name in list_partitions(db):
+        match = _PARTITION_NAME.match(name)
+        if not match:
+            continue
+        if _month_start(int(match.group(1)), int(match.group(2)) + 1) <= cutoff:
+            db.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    # Stragglers in the default partition are few; delete them row-wise
+    db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff"), {"cutoff": cutoff})
+    return dropped
+
+
+if __name__ == "__main__":
+    from ..db.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Create upcoming and drop expired board_activity partitions.")
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--retention-months", type=int, default=12, help="Keep this many whole months (0 = keep all)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print("Created:", ensure_partitions(db, args.months_ahead) or "none")
+        if args.retention_months:
+            today = datetime.now(timezone.utc).date()
+            cutoff = _month_start(today.year, today.month - args.retention_months)
+            print(f"Dropped (before {cutoff}):", drop_partitions_before(db, cutoff) or "none")
+        db.commit()
+    finally:
+        db.close()
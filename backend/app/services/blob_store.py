@@ -0,0 +1,101 @@
+"""Blob storage for task attachments, keyed by attachment id.
+
+Backends (``ATTACHMENT_STORE``):
+
+``local`` (default)
+    Files under ``ATTACHMENT_DIR``, fanned out into two levels of directories
+    by key. An upload is written to a temporary file on the same filesystem
+    and renamed into place once complete and synced, so readers never see a
+    partial blob.
+
+A backend provides ``write(key, chunks, max_bytes)``, which consumes an async
+iterator of byte chunks as they arrive and returns the size and SHA-256 of
+what it stored; ``open(key)``, a binary file object to read the blob from; and
+``delete(key)``. Memory use is bounded by the write buffer, not the blob size.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import AsyncIterator, BinaryIO, Tuple
+
+from ..core.config import SettingsBound, get_settings
+
+WRITE_BUFFER = 1024 * 1024 # Chunks are gathered up to this much per write, so big uploads are not a thread hop per chunk
+
+
+class BlobTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Blob exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class LocalBlobStore:
+    backend = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._tmp_dir = os.path.join(self.root, "tmp")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    async def write(self, key: str, chunks: AsyncIterator[bytes], max_bytes: int) -> Tuple[int, str]:
+        """Store the chunks under ``key``; raises BlobTooLarge (storing nothing) past ``max_bytes``."""
+        await asyncio.to_thread(os.makedirs, self._tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise BlobTooLarge(max_bytes)
+                    digest.update(chunk)
+                    buffer += chunk
+                    if len(buffer) >= WRITE_BUFFER:
+                        await asyncio.to_thread(f.write, buffer)
+                        buffer.clear()
+                await asyncio.to_thread(self._finish, f, buffer)
+            await asyncio.to_thread(self._publish, tmp_path, key)
+        except BaseException: # Including a client that disconnected mid-upload
+            _unlink(tmp_path)
+            raise
+        return size, digest.hexdigest()
+
+    @staticmethod
+    def _finish(f: BinaryIO, buffer: bytearray):
+        f.write(buffer)
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _publish(self, tmp_path: str, key: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+
+    def open(self, key: str) -> BinaryIO:
+        """Raises FileNotFoundError if there is no such blob."""
+        return open(self._path(key), "rb")
+
+    def delete(self, key: str):
+        _unlink(self._path(key))
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def create_blob_store():
+    settings = get_settings()
+    if settings.attachment_store == "local":
+        return LocalBlobStore(settings.attachment_dir)
+    raise ValueError(f"Unknown ATTACHMENT_STORE '{settings.attachment_store}'")
+
+
+blob_store = SettingsBound(create_blob_store)
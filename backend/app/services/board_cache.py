@@ -0,0 +1,225 @@
+"""Cache of serialized board responses keyed by (board_id, version, representation).
+
+Every board mutation bumps ``boards.version`` in its own transaction
+(``bump_board_versions``), so a cached entry can never be served for a newer
+board: readers look up the version first and old entries just stop being
+asked for. Invalidation therefore needs no coordination between workers.
+
+Backends (``BOARD_CACHE_BACKEND``):
+
+``memory`` (default)
+    Per-process LRU bounded by ``BOARD_CACHE_MAX_BYTES`` of payload.
+``redis``
+    Any Redis-compatible server at ``BOARD_CACHE_REDIS_URL`` (needs the
+    ``redis`` package), shared by all workers. Size is bounded by the server's
+    ``maxmemory`` policy; entries also expire after ``BOARD_CACHE_TTL`` seconds.
+    ``bench/resp_cache_server.py`` is a local stand-in for testing.
+``none``
+    Disabled.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ..core.config import SettingsBound, get_settings
+from ..models.board import Board
+from .board_engine import BoardResident, request_release
+
+FULL = "full"
+
+
+def cache_key(board_id, version: int, representation: str = FULL) -> str:
+    return f"board:{board_id}:{version}:{representation}"
+
+
+def bump_board_versions(db: Session, *board_ids):
+    """Mark boards as changed. Call last before commit: the row lock is held until then.
+
+    Raises BoardResident (a write conflict) for a board held by the board engine of
+    any process, which is asked to release it: only the engine writes such a board.
+    """
+    for board_id in sorted({str(board_id) for board_id in board_ids}):
+        owner = db.execute(
+            update(Board).where(Board.id == board_id).values(version=Board.version + 1).returning(Board.engine_owner)
+        ).scalar()
+        if owner is not None:
+            request_release(board_id)
+            raise BoardResident(board_id, owner)
+
+
+class _Stats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "sets": self.sets,
+            "evictions": self.evictions,
+        }
+
+
+class MemoryBoardCache:
+    """Thread-safe LRU holding at most ``max_bytes`` of serialized payload."""
+
+    backend = "memory"
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        # Newest cached key per (board, representation), so a newer version replaces the
+        # older entry right away instead of waiting for it to fall off the LRU
+        self._latest: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        board, version, representation = self._split(key)
+        with self._lock:
+            previous = self._latest.get(board + representation)
+            if previous is not None and previous != key:
+                if int(self._split(previous)[1]) > int(version):
+                    return # A slower reader rendered an older version; keep the newer entry
+                self._drop(previous)
+            self._drop(key)
+            self._entries[key] = value
+            self._latest[board + representation] = key
+            self.bytes += len(value)
+            self._stats.sets += 1
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._stats.evictions += 1
+
+    def _drop(self, key: str):
+        value = self._entries.pop(key, None)
+        if value is not None:
+            self.bytes -= len(value)
+            board, _, representation = self._split(key)
+            if self._latest.get(board + representation) == key:
+                del self._latest[board + representation]
+
+    @staticmethod
+    def _split(key: str):
+        board, version, representation = key.rsplit(":", 2)
+        return board, version, representation
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                **self._stats.as_dict(),
+            }
+
+
+class RedisBoardCache:
+    """Shared cache on a Redis-compatible server. Errors degrade to cache misses."""
+
+    backend = "redis"
+
+    def __init__(self, client, ttl: int = 3600):
+        self.client = client
+        self.ttl = ttl
+        self.bytes_written = 0
+        self.errors = 0
+        self._stats = _Stats()
+
+    @classmethod
+    def from_url(cls, url: str, ttl: int = 3600) -> "RedisBoardCache":
+        import redis # Optional dependency, only needed for this backend
+        return cls(redis.Redis.from_url(url, socket_timeout=0.5), ttl)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self.client.get(key)
+        except Exception:
+            self.errors += 1
+            value = None
+        if value is None:
+            self._stats.misses += 1
+        else:
+            self._stats.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        try:
+            self.client.set(key, value, ex=self.ttl)
+        except Exception:
+            self.errors += 1
+            return
+        self.bytes_written += len(value)
+        self._stats.sets += 1
+
+    def clear(self):
+        self.client.flushdb()
+
+    def stats(self) -> dict:
+        stats = {"backend": self.backend, "bytes_written": self.bytes_written, "errors": self.errors, **self._stats.as_dict()}
+        try:
+            stats["server_used_memory"] = self.client.info("memory").get("used_memory")
+        except Exception:
+            pass
+        return stats
+
+
+class NullBoardCache:
+    backend = "none"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.backend}
+
+
+def create_board_cache():
+    settings = get_settings()
+    backend = settings.board_cache_backend
+    if backend == "memory":
+        return MemoryBoardCache(settings.board_cache_max_bytes)
+    if backend == "redis":
+        return RedisBoardCache.from_url(settings.board_cache_redis_url, settings.board_cache_ttl)
+    if backend == "none":
+        return NullBoardCache()
+    raise ValueError(f"Unknown BOARD_CACHE_BACKEND '{backend}'")
+
+
+board_cache = SettingsBound(create_board_cache)
+
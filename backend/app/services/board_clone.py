@@ -0,0 +1,110 @@
+"""Server-side board cloning with ``INSERT ... SELECT``.
+
+New ids are derived inside Postgres as ``md5(salt || old_id)::uuid`` with a
+fresh random salt per clone, so child rows can be remapped to their cloned
+parents in the same set-based statement without a lookup table. A clone is
+at most four statements regardless of board size.
+"""
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import String, cast, false, func, insert, literal, select
+from sqlalchemy.orm import Session
+from sqlalchemy.types import Uuid
+
+from ..models.association_tables import task_assignees_table
+from ..models.board import Board, BoardColumn
+from ..models.task import Task
+
+CLONE_MODES = ("columns", "tasks", "tasks_with_assignees")
+
+
+def _remap(salt: str, column):
+    return cast(func.md5(literal(salt) + cast(column, String)), Uuid)
+
+
+def clone_board(
+    db: Session,
+    source: Board,
+    *,
+    owner_id: UUID,
+    name: str,
+    description: Optional[str] = None,
+    mode: str = "tasks",
+    is_template: bool = False,
+) -> UUID:
+    """Copy ``source`` into a new board and return its id. Does not commit.
+
+    Only non-deleted columns and tasks are copied. ``mode`` selects how much:
+    ``columns`` (structure only), ``tasks`` or ``tasks_with_assignees``.
+    """
+    if mode not in CLONE_MODES:
+        raise ValueError(f"Unknown clone mode '{mode}'")
+
+    salt = uuid4().hex
+    new_board_id = uuid4()
+    db.add(Board(
+        id=new_board_id,
+        name=name,
+        description=source.description if description is None else description,
+        created_by=owner_id,
+        is_template=is_template,
+    ))
+    db.flush()
+
+    db.execute(
+        insert(BoardColumn.__table__).from_select(
+            ["id", "name", "order_index", "board_id", "is_deleted"],
+            select(
+                _remap(salt, BoardColumn.id),
+                BoardColumn.name,
+                BoardColumn.order_index,
+                literal(new_board_id, Uuid),
+                false(),
+            ).where(BoardColumn.board_id == source.id, BoardColumn.is_deleted == False),
+        )
+    )
+    if mode == "columns":
+        return new_board_id
+
+    source_tasks = (
+        select(Task.id)
+        .join(BoardColumn, Task.column_id == BoardColumn.id)
+        .where(
+            Task.board_id == source.id,
+            BoardColumn.board_id == source.id,
+            BoardColumn.is_deleted == False,
+            Task.is_deleted == False,
+        )
+    )
+    db.execute(
+        insert(Task.__table__).from_select(
+            ["id", "title", "description", "column_id", "board_id", "due_date", "priority", "order_index", "is_deleted"],
+            select(
+                _remap(salt, Task.id),
+                Task.title,
+                Task.description,
+                _remap(salt, Task.column_id),
+                literal(new_board_id, Uuid),
+                Task.due_date,
+                Task.priority,
+                Task.order_index,
+                false(),
+            ).where(Task.board_id == source.id, Task.id.in_(source_tasks)),
+        )
+    )
+    if mode == "tasks_with_assignees":
+        db.execute(
+            insert(task_assignees_table).from_select(
+                ["task_id", "board_id", "user_id"],
+                select(
+                    _remap(salt, task_assignees_table.c.task_id),
+                    literal(new_board_id, Uuid),
+                    task_assignees_table.c.user_id,
+                ).where(
+                    task_assignees_table.c.board_id == source.id,
+                    task_assignees_table.c.task_id.in_(source_tasks),
+                ),
+            )
+        )
+    return new_board_id
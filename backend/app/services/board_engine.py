@@ -0,0 +1,1154 @@
+"""In-memory engine for hot boards, persisted to Postgres behind a write-ahead log.
+
+With ``BOARD_ENGINE_ENABLED``, a board that gets ``BOARD_ENGINE_PROMOTE_AFTER``
+requests within a minute is loaded into this process, which then owns it:
+task moves within the board and task edits (without assignees) are applied in
+memory, and ``GET /boards/{id}`` is served from memory. Each change is
+appended to this process's write-ahead log (app/services/board_wal.py) and
+acknowledged once the log is fsynced, so no acknowledged change is lost in a
+crash. The flusher writes the changes to Postgres in the background, every
+``BOARD_ENGINE_FLUSH_INTERVAL`` seconds, as one transaction per board: the
+rows that changed, then what the SQL paths write with them (transitions,
+activity, webhook events, due-date hints, stats counters) in log order, then
+the board's version and the LSN applied.
+
+Each column's tasks are an implicit treap: moving a task is O(log n), and so is
+shifting its neighbours, because the version bump and ``updated_at`` every
+shifted task gets (as in the SQL path) are applied to whole subtrees lazily.
+
+Ownership is ``boards.engine_owner``. While it is set, ``bump_board_versions``
+refuses every other writer with a 409 (``BoardResident``) and asks the owner,
+through ``NOTIFY board_engine``, to let the board go. Writes the engine does
+not apply (creating or deleting tasks, assignees, subtasks, columns, moves to
+another board) release the board in the owning process first: its changes are
+flushed and it is dropped from memory. Boards idle for
+``BOARD_ENGINE_IDLE_SECONDS``, or the least recently used ones past
+``BOARD_ENGINE_MAX_BYTES``, are released the same way.
+
+An owner's boards are always written by that one process, so the engine pays
+off when requests for a board land on the same process: one worker, or a
+proxy that routes by board. Postgres (stats, flow, activity, and other
+processes' board reads) runs up to one flush interval behind the owner.
+
+On start, the engine recovers the logs of dead owners in its log directory:
+for every board such an owner still holds, the records Postgres has not
+applied are replayed onto the board as stored and flushed, and the board is
+released. ``python -m app.services.board_engine`` lists held boards, recovers
+logs, and force-releases a board whose log is lost.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import select as select_module
+import socket
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session, selectinload, with_loader_criteria
+from sqlalchemy.orm.exc import StaleDataError
+
+from ..core.config import SettingsBound, get_settings
+from ..db.database import SessionLocal, get_engine
+from ..models.board import Board, BoardColumn
+from ..models.task import Task
+from ..schemas.board import Board as BoardSchema
+from . import board_wal, outbox, task_flow
+from .activity import record_activities
+from .board_stats import StatsDelta, board_task_counts
+from .reminders import notify_tasks_changed
+
+logger = logging.getLogger("board_engine")
+
+CHANNEL = "board_engine" # NOTIFY payload: a board id whose owner should release it
+PROMOTE_WINDOW = 60.0 # Seconds over which requests to a board are counted for promotion
+RECOVER_INTERVAL = 10.0 # Seconds between looks for logs of dead engines
+RELEASE_COOLDOWN = 30.0 # Seconds a released board is not promoted again
+TASK_BYTES = 400 # Rough memory per resident task, on top of its text
+
+
+class BoardResident(StaleDataError):
+    """A write reached a board that another process's board engine holds. Retryable."""
+
+    def __init__(self, board_id, owner: str):
+        super().__init__(f"Board {board_id} is held by the board engine of {owner}")
+        self.board_id = board_id
+        self.owner = owner
+
+
+class TaskVersionConflict(Exception):
+    """If-Match did not match; ``current`` is the task as the engine holds it."""
+
+    def __init__(self, current: dict):
+        super().__init__("Task was modified by another request")
+        self.current = current
+
+
+class OwnershipLost(Exception):
+    pass
+
+
+def request_release(board_id):
+    """Ask the owner of ``board_id`` to release it. Runs outside the caller's transaction,
+    which is about to be rolled back (and with it any NOTIFY sent inside it)."""
+    try:
+        with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(select(func.pg_notify(CHANNEL, str(board_id))))
+    except Exception:
+        logger.exception(f"Could not ask for board {board_id} to be released")
+
+
+# --- Column order: an implicit treap per column ---
+# A task's position is the number of tasks before it in its column's in-order
+# walk, so positions are never stored and inserting or removing shifts all the
+# later ones for free. A lazy tag on a node (tag_version, tag_time) is still
+# owed to its children: both subtrees get version += tag_version and
+# updated_at = tag_time when the node is pushed (on any walk through it).
+
+class _Task:
+    __slots__ = ("id", "title", "description", "due_date", "priority", "version", "created_at", "updated_at",
+                 "assignees", "subtasks_total", "subtasks_done", "column",
+                 "left", "right", "parent", "priority_key", "size", "tag_version", "tag_time")
+
+    def __init__(self, task: Task, column: "_Column", assignees: List[dict]):
+        self.id = task.id
+        self.title = task.title
+        self.description = task.description
+        self.due_date = task.due_date
+        self.priority = task.priority
+        self.version = task.version
+        self.created_at = task.created_at
+        self.updated_at = task.updated_at
+        self.assignees = assignees
+        self.subtasks_total = task.subtasks_total
+        self.subtasks_done = task.subtasks_done
+        self.column = column
+        self.left = self.right = self.parent = None
+        self.priority_key = random.random()
+        self.size = 1
+        self.tag_version = 0
+        self.tag_time = None
+
+    def nbytes(self) -> int:
+        return TASK_BYTES + len(self.title) + len(self.description or "")
+
+
+def _size(node: Optional[_Task]) -> int:
+    return node.size if node is not None else 0
+
+
+def _tag(node: _Task, versions: int, at: datetime):
+    node.version += versions
+    node.updated_at = at
+    node.tag_version += versions
+    node.tag_time = at
+
+
+def _push(node: _Task):
+    if node.tag_time is not None:
+        for child in (node.left, node.right):
+            if child is not None:
+                _tag(child, node.tag_version, node.tag_time)
+        node.tag_version = 0
+        node.tag_time = None
+
+
+def _resize(node: _Task):
+    node.size = 1 + _size(node.left) + _size(node.right)
+
+
+def _split(node: Optional[_Task], k: int) -> Tuple[Optional[_Task], Optional[_Task]]:
+    """The first ``k`` tasks of the subtree, and the rest, as two detached treaps."""
+    if node is None:
+        return None, None
+    _push(node)
+    if _size(node.left) >= k:
+        left, rest = _split(node.left, k)
+        node.left = rest
+        if rest is not None:
+            rest.parent = node
+        _resize(node)
+        if left is not None:
+            left.parent = None
+        node.parent = None
+        return left, node
+    rest, right = _split(node.right, k - _size(node.left) - 1)
+    node.right = rest
+    if rest is not None:
+        rest.parent = node
+    _resize(node)
+    if right is not None:
+        right.parent = None
+    node.parent = None
+    return node, right
+
+
+def _merge(left: Optional[_Task], right: Optional[_Task]) -> Optional[_Task]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority_key > right.priority_key:
+        _push(left)
+        left.right = _merge(left.right, right)
+        left.right.parent = left
+        _resize(left)
+        return left
+    _push(right)
+    right.left = _merge(left, right.left)
+    right.left.parent = right
+    _resize(right)
+    return right
+
+
+def _collect(node: Optional[_Task], lo: int, hi: int, out: List[_Task]):
+    # Tasks at positions [lo, hi) of the subtree, in order, with their tags pushed
+    if node is None or hi <= 0 or lo >= node.size:
+        return
+    _push(node)
+    left = _size(node.left)
+    _collect(node.left, lo, hi, out)
+    if lo <= left < hi:
+        out.append(node)
+    _collect(node.right, lo - left - 1, hi - left - 1, out)
+
+
+class _TaskOrder:
+    """A column's live tasks in order."""
+
+    __slots__ = ("root",)
+
+    def __init__(self):
+        self.root: Optional[_Task] = None
+
+    def __len__(self) -> int:
+        return _size(self.root)
+
+    def append(self, task: _Task):
+        self.root = _merge(self.root, task)
+
+    def insert(self, index: int, task: _Task):
+        left, right = _split(self.root, index)
+        self.root = _merge(_merge(left, task), right)
+        self.root.parent = None
+
+    def remove(self, task: _Task) -> int:
+        """Take the task out; returns the position it had."""
+        index = self.index(task)
+        left, rest = _split(self.root, index)
+        _, right = _split(rest, 1)
+        self.root = _merge(left, right)
+        if self.root is not None:
+            self.root.parent = None
+        return index
+
+    def index(self, task: _Task) -> int:
+        index = _size(task.left)
+        node = task
+        while node.parent is not None:
+            if node is node.parent.right:
+                index += _size(node.parent.left) + 1
+            node = node.parent
+        return index
+
+    def settle(self, task: _Task):
+        """Push every pending tag down to ``task``, so its version and updated_at are current."""
+        path = []
+        node = task.parent
+        while node is not None:
+            path.append(node)
+            node = node.parent
+        for node in reversed(path):
+            _push(node)
+
+    def touch(self, lo: int, hi: int, at: datetime):
+        """Bump the version of the tasks at positions [lo, hi) and set their updated_at."""
+        if lo >= hi:
+            return
+        left, rest = _split(self.root, lo)
+        middle, right = _split(rest, hi - lo)
+        _tag(middle, 1, at)
+        self.root = _merge(_merge(left, middle), right)
+        self.root.parent = None
+
+    def slice(self, lo: int = 0, hi: Optional[int] = None) -> List[_Task]:
+        out = []
+        _collect(self.root, lo, len(self) if hi is None else hi, out)
+        return out
+
+
+# --- A resident board ---
+
+class _Column:
+    __slots__ = ("id", "name", "order_index", "version", "created_at", "updated_at", "tasks", "dirty_lo", "dirty_hi",
+                 "changed")
+
+    def __init__(self, column: BoardColumn):
+        self.id = column.id
+        self.name = column.name
+        self.order_index = column.order_index
+        self.version = column.version
+        self.created_at = column.created_at
+        self.updated_at = column.updated_at
+        self.tasks = _TaskOrder()
+        self.dirty_lo = self.dirty_hi = 0 # Positions whose rows changed since the last flush
+        self.changed = False # Version/updated_at changed since the last flush
+
+    def mark(self, lo: int, hi: int):
+        if self.dirty_lo == self.dirty_hi:
+            self.dirty_lo, self.dirty_hi = lo, hi
+        else:
+            self.dirty_lo, self.dirty_hi = min(self.dirty_lo, lo), max(self.dirty_hi, hi)
+
+
+class _Batch:
+    """What one flush writes: rows as of ``lsn``, and the side effects of the changes up to it."""
+
+    def __init__(self, board: "_ResidentBoard"):
+        self.board_id = board.id
+        self.lsn = board.last_lsn
+        self.first_lsn = board.first_lsn
+        self.version = board.version
+        self.updated_at = board.updated_at
+        self.columns = [(column.id, column.version, column.updated_at) for column in board.columns if column.changed]
+        self.tasks = []
+        self.effects = board.effects
+        self.dirty = [(column, column.dirty_lo, column.dirty_hi) for column in board.columns
+                      if column.dirty_lo != column.dirty_hi]
+        self.edited = board.edited
+        seen = set()
+        for column, lo, hi in self.dirty:
+            for index, task in enumerate(column.tasks.slice(lo, min(hi, len(column.tasks))), lo):
+                seen.add(task.id)
+                self.tasks.append(_row(task, index))
+        for task in board.edited.values():
+            if task.id not in seen and task.column is not None:
+                task.column.tasks.settle(task)
+                self.tasks.append(_row(task, task.column.tasks.index(task)))
+
+
+def _row(task: _Task, index: int) -> tuple:
+    return (task.id, task.column.id, index, task.version, task.updated_at,
+            task.title, task.description, task.priority, task.due_date)
+
+
+class _ResidentBoard:
+    def __init__(self, board: Board, assignees: Dict[UUID, dict]):
+        self.id = board.id
+        self.name = board.name
+        self.description = board.description
+        self.created_by = board.created_by
+        self.created_at = board.created_at
+        self.updated_at = board.updated_at
+        self.version = board.version
+        self.columns: List[_Column] = []
+        self.tasks: Dict[UUID, _Task] = {}
+        for db_column in board.columns:
+            column = _Column(db_column)
+            for db_task in db_column.tasks:
+                task = _Task(db_task, column, [assignees[assignee.id] for assignee in db_task.assignees])
+                column.tasks.append(task)
+                self.tasks[task.id] = task
+            self.columns.append(column)
+        self.columns_by_id = {column.id: column for column in self.columns}
+        self.last_lsn = 0 # Last change applied in memory
+        self.first_lsn = 0 # First change not yet flushed, if any
+        self.writing: Optional[_Batch] = None # Batch being flushed
+        self.effects: List[tuple] = [] # Side effects since the last flush, in order
+        self.edited: Dict[UUID, _Task] = {} # Tasks edited in place since the last flush
+        self.body: Optional[bytes] = None # Rendered board, until the next change
+        self.nbytes = sum(task.nbytes() for task in self.tasks.values())
+        self.last_used = time.monotonic()
+        self.releasing = False
+        self.released = asyncio.Event()
+        self.unlogged = False # Changed in memory by a change the log failed to take: never flushed from memory
+        self.flush_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.effects)
+
+    def _changed(self, at: datetime):
+        self.version += 1
+        self.updated_at = at
+        self.body = None
+
+    def move(self, task: _Task, column: _Column, index: int, at: datetime, actor_id) -> dict:
+        """Move like PUT /tasks/{id}/move; ``index`` is clamped into the column. Returns the task."""
+        source = task.column
+        old_index = source.tasks.remove(task)
+        index = max(0, min(index, len(column.tasks)))
+        column.tasks.insert(index, task)
+        task.column = column
+        # The moved task and every task it shifted get a new version, as rows do in SQL
+        if column is source:
+            lo, hi = min(old_index, index), max(old_index, index) + 1
+            source.tasks.touch(lo, hi, at)
+            source.mark(lo, hi)
+        else:
+            source.tasks.touch(old_index, len(source.tasks), at)
+            source.mark(old_index, len(source.tasks) + 1)
+            column.tasks.touch(index, len(column.tasks), at)
+            column.mark(index, len(column.tasks))
+        for claimed in {source, column}:
+            claimed.version += 1
+            claimed.updated_at = at
+            claimed.changed = True
+        self._changed(at)
+        self.effects.append(("move", actor_id, task.id, task.title, task.priority, task.due_date,
+                             source.id, column.id, index, at))
+        return self.task_dict(task)
+
+    def edit(self, task: _Task, changes: dict, fields: List[str], at: datetime, actor_id) -> dict:
+        """Edit like PUT /tasks/{id} without assignee_ids. Returns the task."""
+        task.column.tasks.settle(task)
+        old = (task.priority, task.due_date)
+        nbytes = task.nbytes()
+        for key, value in changes.items():
+            setattr(task, key, value)
+        task.version += 1
+        task.updated_at = at
+        self.edited[task.id] = task
+        self.nbytes += task.nbytes() - nbytes
+        self._changed(at)
+        self.effects.append(("edit", actor_id, task.id, task.title, task.column.id, old,
+                             (task.priority, task.due_date), fields, at))
+        return self.task_dict(task)
+
+    def task_dict(self, task: _Task) -> dict:
+        task.column.tasks.settle(task)
+        return self._task_dict(task, task.column.tasks.index(task))
+
+    def _task_dict(self, task: _Task, index: int) -> dict:
+        return {
+            "title": task.title,
+            "description": task.description,
+            "due_date": task.due_date,
+            "priority": task.priority,
+            "order_index": index,
+            "id": task.id,
+            "column_id": task.column.id,
+            "assignees": task.assignees,
+            "created_at": task.created_at,
+            "updated_at": task.updated_at,
+            "is_deleted": False,
+            "version": task.version,
+            "subtasks_total": task.subtasks_total,
+            "subtasks_done": task.subtasks_done,
+        }
+
+    def render(self) -> bytes:
+        if self.body is None:
+            self.body = BoardSchema.model_validate({
+                "id": self.id,
+                "name": self.name,
+                "description": self.description,
+                "created_by": self.created_by,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+                "version": self.version,
+                "columns": [
+                    {
+                        "id": column.id,
+                        "name": column.name,
+                        "order_index": column.order_index,
+                        "board_id": self.id,
+                        "version": column.version,
+                        "created_at": column.created_at,
+                        "updated_at": column.updated_at,
+                        "tasks": [self._task_dict(task, index) for index, task in enumerate(column.tasks.slice())],
+                    }
+                    for column in self.columns
+                ],
+            }).model_dump_json().encode()
+        return self.body
+
+    def take_batch(self) -> Optional[_Batch]:
+        """Snapshot what the next flush writes and start collecting anew; None if nothing changed."""
+        if not self.effects:
+            return None
+        batch = _Batch(self)
+        self.effects = []
+        self.edited = {}
+        self.first_lsn = 0
+        for column in self.columns:
+            column.dirty_lo = column.dirty_hi = 0
+            column.changed = False
+        return batch
+
+    def restore(self, batch: _Batch):
+        """Put back a batch that failed to write, ahead of what changed since."""
+        self.effects = batch.effects + self.effects
+        self.first_lsn = batch.first_lsn
+        self.edited = {**batch.edited, **self.edited}
+        for column, lo, hi in batch.dirty:
+            column.mark(lo, hi)
+        for column_id, _, _ in batch.columns:
+            self.columns_by_id[column_id].changed = True
+
+    def replay(self, record: dict):
+        """Apply a change read back from the write-ahead log, as it was applied originally."""
+        self.last_lsn = record["lsn"]
+        at = datetime.fromisoformat(record["at"])
+        task = self.tasks.get(UUID(record["task"]))
+        if task is None:
+            return # Deleted after the board was force-released; nothing to replay it onto
+        actor_id = UUID(record["actor"])
+        if record["op"] == "move":
+            self.move(task, self.columns_by_id[UUID(record["column"])], record["index"], at, actor_id)
+        else:
+            changes = dict(record["changes"])
+            if changes.get("due_date"):
+                changes["due_date"] = datetime.fromisoformat(changes["due_date"])
+            self.edit(task, changes, record["fields"], at, actor_id)
+
+
+def load_board(db: Session, board_id) -> Optional[_ResidentBoard]:
+    """The board as stored, with its live columns and tasks; None if it does not exist."""
+    board = db.query(Board).options(
+        selectinload(Board.columns)
+        .selectinload(BoardColumn.tasks)
+        .subqueryload(Task.assignees),
+        with_loader_criteria(Task, Task.board_id == board_id),
+    ).filter(Board.id == board_id).first()
+    if board is None:
+        return None
+    # One dict per user, shared by all of their tasks
+    assignees = {
+        assignee.id: {"id": assignee.id, "email": assignee.email, "full_name": assignee.full_name}
+        for column in board.columns for task in column.tasks for assignee in task.assignees
+    }
+    return _ResidentBoard(board, assignees)
+
+
+_UPDATE_TASKS = text("""
+    UPDATE tasks AS t
+    SET column_id = v.column_id, order_index = v.order_index, version = v.version, updated_at = v.updated_at,
+        title = v.title, description = v.description, priority = v.priority, due_date = v.due_date
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:column_ids AS uuid[]), CAST(:order_indexes AS int[]),
+                CAST(:versions AS int[]), CAST(:updated_ats AS timestamptz[]), CAST(:titles AS varchar[]),
+                CAST(:descriptions AS varchar[]), CAST(:priorities AS int[]), CAST(:due_dates AS timestamptz[]))
+         AS v(id, column_id, order_index, version, updated_at, title, description, priority, due_date)
+    WHERE t.board_id = :board_id AND t.id = v.id
+""")
+
+
+def write_batch(db: Session, batch: _Batch, owner: str, release: bool = False) -> bool:
+    """Write a batch in one transaction and commit; ``release`` also gives up the board.
+
+    Returns whether any webhook events were recorded. Raises OwnershipLost if
+    ``owner`` no longer holds the board (it was force-released).
+    """
+    board_id = batch.board_id
+    if batch.tasks:
+        db.execute(_UPDATE_TASKS, {"board_id": board_id, **dict(zip(
+            ("ids", "column_ids", "order_indexes", "versions", "updated_ats", "titles", "descriptions",
+             "priorities", "due_dates"),
+            map(list, zip(*batch.tasks)),
+        ))})
+    for column_id, version, updated_at in batch.columns:
+        db.execute(update(BoardColumn.__table__).where(BoardColumn.id == column_id)
+                   .values(version=version, updated_at=updated_at))
+
+    moved, activities, events, notify = [], [], [], []
+    stats = StatsDelta()
+    for effect in batch.effects:
+        if effect[0] == "move":
+            _, actor_id, task_id, title, priority, due_date, from_column_id, to_column_id, index, _ = effect
+            if from_column_id != to_column_id:
+                moved.append((task_id, from_column_id, to_column_id))
+                stats.add(board_id, from_column_id, priority, due_date, [], -1)
+                stats.add(board_id, to_column_id, priority, due_date, [], +1)
+            activities.append((board_id, actor_id, "task.moved", task_id, {
+                "title": title, "from_column_id": from_column_id, "to_column_id": to_column_id, "order_index": index,
+            }))
+            events.append({
+                "task_id": task_id, "title": title, "actor_id": actor_id,
+                "from_board_id": board_id, "from_column_id": from_column_id,
+                "to_board_id": board_id, "to_column_id": to_column_id, "order_index": index,
+            })
+            if due_date is not None:
+                notify.append(task_id)
+        else:
+            _, actor_id, task_id, title, column_id, (old_priority, old_due), (priority, due_date), fields, _ = effect
+            stats.add(board_id, column_id, old_priority, old_due, [], -1)
+            stats.add(board_id, column_id, priority, due_date, [], +1)
+            activities.append((board_id, actor_id, "task.updated", task_id, {"title": title, "fields": fields}))
+            if old_due is not None or due_date is not None:
+                notify.append(task_id)
+    task_flow.record_moved(db, board_id, moved)
+    record_activities(db, activities)
+    recorded = outbox.record_events(db, outbox.TASK_MOVED, events)
+    notify_tasks_changed(db, dict.fromkeys(notify))
+    stats.apply(db)
+
+    values = {"version": batch.version, "updated_at": batch.updated_at, "engine_lsn": batch.lsn}
+    if release:
+        values.update(engine_owner=None, engine_lsn=0)
+    result = db.execute(update(Board).where(Board.id == board_id, Board.engine_owner == owner).values(**values))
+    if result.rowcount != 1:
+        db.rollback()
+        raise OwnershipLost(f"Board {board_id} is no longer held by {owner}")
+    db.commit()
+    return bool(recorded)
+
+
+def claim(db: Session, board_id, owner: str) -> bool:
+    """Take ownership of an unowned board and commit."""
+    result = db.execute(
+        update(Board).where(Board.id == board_id, Board.engine_owner.is_(None), Board.is_template == False)
+        .values(engine_owner=owner, engine_lsn=0)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def unclaim(db: Session, board_id, owner: str):
+    """Give up a board without writing anything (nothing was changed in memory)."""
+    db.execute(update(Board).where(Board.id == board_id, Board.engine_owner == owner)
+               .values(engine_owner=None, engine_lsn=0))
+    db.commit()
+
+
+# --- Recovery ---
+
+def recover_board(db: Session, owner: str, board_id, records: Iterable[dict], through_lsn: Optional[int] = None) -> int:
+    """Replay a board's logged changes that Postgres has not applied (up to ``through_lsn``)
+    onto the board as stored, write it and release it, in one transaction.
+
+    Returns the changes replayed. Raises OwnershipLost if ``owner`` no longer holds the board.
+    """
+    applied_lsn = db.execute(
+        select(Board.engine_lsn).where(Board.id == board_id, Board.engine_owner == owner).with_for_update()
+    ).scalar()
+    if applied_lsn is None:
+        db.rollback()
+        raise OwnershipLost(f"Board {board_id} is no longer held by {owner}")
+    board = load_board(db, board_id)
+    replayed = 0
+    for record in records:
+        if applied_lsn < record["lsn"] and (through_lsn is None or record["lsn"] <= through_lsn):
+            board.replay(record)
+            replayed += 1
+    batch = board.take_batch()
+    if batch is None:
+        unclaim(db, board_id, owner)
+    else:
+        write_batch(db, batch, owner, release=True)
+    return replayed
+
+
+def recover_owner(db: Session, directory: str, owner: str) -> Tuple[int, int]:
+    """Replay a dead owner's log onto the boards it still holds and release them.
+
+    Returns (boards released, changes replayed). Each board is one transaction,
+    so recovery interrupted half way can simply be run again.
+    """
+    records: Dict[str, List[dict]] = {}
+    for record in board_wal.read_log(directory, owner):
+        records.setdefault(record["board"], []).append(record)
+    boards = replayed = 0
+    for board_id in db.execute(select(Board.id).where(Board.engine_owner == owner).order_by(Board.id)).scalars().all():
+        replayed += recover_board(db, owner, board_id, records.get(str(board_id), ()))
+        boards += 1
+        logger.info(f"Recovered board {board_id} from {owner}'s log")
+    return boards, replayed
+
+
+def recover_dead_owners(session_factory, directory: str, exclude: str = "") -> Tuple[int, int]:
+    """Recover the log of every dead owner in ``directory``, then delete it."""
+    boards = replayed = 0
+    if not os.path.isdir(directory):
+        return boards, replayed
+    for owner, lock_fd in board_wal.dead_owners(directory, exclude):
+        db = session_factory()
+        try:
+            recovered = recover_owner(db, directory, owner)
+        except Exception:
+            os.close(lock_fd) # Left for the next attempt
+            raise
+        finally:
+            db.close()
+        board_wal.remove_log(directory, owner, lock_fd)
+        boards += recovered[0]
+        replayed += recovered[1]
+    return boards, replayed
+
+
+# --- The engine ---
+
+class BoardEngine:
+    """Resident boards of this process. Everything runs on the event loop except database
+    work, which runs in a thread; changes to a board are therefore applied one at a time."""
+
+    def __init__(self, session_factory, enabled: bool = False, wal_dir: str = "board_engine_wal",
+                 max_bytes: int = 256 * 1024 * 1024, idle_seconds: float = 300.0, promote_after: int = 20,
+                 flush_interval: float = 0.05, max_tasks: int = 20_000):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.wal_dir = wal_dir
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.promote_after = promote_after
+        self.flush_interval = flush_interval
+        self.max_tasks = max_tasks
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+        self.wal: Optional[board_wal.WriteAheadLog] = None
+        self._boards: "OrderedDict[UUID, _ResidentBoard]" = OrderedDict() # Least recently used first
+        self._loading: Dict[UUID, asyncio.Future] = {}
+        self._task_boards: Dict[UUID, UUID] = {}
+        self._hits: Dict[UUID, int] = {}
+        self._hits_since = 0.0
+        self._cooldown: Dict[UUID, float] = {}
+        self._loop = None
+        self._wakeup = None
+        self._flusher = None
+        self._listener = None
+        self._stopping = False
+        self._recovered_at = 0.0
+        self._stats = {"promoted": 0, "released": 0, "changes": 0, "flushes": 0, "flush_errors": 0, "reads": 0}
+
+    async def start(self):
+        if not self.enabled:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        boards, replayed = await asyncio.to_thread(recover_dead_owners, self.session_factory, self.wal_dir, self.owner)
+        if boards:
+            logger.warning(f"Recovered {boards} boards ({replayed} logged changes) from dead board engines")
+        self._recovered_at = time.monotonic()
+        self.wal = board_wal.WriteAheadLog(self.wal_dir, self.owner)
+        await asyncio.to_thread(self.wal.open)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        self._listener = threading.Thread(target=self._listen, name="board-engine-listener", daemon=True)
+        self._listener.start()
+
+    async def stop(self):
+        """Flush and release every resident board, then delete the log."""
+        if not self.enabled or self._loop is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        released = await asyncio.gather(*(self.release(board_id) for board_id in list(self._boards)),
+                                        return_exceptions=True)
+        clean = not any(isinstance(result, BaseException) for result in released) and not self._boards
+        await self.wal.close(remove=clean)
+        self._loop = None
+
+    # --- Requests ---
+
+    def touch(self, board_id):
+        """Count a request to a board served from Postgres; promotes it once it is hot."""
+        if not self.enabled or self._loop is None or self._stopping:
+            return
+        board_id = _uuid(board_id)
+        if board_id is None:
+            return
+        now = time.monotonic()
+        if now - self._hits_since > PROMOTE_WINDOW:
+            self._hits.clear()
+            self._hits_since = now
+        hits = self._hits[board_id] = self._hits.get(board_id, 0) + 1
+        if (hits >= self.promote_after and board_id not in self._boards and board_id not in self._loading
+                and self._cooldown.get(board_id, 0) <= now):
+            self._hits.pop(board_id, None)
+            self._loading[board_id] = self._loop.create_future()
+            asyncio.create_task(self._promote(board_id))
+
+    def holds_task(self, task_id) -> bool:
+        return _uuid(task_id) in self._task_boards
+
+    async def board_body(self, board_id, user_id) -> Optional[bytes]:
+        """The rendered board if it is resident and the user's, once it is durable; else None."""
+        board = await self._resident(board_id)
+        if board is None or board.created_by != user_id:
+            return None
+        body = board.render()
+        await self.wal.wait_durable(board.last_lsn)
+        self._stats["reads"] += 1
+        return body
+
+    async def board_bodies(self, board_ids: Iterable) -> Dict[UUID, bytes]:
+        """Rendered bodies of the resident boards among ``board_ids``."""
+        bodies, lsn = {}, 0
+        for board_id in board_ids:
+            board = self._boards.get(board_id)
+            if board is not None and not board.releasing:
+                bodies[board_id] = board.render()
+                lsn = max(lsn, board.last_lsn)
+        if bodies:
+            await self.wal.wait_durable(lsn)
+        return bodies
+
+    async def move_task(self, db: Session, task_id, column_id, index: int, expected_version: Optional[int],
+                        user_id) -> Optional[dict]:
+        """Apply a move within a resident board; None if the caller should use the SQL path
+        (after the board was released, for a move to another board)."""
+        board, task = await self._resident_task(task_id, user_id)
+        if task is None:
+            return None
+        column = board.columns_by_id.get(column_id)
+        if column is None:
+            # Another board's column (or none of the user's): the SQL path moves the task or 404s
+            from .ownership import column_board_if_owned
+            if column_board_if_owned(db, column_id, user_id) is not None:
+                await self.release(board.id)
+            return None
+        self._check_version(board, task, expected_version)
+        at = datetime.now(timezone.utc)
+        result = board.move(task, column, index, at, user_id)
+        return await self._log(board, {
+            "op": "move", "task": str(task.id), "column": str(column.id), "index": result["order_index"],
+        }, at, user_id, result)
+
+    async def update_task(self, task_id, changes: dict, fields: List[str], expected_version: Optional[int],
+                          user_id) -> Optional[dict]:
+        """Apply an edit of title/description/priority/due_date; None if the task is not resident."""
+        board, task = await self._resident_task(task_id, user_id)
+        if task is None:
+            return None
+        self._check_version(board, task, expected_version)
+        changes = {key: _utc(value) if key == "due_date" else value for key, value in changes.items()}
+        at = datetime.now(timezone.utc)
+        result = board.edit(task, changes, fields, at, user_id)
+        logged = {key: value.isoformat() if isinstance(value, datetime) else value for key, value in changes.items()}
+        return await self._log(board, {"op": "edit", "task": str(task.id), "changes": logged, "fields": fields},
+                               at, user_id, result)
+
+    async def release(self, board_id):
+        """Flush a resident board and give it up, so the SQL paths may write it. No-op if not resident."""
+        if not self.enabled:
+            return
+        board = await self._resident(board_id)
+        if board is None:
+            return
+        if board.releasing:
+            await board.released.wait()
+            return
+        board.releasing = True
+        try:
+            async with board.flush_lock:
+                try:
+                    if board.unlogged:
+                        # Memory is ahead of the log: write what the log holds instead
+                        await asyncio.to_thread(self._call, self._recover, board.id, self.wal.durable_lsn)
+                    else:
+                        await self._write_all(board, release=True)
+                except OwnershipLost:
+                    logger.error(f"Board {board.id} was force-released; dropping it from memory")
+        except BaseException:
+            board.releasing = False
+            # Wake whoever waits on this release; they find the board still resident
+            waiting, board.released = board.released, asyncio.Event()
+            waiting.set()
+            raise
+        self._drop(board)
+
+    async def release_task(self, task_id):
+        """Release the board holding ``task_id``, if it is resident here."""
+        board_id = self._task_boards.get(_uuid(task_id))
+        if board_id is not None:
+            await self.release(board_id)
+
+    async def checkpoint(self, board_id):
+        """Flush a resident board now, e.g. before reading its tasks from Postgres."""
+        if not self.enabled:
+            return
+        board = await self._resident(board_id)
+        if board is not None and not board.releasing:
+            await self._flush(board)
+
+    # --- Internals ---
+
+    async def _resident(self, board_id) -> Optional[_ResidentBoard]:
+        board_id = _uuid(board_id)
+        loading = self._loading.get(board_id)
+        if loading is not None:
+            await asyncio.shield(loading)
+        board = self._boards.get(board_id)
+        if board is not None:
+            board.last_used = time.monotonic()
+            self._boards.move_to_end(board_id)
+        return board
+
+    async def _resident_task(self, task_id, user_id) -> Tuple[Optional[_ResidentBoard], Optional[_Task]]:
+        task_id = _uuid(task_id)
+        board_id = self._task_boards.get(task_id)
+        board = await self._resident(board_id) if board_id is not None else None
+        if board is None or board.releasing or board.created_by != user_id:
+            return None, None
+        if self.wal.failed is not None or board.unlogged:
+            # Nothing more can be acknowledged: hand the board to the SQL paths
+            await self.release(board.id)
+            return None, None
+        return board, board.tasks.get(task_id)
+
+    def _check_version(self, board: _ResidentBoard, task: _Task, expected_version: Optional[int]):
+        if expected_version is not None:
+            current = board.task_dict(task)
+            if current["version"] != expected_version:
+                raise TaskVersionConflict(current)
+
+    async def _log(self, board: _ResidentBoard, record: dict, at: datetime, actor_id, result: dict) -> dict:
+        """Log a change just applied in memory, and return ``result`` once it is durable.
+
+        If the log fails, the change is not acknowledged and must not reach Postgres
+        either: the board is released from the log, not from memory, and the error re-raised.
+        """
+        try:
+            board.last_lsn = self.wal.append({"board": str(board.id), "at": at.isoformat(), "actor": str(actor_id), **record})
+            board.first_lsn = board.first_lsn or board.last_lsn
+            self._stats["changes"] += 1
+            await self.wal.wait_durable(board.last_lsn)
+        except Exception:
+            board.unlogged = True
+            try:
+                await self.release(board.id)
+            except Exception:
+                logger.exception(f"Releasing board {board.id} after a write-ahead log failure failed")
+            raise
+        return result
+
+    async def _promote(self, board_id: UUID):
+        loading = self._loading[board_id]
+        try:
+            board = await asyncio.to_thread(self._call, self._load, board_id)
+            if board is not None:
+                self._boards[board_id] = board
+                for task_id in board.tasks:
+                    self._task_boards[task_id] = board_id
+                self._stats["promoted"] += 1
+                self._evict_over_budget()
+            else:
+                self._cooldown[board_id] = time.monotonic() + RELEASE_COOLDOWN
+        except Exception:
+            logger.exception(f"Loading board {board_id} into the board engine failed")
+            self._cooldown[board_id] = time.monotonic() + RELEASE_COOLDOWN
+        finally:
+            del self._loading[board_id]
+            loading.set_result(None)
+
+    def _load(self, db: Session, board_id: UUID) -> Optional[_ResidentBoard]:
+        # Huge boards are streamed from Postgres rather than held (see board_stream.py)
+        if board_task_counts(db, [board_id]).get(board_id, 0) > self.max_tasks:
+            return None
+        if not claim(db, board_id, self.owner):
+            return None # Templates, and boards another process holds
+        try:
+            # Loaded after the claim committed: every SQL write that could still commit
+            # is refused by bump_board_versions from now on
+            board = load_board(db, board_id)
+            db.rollback()
+        except Exception:
+            db.rollback()
+            unclaim(db, board_id, self.owner)
+            raise
+        return board
+
+    def _recover(self, db: Session, board_id: UUID, through_lsn: int) -> int:
+        records = (record for record in board_wal.read_log(self.wal_dir, self.owner) if record["board"] == str(board_id))
+        return recover_board(db, self.owner, board_id, records, through_lsn)
+
+    def _drop(self, board: _ResidentBoard):
+        self._boards.pop(board.id, None)
+        for task_id in board.tasks:
+            if self._task_boards.get(task_id) == board.id:
+                del self._task_boards[task_id]
+        self._cooldown[board.id] = time.monotonic() + RELEASE_COOLDOWN
+        self._stats["released"] += 1
+        board.released.set()
+
+    async def _flush(self, board: _ResidentBoard):
+        if board.unlogged:
+            await self.release(board.id) # A release after the log failed did not go through; retry it
+            return
+        async with board.flush_lock:
+            try:
+                await self._write_all(board)
+            except OwnershipLost:
+                logger.error(f"Board {board.id} was force-released; dropping it from memory")
+                board.releasing = True
+                self._drop(board)
+
+    async def _write_all(self, board: _ResidentBoard, release: bool = False):
+        """Write what changed since the last flush (put back if that fails); hold ``flush_lock``."""
+        batch = board.take_batch()
+        if batch is None:
+            if release:
+                await asyncio.to_thread(self._call, unclaim, board.id, self.owner)
+            return
+        try:
+            await self._write(board, batch, release)
+        except OwnershipLost:
+            raise
+        except Exception:
+            board.restore(batch)
+            raise
+
+    async def _write(self, board: _ResidentBoard, batch: _Batch, release: bool = False):
+        board.writing = batch
+        try:
+            # Only what is in the log may reach Postgres; raises if the log failed first
+            await self.wal.wait_durable(batch.lsn)
+            recorded = await asyncio.to_thread(self._call, write_batch, batch, self.owner, release)
+        finally:
+            board.writing = None
+        self._stats["flushes"] += 1
+        if recorded:
+            outbox.webhook_dispatcher.notify()
+
+    async def _flush_loop(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                for board in list(self._boards.values()):
+                    if board.pending and not board.releasing:
+                        await self._flush(board)
+                await self.wal.truncate(self._applied_lsn())
+                now = time.monotonic()
+                if now - self._recovered_at > RECOVER_INTERVAL:
+                    # Boards of engines that died since are refused to everyone until recovered
+                    self._recovered_at = now
+                    await asyncio.to_thread(recover_dead_owners, self.session_factory, self.wal_dir, self.owner)
+                for board in list(self._boards.values()):
+                    if now - board.last_used > self.idle_seconds:
+                        await self.release(board.id)
+            except Exception:
+                # e.g. the database is unreachable: changes stay logged and in memory
+                self._stats["flush_errors"] += 1
+                logger.exception("Board engine flush failed")
+
+    def _applied_lsn(self) -> int:
+        """Every change up to this LSN is in Postgres."""
+        pending = [lsn for board in self._boards.values()
+                   for lsn in (board.first_lsn, board.writing.first_lsn if board.writing else 0) if lsn]
+        return min(pending) - 1 if pending else self.wal.last_lsn
+
+    def _evict_over_budget(self):
+        total = sum(board.nbytes for board in self._boards.values())
+        for board in list(self._boards.values())[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= board.nbytes
+            asyncio.create_task(self.release(board.id))
+
+    def _on_release_request(self, payload: str):
+        try:
+            board_id = UUID(payload)
+        except ValueError:
+            return
+        if board_id in self._boards:
+            task = asyncio.create_task(self.release(board_id))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception() is None
+                                   or logger.error(f"Releasing board {board_id} failed: {t.exception()}"))
+
+    def _listen(self):
+        # LISTEN on a dedicated connection (not pooled) and hand requests to the event loop
+        import psycopg
+
+        dsn = get_engine().url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while not self._stopping:
+            try:
+                with psycopg.connect(dsn, autocommit=True) as connection:
+                    connection.add_notify_handler(
+                        lambda notify: self._loop.call_soon_threadsafe(self._on_release_request, notify.payload)
+                    )
+                    connection.execute(f"LISTEN {CHANNEL}")
+                    while not self._stopping:
+                        if select_module.select([connection.fileno()], [], [], 1.0)[0]:
+                            connection.execute("SELECT 1") # Delivers pending notifications to the handler
+            except Exception:
+                logger.exception("Board engine listener error")
+                time.sleep(1.0)
+
+    def _call(self, fn, *args):
+        db = self.session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "boards": len(self._boards),
+            "tasks": len(self._task_boards),
+            "bytes": sum(board.nbytes for board in self._boards.values()),
+            "max_bytes": self.max_bytes,
+            "wal_lsn": self.wal.last_lsn if self.wal else 0,
+            "wal_durable_lsn": self.wal.durable_lsn if self.wal else 0,
+            **self._stats,
+        }
+
+
+def _uuid(value) -> Optional[UUID]:
+    try:
+        return value if isinstance(value, UUID) else UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Stored as timestamptz, which reads back in UTC; naive values are taken to be UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _engine() -> BoardEngine:
+    settings = get_settings()
+    return BoardEngine(
+        SessionLocal, settings.board_engine_enabled, settings.board_engine_wal_dir, settings.board_engine_max_bytes,
+        settings.board_engine_idle_seconds, settings.board_engine_promote_after,
+        settings.board_engine_flush_interval, settings.board_stream_threshold,
+    )
+
+
+board_engine = SettingsBound(_engine)
+
+
+if __name__ == "__main__":
+    from ..models import user # Registers User, which Task.assignees refers to by name
+
+    parser = argparse.ArgumentParser(description="Inspect and recover the in-memory board engine's boards.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="List boards held by an engine")
+    recover = commands.add_parser("recover", help="Replay the logs of dead engines and release their boards")
+    recover.add_argument("--wal-dir", default=get_settings().board_engine_wal_dir)
+    release = commands.add_parser("release", help="Release a board whose engine's log is lost (its unflushed changes are)")
+    release.add_argument("board_id")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    db = SessionLocal()
+    try:
+        if args.command == "status":
+            for board_id, owner, lsn in db.execute(
+                select(Board.id, Board.engine_owner, Board.engine_lsn).where(Board.engine_owner.is_not(None))
+                .order_by(Board.engine_owner, Board.id)
+            ):
+                print(f"{board_id}  {owner}  applied through LSN {lsn}")
+        elif args.command == "recover":
+            boards, replayed = recover_dead_owners(SessionLocal, args.wal_dir)
+            print(f"Recovered {boards} boards ({replayed} logged changes replayed)")
+        else:
+            owner = db.scalar(select(Board.engine_owner).where(Board.id == args.board_id))
+            if owner is None:
+                print(f"Board {args.board_id} is not held")
+            else:
+                unclaim(db, args.board_id, owner)
+                print(f"Released board {args.board_id} from {owner}")
+    finally:
+        db.close()
@@ -0,0 +1,245 @@
+"""Incrementally maintained board statistics.
+
+Every task mutation adds its +1/-1 contributions to ``board_counters`` in the
+same transaction, so reading a board's stats touches one row per column,
+priority, due day and assignee instead of scanning its tasks. A task counts
+when neither it nor its column is soft-deleted.
+
+Counters can always be rebuilt from the tasks themselves (``rebuild_board``)
+and ``python -m app.services.board_stats`` reconciles every board. Mutations
+hold a shared per-board advisory lock while writing deltas and rebuilds take
+it exclusively, so a rebuild never double-counts an in-flight change.
+"""
+import argparse
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import String, and_, cast, delete, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models.association_tables import task_assignees_table
+from ..models.board import Board, BoardColumn
+from ..models.board_stats import BoardCounter
+from ..models.task import Task
+
+COLUMN = "column"
+PRIORITY = "priority"
+DUE = "due"
+ASSIGNEE = "assignee"
+
+
+def due_key(due_date: Optional[datetime]) -> Optional[str]:
+    """UTC calendar day of a due date; naive datetimes are taken to be UTC."""
+    if due_date is None:
+        return None
+    if due_date.tzinfo is not None:
+        due_date = due_date.astimezone(timezone.utc)
+    return due_date.strftime("%Y-%m-%d")
+
+
+def _board_lock_key(board_id):
+    return func.hashtextextended(cast(literal(str(board_id)), String), 0)
+
+
+class StatsDelta:
+    """Accumulates counter changes for one transaction and writes them in one upsert."""
+
+    def __init__(self):
+        self.deltas: Dict[Tuple, int] = defaultdict(int)
+
+    def add_task(self, board_id, task: Task, sign: int, assignee_ids: Optional[Iterable] = None):
+        """Count ``task`` (sign=+1) or uncount it (sign=-1) on ``board_id``.
+
+        ``assignee_ids`` overrides ``task.assignees``, for callers that captured the
+        old assignee list before replacing it.
+        """
+        if assignee_ids is None:
+            assignee_ids = [user.id for user in task.assignees]
+        self.add(board_id, task.column_id, task.priority, task.due_date, assignee_ids, sign)
+
+    def add(self, board_id, column_id, priority, due_date, assignee_ids: Iterable, sign: int):
+        self.deltas[(board_id, COLUMN, str(column_id))] += sign
+        self.deltas[(board_id, PRIORITY, str(priority or 0))] += sign
+        if due_date is not None:
+            self.deltas[(board_id, DUE, due_key(due_date))] += sign
+        for user_id in assignee_ids:
+            self.deltas[(board_id, ASSIGNEE, str(user_id))] += sign
+
+    def remove_rows(self, db: Session, board_id, rows):
+        """Uncount (id, column_id, priority, due_date) rows, e.g. from an UPDATE ... RETURNING."""
+        rows = list(rows)
+        assignees = defaultdict(list)
+        if rows:
+            for task_id, user_id in db.execute(
+                select(task_assignees_table.c.task_id, task_assignees_table.c.user_id)
+                .where(
+                    task_assignees_table.c.board_id == board_id,
+                    task_assignees_table.c.task_id.in_([row[0] for row in rows]),
+                )
+            ):
+                assignees[task_id].append(user_id)
+        for task_id, column_id, priority, due_date in rows:
+            self.add(board_id, column_id, priority, due_date, assignees[task_id], -1)
+
+    def apply(self, db: Session):
+        rows = [
+            {"board_id": board_id, "dimension": dimension, "key": key, "count": count}
+            for (board_id, dimension, key), count in sorted(self.deltas.items(), key=lambda item: str(item[0]))
+            if count != 0
+        ]
+        self.deltas.clear()
+        if not rows:
+            return
+        for board_id in sorted({str(row["board_id"]) for row in rows}):
+            db.execute(select(func.pg_advisory_xact_lock_shared(_board_lock_key(board_id))))
+        stmt = insert(BoardCounter).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[BoardCounter.board_id, BoardCounter.dimension, BoardCounter.key],
+            set_={"count": BoardCounter.count + stmt.excluded.count},
+        ))
+
+
+def _counter_rows(board_ids, sign: int, *criteria):
+    """SELECT producing (board_id, dimension, key, count) for the live tasks of the boards matching criteria."""
+    live = and_(
+        Task.board_id.in_(board_ids), # Prunes tasks (and task_assignees) to the boards' partitions
+        BoardColumn.board_id.in_(board_ids),
+        BoardColumn.is_deleted == False,
+        Task.is_deleted == False,
+        *criteria,
+    )
+    count = func.count() * sign
+
+    def grouped(dimension, key, *extra, join_assignees=False):
+        query = select(Task.board_id, literal(dimension), key, count).select_from(Task).join(
+            BoardColumn, Task.column_id == BoardColumn.id
+        )
+        if join_assignees:
+            query = query.join(task_assignees_table, and_(
+                task_assignees_table.c.task_id == Task.id, task_assignees_table.c.board_id == Task.board_id
+            ))
+        return query.where(live, *extra).group_by(Task.board_id, key)
+
+    due_day = func.to_char(func.timezone("UTC", Task.due_date), "YYYY-MM-DD")
+    return union_all(
+        grouped(COLUMN, cast(Task.column_id, String)),
+        grouped(PRIORITY, cast(func.coalesce(Task.priority, 0), String)),
+        grouped(DUE, due_day, Task.due_date.is_not(None)),
+        grouped(ASSIGNEE, cast(task_assignees_table.c.user_id, String), join_assignees=True),
+    )
+
+
+def _upsert(rows_select):
+    stmt = insert(BoardCounter).from_select(["board_id", "dimension", "key", "count"], rows_select)
+    return stmt.on_conflict_do_update(
+        index_elements=[BoardCounter.board_id, BoardCounter.dimension, BoardCounter.key],
+        set_={"count": BoardCounter.count + stmt.excluded.count},
+    )
+
+
+def count_boards(board_ids):
+    """INSERT adding the counters of every live task on the boards, in one statement.
+
+    For boards loaded in bulk without counters (``seed_db.py``); a board that
+    already has counters is rebuilt with ``rebuild_board`` instead.
+    """
+    return _upsert(_counter_rows(board_ids, 1))
+
+
+def rebuild_board(db: Session, board_id):
+    """Recompute a board's counters from its tasks. Does not commit."""
+    db.execute(select(func.pg_advisory_xact_lock(_board_lock_key(board_id))))
+    db.execute(delete(BoardCounter).where(BoardCounter.board_id == board_id))
+    db.execute(count_boards([board_id]))
+
+
+def uncount_column(db: Session, board_id, column_id):
+    """Subtract a column's live tasks in one statement, before the column is marked deleted.
+
+    Takes the board lock exclusively, like ``rebuild_board``, so no in-flight
+    delta for the column's tasks lands between the read and the commit. Does not commit.
+    """
+    db.execute(select(func.pg_advisory_xact_lock(_board_lock_key(board_id))))
+    db.execute(_upsert(_counter_rows([board_id], -1, Task.column_id == column_id)))
+
+
+def read_board_stats(db: Session, board: Board) -> dict:
+    """Assemble the stats document from counters; O(columns + priorities + due days + assignees)."""
+    counters = defaultdict(dict)
+    for dimension, key, count in db.execute(
+        select(BoardCounter.dimension, BoardCounter.key, BoardCounter.count)
+        .where(BoardCounter.board_id == board.id, BoardCounter.count != 0)
+    ):
+        counters[dimension][key] = count
+
+    columns = db.execute(
+        select(BoardColumn.id, BoardColumn.name)
+        .where(BoardColumn.board_id == board.id, BoardColumn.is_deleted == False)
+        .order_by(BoardColumn.order_index)
+    ).all()
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    due = counters[DUE]
+    return {
+        "board_id": board.id,
+        "total": sum(counters[COLUMN].get(str(column_id), 0) for column_id, _ in columns),
+        "columns": [
+            {"column_id": column_id, "name": name, "count": counters[COLUMN].get(str(column_id), 0)}
+            for column_id, name in columns
+        ],
+        "priorities": {int(key): count for key, count in sorted(counters[PRIORITY].items(), key=lambda i: int(i[0]))},
+        "overdue": sum(count for day, count in due.items() if day < today),
+        "due_today": due.get(today, 0),
+        "assignees": [
+            {"user_id": user_id, "count": count}
+            for user_id, count in sorted(counters[ASSIGNEE].items(), key=lambda item: -item[1])
+        ],
+    }
+
+
+def board_task_counts(db: Session, board_ids) -> Dict:
+    """Live tasks per board, from the column counters (deleted columns count zero)."""
+    return dict(db.execute(
+        select(BoardCounter.board_id, func.sum(BoardCounter.count))
+        .where(BoardCounter.board_id.in_(board_ids), BoardCounter.dimension == COLUMN)
+        .group_by(BoardCounter.board_id)
+    ).all())
+
+
+def reconcile_all(db: Session, batch_size: int = 100) -> int:
+    """Rebuild counters for every board, committing per batch. Returns boards processed."""
+    processed = 0
+    last_id = None
+    while True:
+        query = select(Board.id).order_by(Board.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(Board.id > last_id)
+        board_ids = db.execute(query).scalars().all()
+        if not board_ids:
+            return processed
+        for board_id in board_ids:
+            rebuild_board(db, board_id)
+        db.commit()
+        processed += len(board_ids)
+        last_id = board_ids[-1]
+
+
+if __name__ == "__main__":
+    from ..db.database import SessionLocal
+    from ..models import user # Registers User, which Task.assignees refers to by name
+
+    parser = argparse.ArgumentParser(description="Rebuild board_counters from the tasks table.")
+    parser.add_argument("--board", help="Only rebuild this board id")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.board:
+            rebuild_board(db, args.board)
+            db.commit()
+            print(f"Rebuilt counters for board {args.board}")
+        else:
+            print(f"Rebuilt counters for {reconcile_all(db)} boards")
+    finally:
+        db.close()
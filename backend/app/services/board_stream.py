@@ -0,0 +1,109 @@
+"""Streaming rendering of the full board document for very large boards.
+
+``GET /boards/{id}`` normally loads the whole ORM tree, validates it into
+``BoardSchema`` and sends the result in one piece, so memory and
+time-to-first-byte grow with the board. ``stream_board_json`` produces the
+same JSON document instead, column by column: each column's live tasks are
+read through a server-side cursor (``yield_per``) on the
+``(column_id, order_index)`` live-task index and serialized one batch at a
+time. Peak memory is one batch regardless of board size.
+
+The whole document is read in one REPEATABLE READ snapshot, so a task moved
+while the response is being sent appears exactly once and ``version`` matches
+the content.
+"""
+from typing import Dict, Iterator, List, Optional
+
+from pydantic_core import to_json
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.orm import Session
+
+from ..models.association_tables import task_assignees_table
+from ..models.board import Board, BoardColumn
+from ..models.task import Task
+from ..models.user import User
+from ..schemas.board import Board as BoardSchema, BoardColumn as BoardColumnSchema
+from ..schemas.task import Task as TaskSchema
+
+STREAM_BATCH_SIZE = 1000
+
+# Field order of the response schemas, so the output matches the buffered rendering byte for byte
+BOARD_FIELDS = [name for name in BoardSchema.model_fields if name != "columns"]
+COLUMN_FIELDS = [name for name in BoardColumnSchema.model_fields if name != "tasks"]
+TASK_FIELDS = list(TaskSchema.model_fields)
+
+
+def _open(fields: List[str], row, nested: str) -> bytes:
+    """``{...,"<nested>":[`` for a row whose nested list is streamed after it."""
+    head = to_json({name: getattr(row, name) for name in fields})
+    return head[:-1] + b',"' + nested.encode() + b'":['
+
+
+def stream_board_json(db: Session, board_id, user_id) -> Optional[Iterator[bytes]]:
+    """Start streaming a board the user owns, or return None if there is no such board.
+
+    Ends the session's current transaction and opens a REPEATABLE READ one that
+    the returned iterator keeps reading from.
+    """
+    db.rollback()
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    board = db.execute(
+        select(*(getattr(Board, name) for name in BOARD_FIELDS))
+        .where(Board.id == board_id, Board.created_by == user_id)
+    ).first()
+    if board is None:
+        return None
+    columns = db.execute(
+        select(*(getattr(BoardColumn, name) for name in COLUMN_FIELDS))
+        .where(BoardColumn.board_id == board.id, BoardColumn.is_deleted == False)
+        .order_by(BoardColumn.order_index)
+    ).all()
+    return _iter_board_json(db, board, columns)
+
+
+def _iter_board_json(db: Session, board, columns) -> Iterator[bytes]:
+    yield _open(BOARD_FIELDS, board, "columns")
+    # Assignee ids come with each task row (an index-only lookup per task); user summaries
+    # are fetched once per request, since a board has few distinct assignees
+    assignee_ids = func.array(
+        select(cast(task_assignees_table.c.user_id, String))
+        .where(task_assignees_table.c.task_id == Task.id, task_assignees_table.c.board_id == Task.board_id)
+        .order_by(task_assignees_table.c.user_id)
+        .scalar_subquery()
+    )
+    # UUIDs are read as text: they serialize the same and skip a parse and re-format per value
+    task_columns = [
+        assignee_ids if name == "assignees" else cast(getattr(Task, name), String) if name in ("id", "column_id") else getattr(Task, name)
+        for name in TASK_FIELDS
+    ]
+    users: Dict = {}
+    for n, column in enumerate(columns):
+        chunk = (b"," if n else b"") + _open(COLUMN_FIELDS, column, "tasks")
+        tasks = db.execute(
+            select(*task_columns)
+            .where(Task.board_id == board.id, Task.column_id == column.id, Task.is_deleted == False)
+            .order_by(Task.order_index)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        first = True
+        for partition in tasks.partitions():
+            records = [dict(zip(TASK_FIELDS, row)) for row in partition]
+            _load_users(db, users, {user_id for record in records for user_id in record["assignees"]})
+            for record in records:
+                record["assignees"] = [users[user_id] for user_id in record["assignees"]]
+            body = to_json(records)[1:-1]
+            chunk += body if first else b"," + body
+            first = False
+            yield chunk
+            chunk = b""
+        yield chunk + b"]}"
+    yield b"]}"
+
+
+def _load_users(db: Session, users: Dict, user_ids):
+    missing = [user_id for user_id in user_ids if user_id not in users]
+    if missing:
+        for user_id, email, full_name in db.execute(
+            select(cast(User.id, String), User.email, User.full_name).where(User.id.in_(missing))
+        ):
+            users[user_id] = {"id": user_id, "email": email, "full_name": full_name}
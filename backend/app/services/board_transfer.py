@@ -0,0 +1,228 @@
+"""Streaming NDJSON export/import of whole boards.
+
+An export is one JSON object per line, in dependency order:
+
+    {"type": "board", "format_version": 1, "id": ..., "name": ..., "description": ...}
+    {"type": "column", "id": ..., "name": ..., "order_index": ..., "is_deleted": ...}
+    {"type": "task", "id": ..., "column_id": ..., "title": ..., ...}
+    {"type": "assignee", "task_id": ..., "user_id": ..., "email": ...}
+
+Export reads tasks and assignee links through server-side cursors, and import
+remaps every id deterministically (uuid5 under a per-import namespace), so
+neither side holds more than one batch of rows in memory.
+"""
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from uuid import UUID, uuid4, uuid5
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..models.association_tables import task_assignees_table
+from ..models.board import Board, BoardColumn
+from ..models.task import Task
+from ..models.user import User
+
+FORMAT_VERSION = 1
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+
+TASK_FIELDS = ("title", "description", "due_date", "priority", "order_index", "is_deleted")
+
+
+class BoardImportError(ValueError):
+    """Raised when an uploaded export is malformed."""
+
+
+def _json_default(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _line(record: dict) -> str:
+    return json.dumps(record, default=_json_default, separators=(",", ":")) + "\n"
+
+
+def iter_board_ndjson(db: Session, board: Board) -> Iterator[str]:
+    """Yield the board as NDJSON chunks of up to EXPORT_BATCH_SIZE lines."""
+    yield _line({
+        "type": "board",
+        "format_version": FORMAT_VERSION,
+        "id": board.id,
+        "name": board.name,
+        "description": board.description,
+    })
+
+    columns = db.execute(
+        select(BoardColumn.id, BoardColumn.name, BoardColumn.order_index, BoardColumn.is_deleted)
+        .where(BoardColumn.board_id == board.id)
+        .order_by(BoardColumn.order_index)
+    )
+    yield "".join(_line({"type": "column", **row._asdict()}) for row in columns)
+
+    tasks = db.execute(
+        select(Task.id, Task.column_id, *(getattr(Task, field) for field in TASK_FIELDS))
+        .where(Task.board_id == board.id, Task.parent_id.is_(None)) # Cards only; subtasks are not exported
+        .order_by(Task.column_id, Task.order_index)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for partition in tasks.partitions():
+        yield "".join(_line({"type": "task", **row._asdict()}) for row in partition)
+
+    assignees = db.execute(
+        select(task_assignees_table.c.task_id, task_assignees_table.c.user_id, User.email)
+        .join(User, User.id == task_assignees_table.c.user_id)
+        .where(task_assignees_table.c.board_id == board.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for partition in assignees.partitions():
+        yield "".join(_line({"type": "assignee", **row._asdict()}) for row in partition)
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """Incrementally split a byte stream into parsed NDJSON records."""
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _parse_line(line, line_number)
+    if buffer.strip():
+        yield _parse_line(buffer, line_number + 1)
+
+
+def _parse_line(line: bytes, line_number: int) -> dict:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise BoardImportError(f"line {line_number}: invalid JSON ({e})")
+    if not isinstance(record, dict) or "type" not in record:
+        raise BoardImportError(f"line {line_number}: expected an object with a 'type' field")
+    return record
+
+
+class BoardImporter:
+    """Bulk-inserts a streamed export as a new board owned by ``owner_id``.
+
+    Rows are buffered per table and written with multi-row INSERTs once the
+    buffers reach IMPORT_BATCH_SIZE; nothing is committed here, so the caller
+    decides the transaction boundary.
+    """
+
+    def __init__(self, db: Session, owner_id: UUID, name: Optional[str] = None):
+        self.db = db
+        self.owner_id = owner_id
+        self.name = name
+        self.namespace = uuid4()
+        self.board_id: Optional[UUID] = None
+        self.column_ids = set()
+        self.user_ids: Dict[str, Optional[UUID]] = {}
+        self.columns: List[dict] = []
+        self.tasks: List[dict] = []
+        self.assignees: List[dict] = []
+        self.counts = {"columns": 0, "tasks": 0, "assignees": 0, "skipped_assignees": 0}
+
+    def _remap(self, old_id) -> UUID:
+        return uuid5(self.namespace, str(old_id))
+
+    def feed(self, record: dict) -> None:
+        kind = record["type"]
+        if kind == "board":
+            self._add_board(record)
+            return
+        if self.board_id is None:
+            raise BoardImportError("export must start with a board record")
+        try:
+            if kind == "column":
+                self._add_column(record)
+            elif kind == "task":
+                self._add_task(record)
+            elif kind == "assignee":
+                self._add_assignee(record)
+            else:
+                raise BoardImportError(f"unknown record type '{kind}'")
+        except KeyError as e:
+            raise BoardImportError(f"{kind} record is missing field {e}")
+        if len(self.columns) + len(self.tasks) + len(self.assignees) >= IMPORT_BATCH_SIZE:
+            self.flush()
+
+    def _add_board(self, record: dict) -> None:
+        if self.board_id is not None:
+            raise BoardImportError("export contains more than one board record")
+        if record.get("format_version") != FORMAT_VERSION:
+            raise BoardImportError(f"unsupported format_version {record.get('format_version')!r}")
+        self.board_id = self._remap(record["id"])
+        self.db.execute(insert(Board.__table__).values(
+            id=self.board_id,
+            name=self.name or record["name"],
+            description=record.get("description"),
+            created_by=self.owner_id,
+        ))
+
+    def _add_column(self, record: dict) -> None:
+        self.column_ids.add(str(record["id"]))
+        self.columns.append({
+            "id": self._remap(record["id"]),
+            "board_id": self.board_id,
+            "name": record["name"],
+            "order_index": record["order_index"],
+            "is_deleted": record.get("is_deleted", False),
+        })
+
+    def _add_task(self, record: dict) -> None:
+        if str(record["column_id"]) not in self.column_ids:
+            raise BoardImportError(f"task {record['id']} references unknown column {record['column_id']}")
+        row = {field: record.get(field) for field in TASK_FIELDS}
+        row["is_deleted"] = bool(row["is_deleted"])
+        row["priority"] = row["priority"] or 0
+        if row["due_date"] is not None:
+            row["due_date"] = datetime.fromisoformat(row["due_date"])
+        if row["order_index"] is None:
+            raise BoardImportError(f"task {record['id']} has no order_index")
+        self.tasks.append({
+            **row,
+            "id": self._remap(record["id"]),
+            "column_id": self._remap(record["column_id"]),
+            "board_id": self.board_id,
+        })
+
+    def _add_assignee(self, record: dict) -> None:
+        user_id = self._resolve_user(str(UUID(str(record["user_id"]))), record.get("email"))
+        if user_id is None:
+            self.counts["skipped_assignees"] += 1
+            return
+        self.assignees.append({"task_id": self._remap(record["task_id"]), "board_id": self.board_id, "user_id": user_id})
+
+    def _resolve_user(self, user_id: str, email: Optional[str]) -> Optional[UUID]:
+        """Map an exported user onto this environment by id, then by email."""
+        if user_id not in self.user_ids:
+            match = self.db.execute(select(User.id).where(User.id == user_id)).scalar()
+            if match is None and email:
+                match = self.db.execute(select(User.id).where(User.email == email)).scalar()
+            self.user_ids[user_id] = match
+        return self.user_ids[user_id]
+
+    def flush(self) -> None:
+        # Parents before children so foreign keys are satisfied within the transaction
+        for table, rows, key in (
+            (BoardColumn.__table__, self.columns, "columns"),
+            (Task.__table__, self.tasks, "tasks"),
+            (task_assignees_table, self.assignees, "assignees"),
+        ):
+            if rows:
+                self.db.execute(insert(table), rows)
+                self.counts[key] += len(rows)
+                rows.clear()
+
+    def finish(self) -> UUID:
+        if self.board_id is None:
+            raise BoardImportError("export is empty")
+        self.flush()
+        return self.board_id
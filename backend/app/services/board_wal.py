@@ -0,0 +1,218 @@
+"""Write-ahead log of the in-memory board engine (app/services/board_engine.py).
+
+Each engine process appends the changes it applies to its own log under
+``BOARD_ENGINE_WAL_DIR`` and acknowledges a change only once the log is
+fsynced; changes appended while an fsync runs share the next one (group
+commit). Records are numbered by a log sequence number (LSN) that increases
+per process, and Postgres remembers per board the last LSN it has applied
+(``boards.engine_lsn``), so recovery replays exactly what is missing.
+
+Files, for an owner id ``<owner>``:
+
+``<owner>.lock``
+    flocked by the owner for as long as it runs; whoever else can lock it
+    knows the owner is gone (a crash releases the lock too).
+``<owner>.<segment>.wal``
+    the log, one JSON record per line prefixed with its CRC32, rotated every
+    ``SEGMENT_BYTES``. A torn last line fails its CRC and ends the log there:
+    it was never fsynced, so never acknowledged.
+
+Segments whose records are all in Postgres are deleted as the engine flushes.
+"""
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("board_engine")
+
+SEGMENT_BYTES = 16 * 1024 * 1024
+
+
+def lock_path(directory: str, owner: str) -> str:
+    return os.path.join(directory, f"{owner}.lock")
+
+
+def segment_path(directory: str, owner: str, segment: int) -> str:
+    return os.path.join(directory, f"{owner}.{segment:06d}.wal")
+
+
+def segments(directory: str, owner: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(glob.escape(directory), f"{glob.escape(owner)}.*.wal")))
+
+
+def encode(record: dict) -> bytes:
+    data = json.dumps(record, separators=(",", ":")).encode()
+    return b"%08x %s\n" % (zlib.crc32(data), data)
+
+
+def read_log(directory: str, owner: str) -> Iterator[dict]:
+    """The owner's records in LSN order, up to the first torn or corrupt line."""
+    for path in segments(directory, owner):
+        with open(path, "rb") as f:
+            for line in f:
+                crc, _, data = line.rstrip(b"\n").partition(b" ")
+                if not line.endswith(b"\n") or len(crc) != 8 or int(crc, 16) != zlib.crc32(data):
+                    logger.warning(f"Write-ahead log {path} ends in a torn record; ignoring the rest")
+                    return
+                yield json.loads(data)
+
+
+def _fsync_directory(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def try_lock(directory: str, owner: str) -> Optional[int]:
+    """Lock ``owner``'s lock file; the fd to keep it locked, or None if a live process holds it."""
+    try:
+        fd = os.open(lock_path(directory, owner), os.O_RDWR | os.O_CREAT, 0o644)
+    except FileNotFoundError:
+        return None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def dead_owners(directory: str, exclude: str) -> Iterator[Tuple[str, int]]:
+    """(owner, locked fd) for every owner with files in ``directory`` whose process is gone."""
+    for path in sorted(glob.glob(os.path.join(glob.escape(directory), "*.lock"))):
+        owner = os.path.basename(path)[:-len(".lock")]
+        if owner == exclude:
+            continue
+        fd = try_lock(directory, owner)
+        if fd is not None:
+            yield owner, fd
+
+
+def remove_log(directory: str, owner: str, lock_fd: Optional[int] = None):
+    """Delete an owner's segments, then its lock file (closing ``lock_fd``, which locks it)."""
+    for path in segments(directory, owner):
+        os.unlink(path)
+    try:
+        os.unlink(lock_path(directory, owner))
+    except FileNotFoundError:
+        pass
+    if lock_fd is not None:
+        os.close(lock_fd)
+
+
+class WriteAheadLog:
+    """Appends from the event loop; writes, fsyncs and deletes run in a thread, one at a time."""
+
+    def __init__(self, directory: str, owner: str):
+        self.directory = directory
+        self.owner = owner
+        self.last_lsn = 0 # Appended
+        self.durable_lsn = 0 # Fsynced
+        self.failed: Optional[BaseException] = None
+        self._lock_fd = None
+        self._file = None
+        self._segment = 0
+        self._size = 0
+        self._closed: List[Tuple[str, int]] = [] # (path, last LSN) of finished segments
+        self._buffer: List[bytes] = []
+        self._waiters: List[Tuple[int, asyncio.Future]] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_fd = try_lock(self.directory, self.owner)
+        if self._lock_fd is None:
+            raise RuntimeError(f"Write-ahead log {self.owner} is locked by another process")
+        self._open_segment()
+
+    def _open_segment(self):
+        self._segment += 1
+        self._file = open(segment_path(self.directory, self.owner, self._segment), "ab")
+        self._size = 0
+        _fsync_directory(self.directory) # The new file's entry must survive a crash too
+
+    def append(self, record: dict) -> int:
+        """Number the record, queue it for the next fsync and return its LSN. Call on the event loop."""
+        if self.failed is not None:
+            raise RuntimeError("Write-ahead log failed") from self.failed
+        self.last_lsn += 1
+        self._buffer.append(encode({"lsn": self.last_lsn, **record}))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+        return self.last_lsn
+
+    async def wait_durable(self, lsn: int):
+        """Return once every record up to ``lsn`` is fsynced; raises if the log cannot be written."""
+        if lsn <= self.durable_lsn:
+            return
+        if self.failed is not None:
+            raise RuntimeError("Write-ahead log failed") from self.failed
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((lsn, future))
+        await future
+
+    async def _write(self):
+        while self._buffer:
+            lines, self._buffer = self._buffer, []
+            last_lsn = self.last_lsn
+            try:
+                finished = await asyncio.to_thread(self._write_lines, lines)
+            except BaseException as e:
+                logger.exception("Writing the board engine's write-ahead log failed")
+                self.failed = e
+                for _, future in self._waiters:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Write-ahead log failed"))
+                self._waiters = []
+                return
+            self.durable_lsn = last_lsn
+            if finished is not None:
+                self._closed.append((finished, last_lsn))
+            waiting = []
+            for lsn, future in self._waiters:
+                if lsn <= last_lsn:
+                    if not future.done():
+                        future.set_result(None)
+                else:
+                    waiting.append((lsn, future))
+            self._waiters = waiting
+
+    def _write_lines(self, lines: List[bytes]) -> Optional[str]:
+        """Write and fsync; returns the segment's path if this filled it (and a new one was started)."""
+        data = b"".join(lines)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._size += len(data)
+        if self._size < SEGMENT_BYTES:
+            return None
+        self._file.close()
+        self._open_segment()
+        return segment_path(self.directory, self.owner, self._segment - 1)
+
+    async def truncate(self, applied_lsn: int):
+        """Delete finished segments whose records are all applied in Postgres (LSN <= applied_lsn)."""
+        done = [path for path, last_lsn in self._closed if last_lsn <= applied_lsn]
+        if done:
+            self._closed = [(path, last_lsn) for path, last_lsn in self._closed if last_lsn > applied_lsn]
+            await asyncio.to_thread(lambda: [os.unlink(path) for path in done])
+
+    async def close(self, remove: bool):
+        """Wait for pending writes and close; ``remove`` deletes the log, once everything in it is applied."""
+        if self._writer is not None:
+            await asyncio.gather(self._writer, return_exceptions=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove:
+            await asyncio.to_thread(remove_log, self.directory, self.owner, self._lock_fd)
+        elif self._lock_fd is not None:
+            os.close(self._lock_fd)
+        self._lock_fd = None
@@ -0,0 +1,331 @@
+"""Background jobs persisted in the ``jobs`` table.
+
+Endpoints ``enqueue`` a job in the same transaction as the change that needs
+it and return 202 with the job; workers claim jobs with ``FOR UPDATE SKIP
+LOCKED`` and run them one batch per transaction, committing the job's
+progress with the batch. Handlers must therefore be resumable from
+``job.progress``: a job whose worker died is picked up again once its lease
+expires and carries on from the last committed batch.
+
+Each API process runs ``JOB_WORKERS`` workers (default 1) on its event loop,
+with the database work in a thread. Set ``JOB_WORKERS=0`` to run them
+elsewhere instead: ``python -m app.services.jobs --workers 2``.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import SettingsBound, get_settings
+from ..db.database import SessionLocal
+from ..models.board import Board, BoardColumn
+from ..models.job import Job
+from ..models.task import Task
+from . import task_flow
+from .activity import record_activity
+from .board_cache import bump_board_versions
+from .board_engine import BoardResident
+from .board_stats import StatsDelta
+from .ownership import ownership_cache
+from .reminders import notify_board_changed
+
+logger = logging.getLogger("jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+DELETE_COLUMN = "column.delete"
+BULK_UPDATE_TASKS = "tasks.bulk_update"
+
+MAX_ATTEMPTS = 3
+RESIDENT_RETRY_DELAY = 0.2 # Seconds before retrying a batch refused by a board engine
+
+
+def _lease() -> timedelta:
+    # A claimed job is handed to another worker once its lease runs out without a step
+    return timedelta(seconds=get_settings().job_lease_seconds)
+
+
+# kind -> handler(db, job) that processes one batch and returns True when the job is done
+_handlers: Dict[str, Callable[[Session, Job], bool]] = {}
+
+
+def job_handler(kind: str):
+    def register(handler):
+        _handlers[kind] = handler
+        return handler
+    return register
+
+
+def enqueue(db: Session, kind: str, created_by, board_id=None, total: Optional[int] = None, **params) -> Job:
+    """Add a job to the caller's transaction; it becomes visible to workers on commit."""
+    job = Job(kind=kind, created_by=created_by, board_id=board_id, total=total, params=params)
+    db.add(job)
+    db.flush()
+    return job
+
+
+# --- Job: column.delete ---
+
+@job_handler(DELETE_COLUMN)
+def _delete_column_batch(db: Session, job: Job) -> bool:
+    # The column is already marked deleted and its tasks uncounted (see delete_column_from_board);
+    # this soft-deletes the tasks themselves and logs their transitions
+    column_id = job.params["column_id"]
+    batch_size = get_settings().job_batch_size
+    live = and_(Task.board_id == job.board_id, Task.column_id == column_id, Task.is_deleted == False)
+    if job.total is None:
+        job.total = job.progress + db.scalar(select(func.count()).select_from(Task).where(live))
+        ownership_cache.forget_column(column_id) # In case this process cached it live
+
+    # Claim the column like task writers do (tasks._claim_columns) before locking its tasks, so a
+    # move out of the column, which locks the task and then its old siblings, cannot deadlock the batch
+    db.execute(update(BoardColumn).where(BoardColumn.id == column_id).values(version=BoardColumn.version + 1))
+    rows = db.execute(
+        update(Task)
+        # Rechecked on rows a concurrent writer changed, so moved/deleted tasks are left alone
+        .where(Task.id.in_(select(Task.id).where(live).limit(batch_size)), live)
+        .values(is_deleted=True, updated_at=func.now(), version=Task.version + 1)
+        .returning(Task.id, Task.column_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    task_flow.record_deleted(db, job.board_id, rows)
+    job.progress += len(rows)
+    if len(rows) < batch_size:
+        job.result = {"tasks_deleted": job.progress}
+        return True
+    return False
+
+
+# --- Job: tasks.bulk_update ---
+
+@job_handler(BULK_UPDATE_TASKS)
+def _bulk_update_batch(db: Session, job: Job) -> bool:
+    # job.progress is the position in task_ids; ids that are deleted or not owned are skipped
+    task_ids = job.params["task_ids"]
+    batch = task_ids[job.progress:job.progress + get_settings().job_batch_size]
+    changes = dict(job.params["changes"])
+    if changes.get("due_date"):
+        changes["due_date"] = datetime.fromisoformat(changes["due_date"])
+
+    rows = db.execute(
+        select(Task.id, Task.column_id, Task.priority, Task.due_date, BoardColumn.board_id)
+        .join(BoardColumn, Task.column_id == BoardColumn.id)
+        .join(Board, BoardColumn.board_id == Board.id)
+        .where(
+            Task.id.in_(batch),
+            Task.is_deleted == False,
+            BoardColumn.is_deleted == False,
+            Board.created_by == job.created_by,
+        )
+        .order_by(Task.id)
+        .with_for_update(of=Task)
+    ).all()
+
+    if rows:
+        # One UPDATE per board, each confined to that board's partition
+        task_ids_by_board = defaultdict(list)
+        for row in rows:
+            task_ids_by_board[row.board_id].append(row.id)
+        for board_id, board_task_ids in task_ids_by_board.items():
+            db.execute(
+                update(Task)
+                .where(Task.board_id == board_id, Task.id.in_(board_task_ids))
+                .values(**changes, updated_at=func.now(), version=Task.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+        # Assignees and columns don't change, so only the priority and due counters move
+        stats = StatsDelta()
+        for row in rows:
+            stats.add(row.board_id, row.column_id, row.priority, row.due_date, [], -1)
+            stats.add(row.board_id, row.column_id, changes.get("priority", row.priority),
+                      changes.get("due_date", row.due_date), [], +1)
+        stats.apply(db)
+        per_board = Counter(row.board_id for row in rows)
+        for board_id, count in per_board.items():
+            record_activity(db, board_id, job.created_by, "tasks.bulk_updated", job_id=job.id,
+                            tasks_updated=count, fields=sorted(changes))
+            if "due_date" in changes:
+                notify_board_changed(db, board_id)
+        bump_board_versions(db, *per_board)
+
+    job.progress += len(batch)
+    updated = (job.result or {}).get("tasks_updated", 0) + len(rows)
+    job.result = {"tasks_updated": updated, "tasks_skipped": job.progress - updated}
+    return job.progress >= len(task_ids)
+
+
+# --- Claiming and running ---
+
+def claim_job(db: Session, worker_id: str) -> Optional[UUID]:
+    """Take the oldest queued job (or one whose lease expired) and commit the claim."""
+    while True:
+        job = db.execute(
+            select(Job)
+            .where(or_(Job.status == QUEUED, and_(Job.status == RUNNING, Job.locked_until < func.now())))
+            .order_by(Job.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        if job is None:
+            db.rollback()
+            return None
+        if job.attempts >= MAX_ATTEMPTS:
+            # Its workers keep dying on it; stop handing it out
+            job.status = FAILED
+            job.error = job.error or f"Gave up after {job.attempts} attempts"
+            job.finished_at = func.now()
+            job.locked_by = job.locked_until = None
+            db.commit()
+            continue
+        job.status = RUNNING
+        job.locked_by = worker_id
+        job.locked_until = func.now() + _lease()
+        job.attempts += 1
+        if job.started_at is None:
+            job.started_at = func.now()
+        db.commit()
+        return job.id
+
+
+def run_step(db: Session, job_id, worker_id: str) -> bool:
+    """Run one batch of a claimed job in its own transaction. True once there is nothing left to do."""
+    job = db.execute(select(Job).where(Job.id == job_id).with_for_update()).scalar_one_or_none()
+    if job is None or job.status != RUNNING or job.locked_by != worker_id:
+        db.rollback() # Our lease expired and another worker took the job over
+        return True
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind '{job.kind}'")
+        done = handler(db, job)
+        if done:
+            job.status = SUCCEEDED
+            job.finished_at = func.now()
+            job.locked_by = job.locked_until = None
+        else:
+            job.locked_until = func.now() + _lease()
+        db.commit()
+        return done
+    except BoardResident:
+        # A board engine is releasing one of the boards (asked by bump_board_versions); retry the batch
+        db.rollback()
+        time.sleep(RESIDENT_RETRY_DELAY)
+        return False
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"Job {job_id} failed")
+        db.execute(
+            update(Job).where(Job.id == job_id, Job.locked_by == worker_id)
+            .values(status=FAILED, error=str(e), finished_at=func.now(), locked_by=None, locked_until=None)
+        )
+        db.commit()
+        return True
+
+
+def release_job(db: Session, job_id, worker_id: str):
+    """Hand a job back to the queue on shutdown; the interrupted run does not count as an attempt."""
+    db.execute(
+        update(Job).where(Job.id == job_id, Job.locked_by == worker_id, Job.status == RUNNING)
+        .values(status=QUEUED, locked_by=None, locked_until=None, attempts=Job.attempts - 1)
+    )
+    db.commit()
+
+
+class JobRunner:
+    """Worker tasks on the running event loop; each DB step runs in a thread."""
+
+    def __init__(self, session_factory, workers: int = 1, poll_interval: float = 1.0):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks = []
+        self._loop = None
+        self._wakeup = None
+        self._stopping = False
+
+    async def start(self):
+        if self.workers <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = [asyncio.create_task(self._work(f"{prefix}:{n}")) for n in range(self.workers)]
+
+    async def stop(self):
+        """Let each worker finish its current batch, then release its job."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers now instead of at their next poll. Call after the enqueue committed."""
+        if self._loop is not None and not self._stopping:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _work(self, worker_id: str):
+        while not self._stopping:
+            try:
+                job_id = await asyncio.to_thread(self._call, claim_job, worker_id)
+                if job_id is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+                done = False
+                while not done and not self._stopping:
+                    done = await asyncio.to_thread(self._call, run_step, job_id, worker_id)
+                if not done:
+                    await asyncio.to_thread(self._call, release_job, job_id, worker_id)
+            except Exception:
+                # e.g. the database is unreachable; the lease lets another worker resume the job
+                logger.exception(f"Job worker {worker_id} error")
+                await asyncio.sleep(self.poll_interval)
+
+    def _call(self, fn, *args):
+        db = self.session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+
+job_runner = SettingsBound(lambda: JobRunner(SessionLocal, get_settings().job_workers, get_settings().job_poll_interval))
+
+
+if __name__ == "__main__":
+    from ..models import user # Registers User, which Task.assignees refers to by name
+
+    parser = argparse.ArgumentParser(description="Run background job workers outside the API process.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    async def main():
+        runner = JobRunner(SessionLocal, args.workers, args.poll_interval)
+        await runner.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
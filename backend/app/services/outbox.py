@@ -0,0 +1,272 @@
+"""Outgoing webhooks through a transactional outbox.
+
+``record_event`` adds an event to the caller's transaction as one
+``outbox_events`` row per endpoint in ``WEBHOOK_URLS``, so an event exists
+exactly when its change committed, and the request never waits on a receiver.
+
+``WebhookDispatcher`` delivers them in the background. Each delivery loop
+claims up to ``WEBHOOK_BATCH_SIZE`` due rows of its endpoint (``FOR UPDATE
+SKIP LOCKED``, leased by pushing ``available_at`` past the request timeout),
+POSTs them as one ``{"events": [...]}`` body over a shared keep-alive
+connection pool, and deletes them once the endpoint answers 2xx. A failed
+batch is retried with exponential backoff (capped at ``WEBHOOK_MAX_BACKOFF``);
+rows of a dispatcher that died mid-batch are picked up when their lease ends.
+Delivery is therefore at-least-once and not ordered across batches: receivers
+dedupe on each event's ``id`` and order by ``occurred_at``.
+
+Each API process runs ``WEBHOOK_CONCURRENCY`` loops per endpoint (default 2).
+Set it to 0 to deliver elsewhere instead:
+``python -m app.services.outbox --concurrency 4``. ``bench/webhook_receiver.py``
+is a local receiver and ``bench/webhook_delivery.py`` an end-to-end check.
+"""
+import argparse
+import asyncio
+import logging
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID, uuid4
+
+from pydantic_core import to_jsonable_python
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from ..core.config import SettingsBound, get_settings
+from ..db.database import SessionLocal
+from ..models.outbox import OutboxEvent
+
+logger = logging.getLogger("outbox")
+
+TASK_MOVED = "task.moved"
+
+BASE_BACKOFF = 1.0 # Seconds before the first retry; doubles per attempt
+# A claimed batch is handed out again this long after the request timeout
+LEASE_MARGIN = timedelta(seconds=30)
+
+
+def record_event(db: Session, event_type: str, **data) -> Optional[UUID]:
+    """Add an event for every configured endpoint to the caller's transaction.
+
+    ``data`` becomes the event body next to ``id``, ``type`` and ``occurred_at``
+    (UUIDs/datetimes as strings). Returns the event id, or None when no
+    endpoints are configured.
+    """
+    event_ids = record_events(db, event_type, [data])
+    return event_ids[0] if event_ids else None
+
+
+def record_events(db: Session, event_type: str, events: List[dict]) -> List[UUID]:
+    """``record_event`` for many events in one statement; returns their ids (none without endpoints)."""
+    endpoints = get_settings().webhook_urls
+    if not endpoints or not events:
+        return []
+    occurred_at = datetime.now(timezone.utc).isoformat()
+    event_ids = [uuid4() for _ in events]
+    db.execute(insert(OutboxEvent.__table__).values([
+        {
+            "event_id": event_id,
+            "endpoint": endpoint,
+            "event_type": event_type,
+            "payload": {"id": str(event_id), "type": event_type, "occurred_at": occurred_at, **to_jsonable_python(data)},
+        }
+        for event_id, data in zip(event_ids, events) for endpoint in endpoints
+    ]))
+    return event_ids
+
+
+def backoff(attempts: int, cap: float) -> float:
+    """Seconds to wait after the ``attempts``-th failure, with jitter so retries spread out."""
+    return min(cap, BASE_BACKOFF * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+
+
+# --- Claiming and acknowledging ---
+
+def claim_batch(db: Session, endpoint: str, limit: int):
+    """Lease up to ``limit`` due events of an endpoint, oldest first, and commit the claim."""
+    due = (
+        select(OutboxEvent.id)
+        .where(OutboxEvent.endpoint == endpoint, OutboxEvent.available_at <= func.now())
+        .order_by(OutboxEvent.available_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(due.scalar_subquery()))
+        .values(available_at=func.now() + timedelta(seconds=get_settings().webhook_timeout) + LEASE_MARGIN,
+                attempts=OutboxEvent.attempts + 1)
+        .returning(OutboxEvent.id, OutboxEvent.payload, OutboxEvent.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return sorted(rows, key=lambda row: row.id)
+
+
+def ack_batch(db: Session, ids: List[int]):
+    db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(ids)).execution_options(synchronize_session=False))
+    db.commit()
+
+
+def retry_batch(db: Session, ids: List[int], attempts: int, error: str, max_backoff: float):
+    db.execute(
+        update(OutboxEvent).where(OutboxEvent.id.in_(ids))
+        .values(available_at=func.now() + timedelta(seconds=backoff(attempts, max_backoff)), last_error=error)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+# --- Dispatcher ---
+
+class WebhookDispatcher:
+    """Delivery loops on the running event loop; each DB step runs in a thread."""
+
+    def __init__(self, session_factory, endpoints: List[str], concurrency: int = 2, batch_size: int = 100,
+                 timeout: float = 10.0, poll_interval: float = 1.0, max_backoff: float = 300.0):
+        self.session_factory = session_factory
+        self.endpoints = endpoints
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self._client = None
+        self._tasks = []
+        self._loop = None
+        self._wakeup = None
+        self._stopped = None # Cuts backoffs short on shutdown; new events do not
+        self._stopping = False
+        self._stats = Counter()
+
+    async def start(self):
+        if self.concurrency <= 0 or not self.endpoints:
+            return
+        import httpx # Only needed once there is something to deliver
+
+        loops = len(self.endpoints) * self.concurrency
+        # One pool for every endpoint; each loop has at most one request in flight
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=loops, max_keepalive_connections=loops),
+        )
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._deliver(endpoint))
+            for endpoint in self.endpoints for _ in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        """Let each loop finish the batch it is sending, then close the pool."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+            self._stopped.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def notify(self):
+        """Deliver now instead of at the next poll. Call after the event's transaction committed."""
+        if self._loop is not None and not self._stopping:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _deliver(self, endpoint: str):
+        failures = 0 # Consecutive failed batches: an unreachable endpoint is polled less and less
+        while not self._stopping:
+            try:
+                batch = await asyncio.to_thread(self._call, claim_batch, endpoint, self.batch_size)
+                if not batch:
+                    await self._wait(self._wakeup, self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+                ids = [row.id for row in batch]
+                error = await self._post(endpoint, [row.payload for row in batch])
+                if error is None:
+                    await asyncio.to_thread(self._call, ack_batch, ids)
+                    self._stats["delivered"] += len(batch)
+                    self._stats["batches"] += 1
+                    failures = 0
+                    continue
+                attempts = max(row.attempts for row in batch)
+                await asyncio.to_thread(self._call, retry_batch, ids, attempts, error, self.max_backoff)
+                self._stats["failed_batches"] += 1
+                failures += 1
+                logger.warning(f"Delivering {len(batch)} events to {endpoint} failed ({error}); attempt {attempts}")
+                await self._wait(self._stopped, backoff(failures, self.max_backoff))
+            except Exception:
+                # e.g. the database is unreachable; leased rows are retried once the lease ends
+                logger.exception(f"Webhook delivery to {endpoint} error")
+                await self._wait(self._stopped, self.poll_interval)
+
+    async def _post(self, endpoint: str, events: List[dict]) -> Optional[str]:
+        """Send one batch; returns None on a 2xx answer, else why it failed."""
+        try:
+            response = await self._client.post(endpoint, json={"events": events})
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+        return None if response.is_success else f"HTTP {response.status_code}"
+
+    async def _wait(self, event: asyncio.Event, seconds: float):
+        try:
+            await asyncio.wait_for(event.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def _call(self, fn, *args):
+        db = self.session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "endpoints": len(self.endpoints),
+            "loops": len(self._tasks),
+            "delivered": self._stats["delivered"],
+            "batches": self._stats["batches"],
+            "failed_batches": self._stats["failed_batches"],
+        }
+
+
+def _dispatcher(concurrency: int, endpoints: Optional[List[str]] = None) -> WebhookDispatcher:
+    settings = get_settings()
+    return WebhookDispatcher(
+        SessionLocal, endpoints or settings.webhook_urls, concurrency, settings.webhook_batch_size,
+        settings.webhook_timeout, settings.webhook_poll_interval, settings.webhook_max_backoff,
+    )
+
+
+webhook_dispatcher = SettingsBound(lambda: _dispatcher(get_settings().webhook_concurrency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deliver outbox webhook events outside the API process.")
+    parser.add_argument("--concurrency", type=int, default=2, help="Batches in flight per endpoint")
+    parser.add_argument("--url", action="append", help="Endpoint to deliver to (default: WEBHOOK_URLS); repeatable")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING) # Not a line per request
+
+    async def main():
+        dispatcher = _dispatcher(args.concurrency, args.url)
+        if not dispatcher.endpoints:
+            parser.error("no endpoints: set WEBHOOK_URLS or pass --url")
+        await dispatcher.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await dispatcher.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,149 @@
+"""Cached board-ownership resolution for task and column endpoints.
+
+A column never changes board and a board never changes owner, so
+``column_id -> (board_id, owner_id, is_deleted)`` can be cached and checked
+with a dict lookup instead of joining board_columns and boards on every
+request. A deleted column is never restored, so its entry stays valid too.
+
+Tasks are partitioned by board, so task endpoints first need the task's board
+to load the row from one partition: ``task_board_cache`` maps
+``task_id -> board_id``. Unlike a column, a task can change board; the worker
+that moves it updates its entry, and an entry gone stale in another worker
+just makes the pruned load miss, after which ``board_of(..., refresh=True)``
+looks the task up across all partitions.
+
+``column_board_if_owned`` treats a deleted column as one the user does not
+own. The column delete endpoint and job evict the column with ``forget_column``
+so the next lookup reads it as deleted. Another worker's entry can still say
+live until it is evicted. That is harmless because writers claim the column
+with ``is_deleted = false`` in the UPDATE (``tasks._claim_columns``).
+"""
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.config import SettingsBound, get_settings
+from ..models.board import Board, BoardColumn
+from ..models.task import Task
+
+
+class OwnershipCache:
+    """Bounded LRU of column id -> (board id, owner id, is_deleted)."""
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[UUID, Tuple[UUID, UUID, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def column_owner(self, db: Session, column_id) -> Optional[Tuple[UUID, UUID, bool]]:
+        """(board_id, owner_id, is_deleted) of a column, or None if there is no such column."""
+        try:
+            key = column_id if isinstance(column_id, UUID) else UUID(str(column_id))
+        except ValueError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        row = db.execute(
+            select(BoardColumn.board_id, Board.created_by, BoardColumn.is_deleted)
+            .join(Board, BoardColumn.board_id == Board.id)
+            .where(BoardColumn.id == key)
+        ).first()
+        if row is None:
+            return None # Misses are not cached; the id may be created later
+        entry = (row.board_id, row.created_by, row.is_deleted)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def forget_column(self, column_id):
+        with self._lock:
+            self._entries.pop(column_id if isinstance(column_id, UUID) else UUID(str(column_id)), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+class TaskBoardCache:
+    """Bounded LRU of task id -> board id, the partition key of tasks."""
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[UUID, UUID]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def board_of(self, db: Session, task_id, refresh: bool = False) -> Optional[UUID]:
+        """Board id of a task (deleted or not), or None if there is no such task."""
+        try:
+            key = task_id if isinstance(task_id, UUID) else UUID(str(task_id))
+        except ValueError:
+            return None
+        if not refresh:
+            with self._lock:
+                board_id = self._entries.get(key)
+                if board_id is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return board_id
+        with self._lock:
+            self.misses += 1
+
+        # Not prunable: one primary key probe per partition
+        board_id = db.execute(select(Task.board_id).where(Task.id == key)).scalar()
+        if board_id is None:
+            self.forget(key)
+            return None
+        self.remember(key, board_id)
+        return board_id
+
+    def remember(self, task_id: UUID, board_id: UUID):
+        with self._lock:
+            self._entries[task_id] = board_id
+            self._entries.move_to_end(task_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, task_id: UUID):
+        with self._lock:
+            self._entries.pop(task_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+ownership_cache = SettingsBound(lambda: OwnershipCache(get_settings().ownership_cache_size))
+task_board_cache = SettingsBound(lambda: TaskBoardCache(get_settings().ownership_cache_size))
+
+
+def column_board_if_owned(db: Session, column_id, user_id) -> Optional[UUID]:
+    """Board id of the column if it is live and ``user_id`` owns its board, else None."""
+    entry = ownership_cache.column_owner(db, column_id)
+    if entry is None or entry[1] != user_id or entry[2]:
+        return None
+    return entry[0]
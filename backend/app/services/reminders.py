@@ -0,0 +1,301 @@
+"""Due-date reminders.
+
+The scheduler holds only tasks due inside a sliding window (``--horizon``) in
+a heap, loaded through the partial index on live due dates and extended as
+time passes. Endpoints call ``notify_task_changed`` / ``notify_board_changed``
+when a due date may have appeared, changed or gone away; that is a Postgres
+NOTIFY on ``task_due``, delivered only if their transaction commits, and
+the scheduler re-reads just those tasks. Entries are checked against the
+database again right before sending, so a missed or stale hint can never send
+a reminder for a deleted or rescheduled task. Sent reminders are recorded in
+``task_reminders``; the log is written in the same transaction as the send
+and committed after it, so delivery is at-least-once.
+
+Run one scheduler per database:
+
+    python -m app.services.reminders --sink log
+    python -m app.services.reminders --sink webhook --webhook-url http://localhost:9100/reminders
+
+(``bench/webhook_receiver.py`` is a local receiver to point the webhook sink at.)
+"""
+import argparse
+import heapq
+import logging
+import select as select_module
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models.association_tables import task_assignees_table
+from ..models.board import BoardColumn
+from ..models.reminder import TaskReminder
+from ..models.task import Task
+
+logger = logging.getLogger("reminders")
+
+CHANNEL = "task_due"
+DEFAULT_HORIZON = timedelta(hours=1)
+DEFAULT_CATCH_UP = timedelta(days=1)
+SEND_BATCH_SIZE = 500
+RETRY_DELAY = timedelta(seconds=30)
+
+
+def _notify(db: Session, payload: str):
+    db.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+def notify_task_changed(db: Session, task_id):
+    """Hint that a task's due date, liveness or board changed. Call inside the mutation's transaction."""
+    _notify(db, f"task:{task_id}")
+
+
+def notify_tasks_changed(db: Session, task_ids: Iterable):
+    """``notify_task_changed`` for many tasks in one statement."""
+    payloads = [f"task:{task_id}" for task_id in task_ids]
+    if payloads:
+        db.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": CHANNEL, "payloads": payloads},
+        )
+
+
+def notify_board_changed(db: Session, board_id):
+    """Hint that many tasks of a board changed at once (clone, import, bulk edit)."""
+    _notify(db, f"board:{board_id}")
+
+
+# --- Sinks ---
+
+class LogSink:
+    def send(self, reminders: List[dict]):
+        for reminder in reminders:
+            logger.info(f"Task {reminder['task_id']} '{reminder['title']}' is due at {reminder['due_date']}")
+
+
+class WebhookSink:
+    """POSTs {"reminders": [...]} to a URL; any error fails the batch so it is retried."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        import httpx # Only needed for this sink
+        self.url = url
+        self.client = httpx.Client(timeout=timeout)
+
+    def send(self, reminders: List[dict]):
+        self.client.post(self.url, json={"reminders": reminders}).raise_for_status()
+
+
+# --- Scheduler ---
+
+def _live_due_tasks(*criteria):
+    return (
+        select(Task.id, Task.due_date)
+        .join(BoardColumn, Task.column_id == BoardColumn.id)
+        .where(Task.is_deleted == False, BoardColumn.is_deleted == False, Task.due_date.is_not(None), *criteria)
+    )
+
+
+class ReminderScheduler:
+    """Heap of (due_date, task_id) for live tasks due up to ``loaded_until``.
+
+    ``_due`` holds each task's current entry; heap entries that no longer match
+    it are stale and skipped when popped, so changes never search the heap.
+    """
+
+    def __init__(self, session_factory, sink, horizon: timedelta = DEFAULT_HORIZON,
+                 catch_up: timedelta = DEFAULT_CATCH_UP):
+        self.session_factory = session_factory
+        self.sink = sink
+        self.horizon = horizon
+        self.catch_up = catch_up # On start, also send reminders missed up to this long ago
+        self._heap = []
+        self._due: Dict[UUID, datetime] = {}
+        self.loaded_from: Optional[datetime] = None
+        self.loaded_until: Optional[datetime] = None
+        self.sent = 0
+
+    def _schedule(self, task_id: UUID, due_date: Optional[datetime]):
+        if due_date is None or due_date > self.loaded_until:
+            self._due.pop(task_id, None) # Unscheduled, or picked up when the window gets there
+            return
+        if self._due.get(task_id) != due_date:
+            self._due[task_id] = due_date
+            heapq.heappush(self._heap, (due_date, task_id))
+
+    def load_window(self, db: Session, now: datetime):
+        """Extend the window to now + horizon, reading only the newly covered range."""
+        if self.loaded_until is None:
+            self.loaded_from = self.loaded_until = now - self.catch_up
+        until = now + self.horizon
+        for task_id, due_date in db.execute(
+            _live_due_tasks(Task.due_date > self.loaded_until, Task.due_date <= until)
+        ):
+            self._due[task_id] = due_date
+            heapq.heappush(self._heap, (due_date, task_id))
+        self.loaded_until = until
+
+    def apply_hints(self, db: Session, payloads: Iterable[str]):
+        """Re-read the tasks named by NOTIFY payloads and reschedule them."""
+        task_ids, board_ids = set(), set()
+        for payload in payloads:
+            kind, _, value = payload.partition(":")
+            try:
+                (task_ids if kind == "task" else board_ids).add(UUID(value))
+            except ValueError:
+                logger.warning(f"Ignoring malformed {CHANNEL} payload {payload!r}")
+        if task_ids:
+            found = dict(db.execute(_live_due_tasks(Task.id.in_(task_ids))).all())
+            for task_id in task_ids:
+                self._schedule(task_id, found.get(task_id))
+        if board_ids:
+            for task_id, due_date in db.execute(_live_due_tasks(
+                Task.board_id.in_(board_ids),
+                Task.due_date > self.loaded_from,
+                Task.due_date <= self.loaded_until,
+            )):
+                self._schedule(task_id, due_date)
+
+    def next_due(self) -> Optional[datetime]:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap) # Stale entry
+        return self._heap[0][0] if self._heap else None
+
+    def send_due(self, db: Session, now: datetime) -> int:
+        """Send reminders for everything due by ``now``, re-checked against the database."""
+        sent = 0
+        while True:
+            batch = []
+            while len(batch) < SEND_BATCH_SIZE and (due := self.next_due()) is not None and due <= now:
+                _, task_id = heapq.heappop(self._heap)
+                del self._due[task_id]
+                batch.append(task_id)
+            if not batch:
+                return sent
+            try:
+                sent += self._send_batch(db, batch, now)
+            except Exception:
+                db.rollback()
+                logger.exception(f"Sending {len(batch)} reminders failed; retrying in {RETRY_DELAY}")
+                retry_at = now + RETRY_DELAY
+                for task_id in batch:
+                    self._due[task_id] = retry_at
+                    heapq.heappush(self._heap, (retry_at, task_id))
+                return sent
+
+    def _send_batch(self, db: Session, task_ids: List[UUID], now: datetime) -> int:
+        rows = db.execute(
+            select(Task.id, Task.title, Task.due_date, Task.column_id, BoardColumn.board_id)
+            .join(BoardColumn, Task.column_id == BoardColumn.id)
+            .outerjoin(TaskReminder, and_(TaskReminder.task_id == Task.id, TaskReminder.due_date == Task.due_date))
+            .where(
+                Task.id.in_(task_ids),
+                Task.is_deleted == False,
+                BoardColumn.is_deleted == False,
+                Task.due_date <= now,
+                TaskReminder.task_id.is_(None), # Not already reminded for this due date
+            )
+        ).all()
+        if not rows:
+            db.rollback()
+            return 0
+        assignees: Dict[UUID, List[str]] = {}
+        for task_id, user_id in db.execute(
+            select(task_assignees_table.c.task_id, task_assignees_table.c.user_id)
+            .where(
+                task_assignees_table.c.board_id.in_({row.board_id for row in rows}), # Partition key, leads the primary key
+                task_assignees_table.c.task_id.in_([row.id for row in rows]),
+            )
+        ):
+            assignees.setdefault(task_id, []).append(str(user_id))
+
+        stmt = insert(TaskReminder).values([{"task_id": row.id, "due_date": row.due_date} for row in rows])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[TaskReminder.task_id],
+            set_={"due_date": stmt.excluded.due_date, "sent_at": func.now()},
+        ))
+        self.sink.send([
+            {
+                "task_id": str(row.id),
+                "board_id": str(row.board_id),
+                "column_id": str(row.column_id),
+                "title": row.title,
+                "due_date": row.due_date.isoformat(),
+                "assignee_ids": assignees.get(row.id, []),
+            }
+            for row in rows
+        ])
+        db.commit()
+        self.sent += len(rows)
+        return len(rows)
+
+    def run(self, listen_conn, refresh: Optional[timedelta] = None):
+        """Main loop. ``listen_conn`` is an autocommit psycopg connection (not pooled)."""
+        refresh = refresh or self.horizon / 4
+        hints: List[str] = []
+        listen_conn.add_notify_handler(lambda notify: hints.append(notify.payload))
+        listen_conn.execute(f"LISTEN {CHANNEL}")
+
+        # LISTEN first, then load, so no change between the two is missed
+        with self.session_factory() as db:
+            self.load_window(db, datetime.now(timezone.utc))
+            db.commit()
+        next_refresh = time.monotonic() + refresh.total_seconds()
+        logger.info(f"Reminder scheduler holding {len(self._due)} tasks due until {self.loaded_until.isoformat()}")
+
+        while True:
+            now = datetime.now(timezone.utc)
+            due = self.next_due()
+            timeout = next_refresh - time.monotonic()
+            if due is not None:
+                timeout = min(timeout, (due - now).total_seconds())
+            if select_module.select([listen_conn.fileno()], [], [], max(0.0, timeout))[0]:
+                listen_conn.execute("SELECT 1") # Delivers pending notifications to the handler
+
+            with self.session_factory() as db:
+                now = datetime.now(timezone.utc)
+                if time.monotonic() >= next_refresh:
+                    self.load_window(db, now)
+                    next_refresh = time.monotonic() + refresh.total_seconds()
+                if hints:
+                    self.apply_hints(db, hints)
+                    hints.clear()
+                db.rollback() # End the read transaction before possibly waiting on the sink
+                self.send_due(db, now)
+
+    def stats(self) -> dict:
+        return {
+            "scheduled": len(self._due),
+            "heap_entries": len(self._heap),
+            "loaded_until": self.loaded_until,
+            "sent": self.sent,
+        }
+
+
+if __name__ == "__main__":
+    import psycopg
+
+    from ..db.database import SessionLocal, get_engine
+    from ..models import user # Registers User, which Task.assignees refers to by name
+
+    parser = argparse.ArgumentParser(description="Send due-date reminders as tasks come due.")
+    parser.add_argument("--sink", choices=["log", "webhook"], default="log")
+    parser.add_argument("--webhook-url", default="http://localhost:9100/reminders")
+    parser.add_argument("--horizon", type=float, default=DEFAULT_HORIZON.total_seconds(), help="Seconds of upcoming due dates held in memory")
+    parser.add_argument("--catch-up", type=float, default=DEFAULT_CATCH_UP.total_seconds(), help="Seconds back to send missed reminders on start")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    sink = WebhookSink(args.webhook_url) if args.sink == "webhook" else LogSink()
+    scheduler = ReminderScheduler(
+        SessionLocal, sink, timedelta(seconds=args.horizon), timedelta(seconds=args.catch_up)
+    )
+    dsn = get_engine().url.set(drivername="postgresql").render_as_string(hide_password=False)
+    with psycopg.connect(dsn, autocommit=True) as listen_conn:
+        try:
+            scheduler.run(listen_conn)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,189 @@
+"""Subtask hierarchy: a materialized path per task and rolled-up progress counters.
+
+A subtask is a ``tasks`` row with a ``parent_id`` and no column, on its card's
+board (so in the card's partition). ``path`` lists the ids of its ancestors,
+root card first, each followed by "/"; a card's path is ''. A card's whole
+tree is therefore one prefix scan of its partition, and its ancestors are
+read off the path without a query.
+
+Every task carries ``subtasks_total`` / ``subtasks_done`` over its live
+descendants. A subtask change adds its +/- deltas to all of its ancestors in
+one UPDATE, in the same transaction, so the board shows a card's progress
+from two integers on the card row instead of loading its tree. Changes lock
+the card row first (``lock_card``), which serializes them per card.
+
+``python -m app.services.subtasks`` recomputes the counters from the trees.
+"""
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import Session
+
+from ..models.board import Board
+from ..models.task import Task
+
+MAX_DEPTH = 5 # Levels of subtasks below a card
+
+
+def child_path(task: Task) -> str:
+    """Path of ``task``'s children; also the prefix of every path in its subtree."""
+    return f"{task.path}{task.id}/"
+
+
+def ancestor_ids(path: str) -> List[UUID]:
+    return [UUID(task_id) for task_id in path.split("/") if task_id]
+
+
+def depth(path: str) -> int:
+    """Level of a task with this path: 0 for a card, 1 for its subtasks, ..."""
+    return path.count("/")
+
+
+def lock_card(db: Session, card: Task) -> bool:
+    """Lock the card row for the transaction; False if it was deleted or moved meanwhile."""
+    return db.execute(
+        select(Task.id)
+        .where(Task.board_id == card.board_id, Task.id == card.id, Task.is_deleted == False)
+        .with_for_update()
+    ).first() is not None
+
+
+def _in_subtree(board_id, prefix: str):
+    # The pattern is bound as a literal prefix (ids contain no LIKE wildcards), and the
+    # parent_id condition matches the partial index's predicate
+    return (Task.board_id == board_id, Task.parent_id.is_not(None), Task.path.like(f"{prefix}%"))
+
+
+def load_subtask(db: Session, card: Task, subtask_id) -> Task:
+    """A live subtask in ``card``'s tree, or None."""
+    return db.query(Task).filter(
+        *_in_subtree(card.board_id, child_path(card)), Task.id == subtask_id, Task.is_deleted == False
+    ).first()
+
+
+def next_order_index(db: Session, board_id, path: str) -> int:
+    """Index after the last child (deleted or not) of the task whose children have ``path``."""
+    last = db.scalar(select(func.max(Task.order_index)).where(
+        Task.board_id == board_id, Task.parent_id.is_not(None), Task.path == path
+    ))
+    return 0 if last is None else last + 1
+
+
+def add_progress(db: Session, board_id, path: str, total: int = 0, done: int = 0):
+    """Add to the counters of every ancestor named in ``path``. Versions are not bumped:
+    the counters are derived, so they must not make concurrent edits of a card conflict."""
+    if not (total or done) or not path:
+        return
+    db.execute(
+        update(Task)
+        .where(Task.board_id == board_id, Task.id.in_(ancestor_ids(path)))
+        .values(subtasks_total=Task.subtasks_total + total, subtasks_done=Task.subtasks_done + done)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delete_subtree(db: Session, board_id, subtask: Task) -> Tuple[int, int]:
+    """Soft-delete a subtask and its live descendants; returns (deleted, of which done).
+
+    The caller subtracts these from the subtask's ancestors (``add_progress``).
+    """
+    done = db.execute(
+        update(Task)
+        .where(
+            *_in_subtree(board_id, subtask.path), # The parent's tree, through the index
+            (Task.id == subtask.id) | Task.path.like(f"{child_path(subtask)}%"),
+            Task.is_deleted == False,
+        )
+        .values(is_deleted=True, updated_at=func.now(), version=Task.version + 1)
+        .returning(Task.is_done)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    return len(done), sum(done)
+
+
+def subtree(db: Session, card: Task, fields: List[str]) -> List[Dict]:
+    """The card's live subtasks as nested dicts of ``fields`` plus "subtasks", in one query."""
+    rows = db.execute(
+        select(Task.id, Task.parent_id, *(getattr(Task, name) for name in fields if name not in ("id", "parent_id")))
+        .where(*_in_subtree(card.board_id, child_path(card)), Task.is_deleted == False)
+        # Siblings share a path, so each parent's children come out in order_index order
+        .order_by(Task.path, Task.order_index)
+    )
+    children = defaultdict(list)
+    nodes = []
+    for row in rows:
+        node = {**row._asdict(), "subtasks": []}
+        children[node["parent_id"]].append(node)
+        nodes.append(node)
+    for node in nodes:
+        node["subtasks"] = children.get(node["id"], [])
+    return children.get(card.id, [])
+
+
+# Counts each live subtask once for every ancestor in its path
+_REBUILD_PROGRESS = text("""
+    WITH counts AS (
+        SELECT ancestor.id::uuid AS id, count(*) AS total, count(*) FILTER (WHERE s.is_done) AS done
+        FROM tasks s, unnest(string_to_array(rtrim(s.path, '/'), '/')) AS ancestor(id)
+        WHERE s.board_id = :board_id AND s.parent_id IS NOT NULL AND NOT s.is_deleted
+        GROUP BY ancestor.id
+    )
+    UPDATE tasks t
+    SET subtasks_total = coalesce(c.total, 0), subtasks_done = coalesce(c.done, 0)
+    FROM tasks t0 LEFT JOIN counts c ON c.id = t0.id
+    WHERE t.board_id = :board_id AND t0.board_id = :board_id AND t0.id = t.id AND NOT t.is_deleted
+      AND (t.subtasks_total, t.subtasks_done) IS DISTINCT FROM (coalesce(c.total, 0)::int, coalesce(c.done, 0)::int)
+""")
+
+
+def rebuild_progress(db: Session, board_id) -> int:
+    """Recompute the counters of a board's live tasks from its trees; returns tasks corrected. Does not commit.
+
+    Locks the board's cards first, so no subtask change is in flight while it counts.
+    """
+    db.execute(
+        select(Task.id).where(Task.board_id == board_id, Task.parent_id.is_(None)).with_for_update()
+    ).all()
+    return db.execute(_REBUILD_PROGRESS, {"board_id": board_id}).rowcount
+
+
+def reconcile_all(db: Session, batch_size: int = 100) -> Tuple[int, int]:
+    """Rebuild every board's counters, committing per board. Returns (boards, tasks corrected)."""
+    processed = corrected = 0
+    last_id = None
+    while True:
+        query = select(Board.id).order_by(Board.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(Board.id > last_id)
+        board_ids = db.execute(query).scalars().all()
+        if not board_ids:
+            return processed, corrected
+        for board_id in board_ids:
+            corrected += rebuild_progress(db, board_id)
+            db.commit() # Releases the board's card locks
+        processed += len(board_ids)
+        last_id = board_ids[-1]
+
+
+if __name__ == "__main__":
+    from ..db.database import SessionLocal
+    from ..models import user # Registers User, which Task.assignees refers to by name
+
+    parser = argparse.ArgumentParser(description="Recompute subtask progress counters from the task trees.")
+    parser.add_argument("--board", help="Only rebuild this board id")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.board:
+            corrected = rebuild_progress(db, args.board)
+            db.commit()
+            print(f"Rebuilt subtask progress for board {args.board}: {corrected} tasks corrected")
+        else:
+            boards, corrected = reconcile_all(db)
+            print(f"Rebuilt subtask progress for {boards} boards: {corrected} tasks corrected")
+    finally:
+        db.close()
@@ -0,0 +1,266 @@
+"""Task transition log and the cumulative-flow / cycle-time rollups built from it.
+
+Endpoints append to ``task_transitions`` in the same transaction as the
+mutation, so the log cannot disagree with the tasks table. A rollup pass
+then folds new events into ``column_flow_daily`` and ``board_flow_daily``
+(per UTC day), and flow charts read only those small tables.
+
+The rollup consumes events by id past a watermark, but only events older
+than ``lag``: identity values are assigned at insert time and a transaction
+that has not committed yet may still hold a lower id than a committed one.
+Run it periodically with ``python -m app.services.task_flow --loop``.
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import func, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from ..models.board import Board, BoardColumn
+from ..models.task import Task
+from ..models.task_flow import BoardFlowDaily, ColumnFlowDaily, RollupWatermark, TaskTransition
+
+CREATED = "created"
+MOVED = "moved"
+DELETED = "deleted"
+
+FLOW_ROLLUP = "task_flow"
+DEFAULT_LAG = timedelta(minutes=1)
+ROLLUP_BATCH_SIZE = 10000
+
+
+def record_transition(db: Session, task_id, board_id, kind: str, from_column_id=None, to_column_id=None):
+    """Append one transition. Same-column reorders are not transitions; don't record them."""
+    db.execute(insert(TaskTransition.__table__).values(
+        task_id=task_id,
+        board_id=board_id,
+        kind=kind,
+        from_column_id=from_column_id,
+        to_column_id=to_column_id,
+    ))
+
+
+def record_deleted(db: Session, board_id, rows: Iterable):
+    """Append "deleted" transitions for (task_id, column_id) rows in one statement."""
+    rows = [
+        {"task_id": task_id, "board_id": board_id, "kind": DELETED, "from_column_id": column_id}
+        for task_id, column_id in rows
+    ]
+    if rows:
+        db.execute(insert(TaskTransition.__table__), rows)
+
+
+def record_moved(db: Session, board_id, rows: Iterable):
+    """Append "moved" transitions for (task_id, from_column_id, to_column_id) rows in one statement."""
+    rows = [
+        {"task_id": task_id, "board_id": board_id, "kind": MOVED, "from_column_id": from_column_id,
+         "to_column_id": to_column_id}
+        for task_id, from_column_id, to_column_id in rows
+    ]
+    if rows:
+        db.execute(insert(TaskTransition.__table__), rows)
+
+
+def record_board_created(db: Session, board_id):
+    """Append "created" transitions for every live task of a newly cloned/imported board."""
+    db.execute(insert(TaskTransition.__table__).from_select(
+        ["task_id", "board_id", "kind", "to_column_id"],
+        select(Task.id, BoardColumn.board_id, literal(CREATED), Task.column_id)
+        .join(BoardColumn, Task.column_id == BoardColumn.id)
+        .where(
+            Task.board_id == board_id,
+            BoardColumn.board_id == board_id,
+            BoardColumn.is_deleted == False,
+            Task.is_deleted == False,
+        )
+    ))
+
+
+# Entries and exits per (board, column, day). An exit's dwell time runs from the task's
+# previous transition, which is the one that put it into the column it is leaving.
+_COLUMN_ROLLUP_SQL = text("""
+    WITH ev AS (
+        SELECT e.from_column_id, e.to_column_id,
+               (e.occurred_at AT TIME ZONE 'UTC')::date AS day,
+               extract(epoch FROM e.occurred_at - prev.occurred_at) AS dwell
+        FROM task_transitions e
+        LEFT JOIN LATERAL (
+            SELECT p.occurred_at FROM task_transitions p
+            WHERE p.task_id = e.task_id AND p.id < e.id
+            ORDER BY p.id DESC LIMIT 1
+        ) prev ON e.from_column_id IS NOT NULL
+        WHERE e.id > :low AND e.id <= :high
+    ), flows AS (
+        SELECT c.board_id, ev.to_column_id AS column_id, ev.day,
+               1 AS entered, 0 AS exited, 0.0 AS dwell, 0 AS dwell_count
+        FROM ev JOIN board_columns c ON c.id = ev.to_column_id
+        UNION ALL
+        SELECT c.board_id, ev.from_column_id, ev.day,
+               0, 1, coalesce(ev.dwell, 0), (ev.dwell IS NOT NULL)::int
+        FROM ev JOIN board_columns c ON c.id = ev.from_column_id
+    )
+    INSERT INTO column_flow_daily (board_id, column_id, day, entered, exited, dwell_seconds, dwell_count)
+    SELECT board_id, column_id, day, sum(entered), sum(exited), sum(dwell), sum(dwell_count)
+    FROM flows GROUP BY board_id, column_id, day
+    ON CONFLICT (board_id, column_id, day) DO UPDATE SET
+        entered = column_flow_daily.entered + EXCLUDED.entered,
+        exited = column_flow_daily.exited + EXCLUDED.exited,
+        dwell_seconds = column_flow_daily.dwell_seconds + EXCLUDED.dwell_seconds,
+        dwell_count = column_flow_daily.dwell_count + EXCLUDED.dwell_count
+""")
+
+_BOARD_ROLLUP_SQL = text("""
+    INSERT INTO board_flow_daily (board_id, day, created, moved, deleted, lead_seconds)
+    SELECT e.board_id, (e.occurred_at AT TIME ZONE 'UTC')::date,
+           count(*) FILTER (WHERE e.kind = 'created'),
+           count(*) FILTER (WHERE e.kind = 'moved'),
+           count(*) FILTER (WHERE e.kind = 'deleted'),
+           coalesce(sum(extract(epoch FROM e.occurred_at - t.created_at)) FILTER (WHERE e.kind = 'deleted'), 0)
+    FROM task_transitions e JOIN tasks t ON t.id = e.task_id
+    WHERE e.id > :low AND e.id <= :high
+    GROUP BY 1, 2
+    ON CONFLICT (board_id, day) DO UPDATE SET
+        created = board_flow_daily.created + EXCLUDED.created,
+        moved = board_flow_daily.moved + EXCLUDED.moved,
+        deleted = board_flow_daily.deleted + EXCLUDED.deleted,
+        lead_seconds = board_flow_daily.lead_seconds + EXCLUDED.lead_seconds
+""")
+
+
+def _rollup_batch(db: Session, lag: timedelta, batch_size: int) -> int:
+    # The row lock serialises concurrent rollup runs; the loser waits, then sees the new watermark
+    watermark = db.execute(
+        select(RollupWatermark).where(RollupWatermark.name == FLOW_ROLLUP).with_for_update()
+    ).scalar_one_or_none()
+    if watermark is None:
+        watermark = RollupWatermark(name=FLOW_ROLLUP, last_event_id=0)
+        db.add(watermark)
+        db.flush()
+
+    batch = (
+        select(TaskTransition.id, TaskTransition.occurred_at)
+        .where(TaskTransition.id > watermark.last_event_id, TaskTransition.occurred_at < func.now() - lag)
+        .order_by(TaskTransition.id)
+        .limit(batch_size)
+        .subquery()
+    )
+    high, high_at, count = db.execute(select(func.max(batch.c.id), func.max(batch.c.occurred_at), func.count())).one()
+    if not count:
+        return 0
+
+    params = {"low": watermark.last_event_id, "high": high}
+    db.execute(_COLUMN_ROLLUP_SQL, params)
+    db.execute(_BOARD_ROLLUP_SQL, params)
+    watermark.last_event_id = high
+    watermark.last_event_at = high_at
+    return count
+
+
+def run_rollup(db: Session, lag: timedelta = DEFAULT_LAG, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+    """Fold every settled event past the watermark into the rollups, one commit per batch."""
+    processed = 0
+    while True:
+        try:
+            count = _rollup_batch(db, lag, batch_size)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if count == 0:
+            return processed
+        processed += count
+
+
+def _hours(seconds: float, count: int) -> Optional[float]:
+    return round(seconds / count / 3600, 2) if count else None
+
+
+def read_board_flow(db: Session, board: Board, start: date, end: date) -> dict:
+    """Cumulative flow and cycle/lead times for [start, end], read from the rollups only."""
+    watermark = db.get(RollupWatermark, FLOW_ROLLUP)
+
+    board_days = {
+        row.day: row for row in db.execute(
+            select(BoardFlowDaily).where(
+                BoardFlowDaily.board_id == board.id, BoardFlowDaily.day.between(start, end)
+            )
+        ).scalars()
+    }
+
+    columns = db.execute(
+        select(BoardColumn.id, BoardColumn.name)
+        .where(BoardColumn.board_id == board.id, BoardColumn.is_deleted == False)
+        .order_by(BoardColumn.order_index)
+    ).all()
+    # Work in progress on `start` is everything that entered minus everything that left before it
+    baseline = dict(db.execute(
+        select(ColumnFlowDaily.column_id, func.sum(ColumnFlowDaily.entered - ColumnFlowDaily.exited))
+        .where(ColumnFlowDaily.board_id == board.id, ColumnFlowDaily.day < start)
+        .group_by(ColumnFlowDaily.column_id)
+    ).all())
+    column_days = {}
+    for row in db.execute(
+        select(ColumnFlowDaily).where(ColumnFlowDaily.board_id == board.id, ColumnFlowDaily.day.between(start, end))
+    ).scalars():
+        column_days[(row.column_id, row.day)] = row
+
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    column_flows = []
+    for column_id, name in columns:
+        wip = baseline.get(column_id) or 0
+        points = []
+        for day in days:
+            row = column_days.get((column_id, day))
+            if row is not None:
+                wip += row.entered - row.exited
+            points.append({
+                "day": day,
+                "entered": row.entered if row else 0,
+                "exited": row.exited if row else 0,
+                "wip": wip,
+                "avg_dwell_hours": _hours(row.dwell_seconds, row.dwell_count) if row else None,
+            })
+        column_flows.append({"column_id": column_id, "name": name, "points": points})
+
+    return {
+        "board_id": board.id,
+        "start": start,
+        "end": end,
+        "as_of": watermark.last_event_at if watermark else None,
+        "days": [
+            {
+                "day": day,
+                "created": board_days[day].created if day in board_days else 0,
+                "moved": board_days[day].moved if day in board_days else 0,
+                "deleted": board_days[day].deleted if day in board_days else 0,
+                "avg_lead_hours": _hours(board_days[day].lead_seconds, board_days[day].deleted) if day in board_days else None,
+            }
+            for day in days
+        ],
+        "columns": column_flows,
+    }
+
+
+if __name__ == "__main__":
+    from ..db.database import SessionLocal
+    from ..models import user # Registers User, which Task.assignees refers to by name
+
+    parser = argparse.ArgumentParser(description="Roll task transitions up into the daily flow tables.")
+    parser.add_argument("--lag", type=float, default=DEFAULT_LAG.total_seconds(), help="Seconds an event must settle before rollup")
+    parser.add_argument("--batch-size", type=int, default=ROLLUP_BATCH_SIZE)
+    parser.add_argument("--loop", action="store_true", help="Keep running every --interval seconds")
+    parser.add_argument("--interval", type=float, default=30)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        while True:
+            processed = run_rollup(db, timedelta(seconds=args.lag), args.batch_size)
+            print(f"{datetime.now(timezone.utc).isoformat()} rolled up {processed} transitions")
+            if not args.loop:
+                break
+            time.sleep(args.interval)
+    finally:
+        db.close()
@@ -0,0 +1,367 @@
+"""Online conversion of ``tasks`` and ``task_assignees`` to hash partitioning by board.
+
+Both tables end up ``PARTITION BY HASH (board_id)`` with the same modulus, so
+a board's tasks and their assignments live in partitions ``tasks_pNN`` and
+``task_assignees_pNN`` with the same NN and every board-scoped query prunes
+to one of each. The conversion runs next to the live app in steps:
+
+``prepare``
+    Creates the partitioned copies (``tasks_partitioned``,
+    ``task_assignees_partitioned``) with ``board_id`` filled in from
+    board_columns, and statement-level triggers on the old tables that mirror
+    every write into them (``tasks_partitioned_sync``).
+``backfill``
+    Copies the existing rows in id order, ``batch_size`` rows per transaction.
+    Rows the triggers already mirrored are skipped, so it can be stopped and
+    re-run at any point.
+``verify``
+    Compares old and new tables range by range; ``--fix`` re-syncs the tasks
+    that differ. Run it until it reports no differences.
+``swap``
+    The one step that needs a write pause: stop the app (or its writers),
+    swap, then start the version whose models know about ``board_id``. It
+    locks both tables, checks row counts, drops the triggers and the
+    ``task_id`` foreign keys of task_transitions and task_reminders, and
+    renames the partitioned tables into place. The old tables stay behind as
+    ``*_unpartitioned`` for a rollback.
+``drop-old``
+    Drops the ``*_unpartitioned`` tables once the new layout has proven itself.
+``abort``
+    Drops the partitioned copies and triggers instead of swapping.
+
+Small databases are converted in one go by the alembic migration, which runs
+the same steps back to back.
+
+Usage: ``python -m app.services.task_partitioning prepare|backfill|verify|swap|drop-old|abort``
+"""
+import argparse
+from typing import Callable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+TASKS = "tasks"
+ASSIGNEES = "task_assignees"
+SHADOW = "_partitioned"
+OLD = "_unpartitioned"
+DEFAULT_PARTITIONS = 16
+DEFAULT_BATCH_SIZE = 10_000
+_NIL = UUID(int=0)
+
+# Final name -> definition of the indexes the partitioned tables get (constraints are inline)
+TASK_INDEXES = {
+    "ix_tasks_column_id_order_index_live": "(column_id, order_index) WHERE NOT is_deleted",
+    "ix_tasks_due_date_live": "(due_date) WHERE NOT is_deleted",
+    "ix_tasks_is_deleted": "(is_deleted)",
+}
+
+
+def is_partitioned(db) -> bool:
+    return bool(db.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"
+    ), {"table": TASKS}).scalar())
+
+
+def _task_columns(db) -> List[str]:
+    """Columns of the old tasks table, in table order."""
+    return list(db.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :table ORDER BY ordinal_position"
+    ), {"table": TASKS}).scalars())
+
+
+def prepare(db, partitions: int = DEFAULT_PARTITIONS):
+    """Create the partitioned copies, their partitions and the mirroring triggers. Does not commit."""
+    if is_partitioned(db):
+        raise RuntimeError(f"{TASKS} is already partitioned")
+    columns = _task_columns(db)
+    if "board_id" in columns:
+        raise RuntimeError(f"{TASKS} already has a board_id column")
+
+    db.execute(text(f"""
+        CREATE TABLE {TASKS}{SHADOW} (
+            LIKE {TASKS} INCLUDING DEFAULTS,
+            board_id uuid NOT NULL,
+            CONSTRAINT tasks_pkey{SHADOW} PRIMARY KEY (id, board_id),
+            CONSTRAINT tasks_column_id_fkey{SHADOW} FOREIGN KEY (column_id) REFERENCES board_columns (id),
+            CONSTRAINT tasks_board_id_fkey{SHADOW} FOREIGN KEY (board_id) REFERENCES boards (id)
+        ) PARTITION BY HASH (board_id)
+    """))
+    db.execute(text(f"""
+        CREATE TABLE {ASSIGNEES}{SHADOW} (
+            task_id uuid NOT NULL,
+            board_id uuid NOT NULL,
+            user_id uuid NOT NULL,
+            CONSTRAINT task_assignees_pkey{SHADOW} PRIMARY KEY (board_id, task_id, user_id),
+            CONSTRAINT task_assignees_task_id_board_id_fkey{SHADOW} FOREIGN KEY (task_id, board_id)
+                REFERENCES {TASKS}{SHADOW} (id, board_id) ON UPDATE CASCADE ON DELETE CASCADE,
+            CONSTRAINT task_assignees_user_id_fkey{SHADOW} FOREIGN KEY (user_id) REFERENCES users (id)
+        ) PARTITION BY HASH (board_id)
+    """))
+    for remainder in range(partitions):
+        for table in (TASKS, ASSIGNEES):
+            db.execute(text(
+                f"CREATE TABLE {table}_p{remainder:02d} PARTITION OF {table}{SHADOW} "
+                f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+            ))
+    for name, definition in TASK_INDEXES.items():
+        db.execute(text(f"CREATE INDEX {name}{SHADOW} ON {TASKS}{SHADOW} {definition}"))
+
+    # Re-derives the copies of the given tasks (and their assignments) from the old tables.
+    # The version check keeps a concurrent backfill from overwriting a newer mirrored row
+    listed = ", ".join(columns)
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != "id")
+    db.execute(text(f"""
+        CREATE FUNCTION {TASKS}{SHADOW}_sync(ids uuid[]) RETURNS void LANGUAGE sql AS $$
+            DELETE FROM {TASKS}{SHADOW} s WHERE s.id = ANY(ids) AND NOT EXISTS (
+                SELECT 1 FROM {TASKS} t JOIN board_columns c ON c.id = t.column_id
+                WHERE t.id = s.id AND c.board_id = s.board_id
+            );
+            INSERT INTO {TASKS}{SHADOW} ({listed}, board_id)
+            SELECT {", ".join(f"t.{column}" for column in columns)}, c.board_id
+            FROM {TASKS} t JOIN board_columns c ON c.id = t.column_id WHERE t.id = ANY(ids)
+            ON CONFLICT (id, board_id) DO UPDATE SET {updates}
+            WHERE {TASKS}{SHADOW}.version <= EXCLUDED.version;
+            DELETE FROM {ASSIGNEES}{SHADOW} s USING {TASKS}{SHADOW} t
+            WHERE t.id = ANY(ids) AND s.board_id = t.board_id AND s.task_id = t.id AND NOT EXISTS (
+                SELECT 1 FROM {ASSIGNEES} a WHERE a.task_id = s.task_id AND a.user_id = s.user_id
+            );
+            INSERT INTO {ASSIGNEES}{SHADOW} (task_id, board_id, user_id)
+            SELECT a.task_id, s.board_id, a.user_id
+            FROM {ASSIGNEES} a JOIN {TASKS}{SHADOW} s ON s.id = a.task_id WHERE a.task_id = ANY(ids)
+            ON CONFLICT DO NOTHING;
+        $$
+    """))
+    # Statement-level, so an order_index shift over a long column is mirrored in one call
+    for table, key in ((TASKS, "id"), (ASSIGNEES, "task_id")):
+        db.execute(text(f"""
+            CREATE FUNCTION {table}{SHADOW}_mirror() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    PERFORM {TASKS}{SHADOW}_sync(ARRAY(SELECT DISTINCT {key} FROM old_rows));
+                ELSE
+                    PERFORM {TASKS}{SHADOW}_sync(ARRAY(SELECT DISTINCT {key} FROM new_rows));
+                END IF;
+                RETURN NULL;
+            END $$
+        """))
+        for event, referencing in (
+            ("INSERT", "NEW TABLE AS new_rows"),
+            ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+            ("DELETE", "OLD TABLE AS old_rows"),
+        ):
+            if table == ASSIGNEES and event == "UPDATE":
+                continue # Assignments are only ever inserted and deleted
+            db.execute(text(
+                f"CREATE TRIGGER {table}{SHADOW}_mirror_{event.lower()} AFTER {event} ON {table} "
+                f"REFERENCING {referencing} FOR EACH STATEMENT EXECUTE FUNCTION {table}{SHADOW}_mirror()"
+            ))
+
+
+def _next_bound(db, after: UUID, batch_size: int) -> Optional[UUID]:
+    """Last task id of the next batch after ``after``, or None past the end."""
+    return db.execute(text(
+        # No max() for uuid: the last id of the batch, via its reverse order
+        f"SELECT id FROM (SELECT id FROM {TASKS} WHERE id > :after ORDER BY id LIMIT :limit) batch "
+        "ORDER BY id DESC LIMIT 1"
+    ), {"after": after, "limit": batch_size}).scalar()
+
+
+def backfill(db, batch_size: int = DEFAULT_BATCH_SIZE, commit: bool = False,
+             progress: Optional[Callable] = None) -> int:
+    """Copy every task (then its assignments) not yet in the partitioned tables; returns tasks copied.
+
+    With ``commit`` each batch is its own transaction, so a long backfill holds
+    no long transaction, and a batch that raced with a task moving to another
+    board (its copy changes partition under the assignment insert's foreign
+    key) is retried. Without it everything happens in the caller's transaction.
+    """
+    columns = _task_columns(db)
+    copied, after, attempts = 0, _NIL, 0
+    while True:
+        upto = _next_bound(db, after, batch_size)
+        if upto is None:
+            return copied
+        try:
+            batch = _backfill_batch(db, columns, {"after": after, "upto": upto})
+            if commit:
+                db.commit()
+        except IntegrityError:
+            if not commit or attempts >= 3:
+                raise
+            db.rollback()
+            attempts += 1
+            continue
+        copied, after, attempts = copied + batch, upto, 0
+        if progress:
+            progress(copied, upto)
+
+
+def _backfill_batch(db, columns: List[str], bounds: dict) -> int:
+    # NOT EXISTS rather than just ON CONFLICT: a row the triggers moved to another board
+    # since this snapshot must not come back under its old board
+    copied = db.execute(text(f"""
+        INSERT INTO {TASKS}{SHADOW} ({", ".join(columns)}, board_id)
+        SELECT {", ".join(f"t.{column}" for column in columns)}, c.board_id
+        FROM {TASKS} t JOIN board_columns c ON c.id = t.column_id
+        WHERE t.id > :after AND t.id <= :upto
+          AND NOT EXISTS (SELECT 1 FROM {TASKS}{SHADOW} s WHERE s.id = t.id)
+        ON CONFLICT DO NOTHING
+    """), bounds).rowcount
+    db.execute(text(f"""
+        INSERT INTO {ASSIGNEES}{SHADOW} (task_id, board_id, user_id)
+        SELECT a.task_id, s.board_id, a.user_id
+        FROM {ASSIGNEES} a JOIN {TASKS}{SHADOW} s ON s.id = a.task_id
+        WHERE a.task_id > :after AND a.task_id <= :upto
+        ON CONFLICT DO NOTHING
+    """), bounds)
+    return copied
+
+
+def verify(db, batch_size: int = DEFAULT_BATCH_SIZE, fix: bool = False, commit: bool = False) -> List[UUID]:
+    """Ids of tasks whose rows or assignments differ between old and new tables.
+
+    With ``fix`` they are re-synced as the triggers would. Writes in flight can
+    show up as transient differences, so re-run until the result is empty.
+    With ``commit`` each range is its own transaction.
+    """
+    columns = _task_columns(db)
+    old_tasks = f"""
+        SELECT {", ".join(f"t.{column}" for column in columns)}, c.board_id
+        FROM {TASKS} t JOIN board_columns c ON c.id = t.column_id WHERE {{t_range}}"""
+    new_tasks = f"SELECT {', '.join(columns)}, board_id FROM {TASKS}{SHADOW} WHERE {{range}}"
+    old_assignees = f"""
+        SELECT a.task_id, c.board_id, a.user_id FROM {ASSIGNEES} a
+        JOIN {TASKS} t ON t.id = a.task_id JOIN board_columns c ON c.id = t.column_id WHERE {{a_range}}"""
+    # Through the task copies, whose primary key leads with the id (the assignments' leads with the board)
+    new_assignees = f"""
+        SELECT s.task_id, s.board_id, s.user_id FROM {ASSIGNEES}{SHADOW} s
+        JOIN {TASKS}{SHADOW} n ON n.id = s.task_id AND n.board_id = s.board_id WHERE {{n_range}}"""
+    diff = f"""
+        SELECT id FROM (
+            ({old_tasks} EXCEPT {new_tasks.replace("{range}", "{id_range}")})
+            UNION ALL
+            ({new_tasks.replace("{range}", "{id_range}")} EXCEPT {old_tasks})
+        ) task_diff
+        UNION
+        SELECT task_id FROM (
+            ({old_assignees} EXCEPT {new_assignees})
+            UNION ALL
+            ({new_assignees} EXCEPT {old_assignees})
+        ) assignee_diff"""
+
+    differing: List[UUID] = []
+    after = _NIL
+    while True:
+        upto = _next_bound(db, after, batch_size)
+        # The last range is open-ended, so copies of rows missing from the old table show up too
+        ranges = {
+            f"{key}_range": f"{column} > :after" + (f" AND {column} <= :upto" if upto is not None else "")
+            for key, column in (("t", "t.id"), ("a", "a.task_id"), ("id", "id"), ("n", "n.id"))
+        }
+        ids = db.execute(text(diff.format(**ranges)), {"after": after, "upto": upto}).scalars().all()
+        if ids:
+            differing.extend(ids)
+            if fix:
+                db.execute(text(f"SELECT {TASKS}{SHADOW}_sync(:ids)"), {"ids": list(ids)})
+        if commit:
+            db.commit()
+        if upto is None:
+            return differing
+        after = upto
+
+
+def _rename_objects(db, table: str, rename: Callable[[str], str]):
+    """Rename a table's constraints, then its remaining indexes (a constraint renames its own index)."""
+    for (name,) in db.execute(text(
+        # conparentid = 0 skips the per-partition copies Postgres adds for foreign keys to partitioned tables
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:table) AND conparentid = 0 ORDER BY conname"
+    ), {"table": table}).all():
+        db.execute(text(f'ALTER TABLE {table} RENAME CONSTRAINT "{name}" TO "{rename(name)}"'))
+    for (name,) in db.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE i.indrelid = to_regclass(:table) "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid) ORDER BY c.relname"
+    ), {"table": table}).all():
+        db.execute(text(f'ALTER INDEX "{name}" RENAME TO "{rename(name)}"'))
+
+
+def swap(db, lock_timeout: str = "10s"):
+    """Move the partitioned tables into place. Run with writers stopped; does not commit."""
+    db.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}'"))
+    db.execute(text(f"LOCK TABLE {TASKS}, {ASSIGNEES} IN ACCESS EXCLUSIVE MODE"))
+    for table in (TASKS, ASSIGNEES):
+        old, new = (db.execute(text(f"SELECT count(*) FROM {name}")).scalar() for name in (table, table + SHADOW))
+        if old != new:
+            raise RuntimeError(f"{table} has {old} rows but {table}{SHADOW} has {new}; run verify --fix first")
+
+    for table in (TASKS, ASSIGNEES):
+        for event in ("insert", "update", "delete"):
+            db.execute(text(f"DROP TRIGGER IF EXISTS {table}{SHADOW}_mirror_{event} ON {table}"))
+        db.execute(text(f"DROP FUNCTION {table}{SHADOW}_mirror()"))
+    db.execute(text(f"DROP FUNCTION {TASKS}{SHADOW}_sync(uuid[])"))
+    # Referencing the old table by id alone, which the partitioned one cannot offer
+    db.execute(text("ALTER TABLE task_transitions DROP CONSTRAINT IF EXISTS task_transitions_task_id_fkey"))
+    db.execute(text("ALTER TABLE task_reminders DROP CONSTRAINT IF EXISTS task_reminders_task_id_fkey"))
+
+    for table in (TASKS, ASSIGNEES):
+        _rename_objects(db, table, lambda name: name + OLD)
+        db.execute(text(f"ALTER TABLE {table} RENAME TO {table}{OLD}"))
+    for table in (TASKS, ASSIGNEES):
+        _rename_objects(db, table + SHADOW, lambda name: name.removesuffix(SHADOW))
+        db.execute(text(f"ALTER TABLE {table}{SHADOW} RENAME TO {table}"))
+
+
+def abort(db):
+    """Undo ``prepare`` (and any backfill) before a swap. Does not commit."""
+    for table in (TASKS, ASSIGNEES):
+        for event in ("insert", "update", "delete"):
+            db.execute(text(f"DROP TRIGGER IF EXISTS {table}{SHADOW}_mirror_{event} ON {table}"))
+        db.execute(text(f"DROP FUNCTION IF EXISTS {table}{SHADOW}_mirror()"))
+    db.execute(text(f"DROP FUNCTION IF EXISTS {TASKS}{SHADOW}_sync(uuid[])"))
+    db.execute(text(f"DROP TABLE IF EXISTS {ASSIGNEES}{SHADOW}, {TASKS}{SHADOW}"))
+
+
+def drop_old(db):
+    """Drop the tables ``swap`` left behind. Does not commit."""
+    db.execute(text(f"DROP TABLE IF EXISTS {ASSIGNEES}{OLD}, {TASKS}{OLD}"))
+
+
+if __name__ == "__main__":
+    from ..db.database import get_engine
+
+    parser = argparse.ArgumentParser(description="Convert tasks/task_assignees to hash partitioning by board, online.")
+    parser.add_argument("step", choices=["prepare", "backfill", "verify", "swap", "drop-old", "abort"])
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS, help="prepare: number of hash partitions")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--fix", action="store_true", help="verify: re-sync the tasks that differ")
+    args = parser.parse_args()
+
+    with get_engine().connect() as connection:
+        if args.step == "prepare":
+            prepare(connection, args.partitions)
+        elif args.step == "backfill":
+            copied = backfill(
+                connection, args.batch_size, commit=True,
+                progress=lambda copied, upto: print(f"copied {copied} tasks (up to id {upto})", flush=True),
+            )
+            print(f"Backfill done: {copied} tasks copied")
+        elif args.step == "verify":
+            differing = verify(connection, args.batch_size, fix=args.fix, commit=True)
+            print(f"{len(differing)} tasks differ" + (" (re-synced)" if args.fix and differing else ""))
+            for task_id in differing[:20]:
+                print(" ", task_id)
+        elif args.step == "swap":
+            swap(connection)
+            print(f"Swapped: {TASKS} and {ASSIGNEES} are partitioned; old tables kept as *{OLD}")
+        elif args.step == "abort":
+            abort(connection)
+        else:
+            drop_old(connection)
+        connection.commit()
+        if args.step in ("backfill", "swap"):
+            # Fresh planner statistics for the partitioned tables under their current names
+            suffix = SHADOW if args.step == "backfill" else ""
+            connection.execute(text(f"ANALYZE {TASKS}{suffix}, {ASSIGNEES}{suffix}"))
+            connection.commit()
@@ -0,0 +1,280 @@
+"""Crash test of the in-memory board engine: kill -9 under load, then check nothing acknowledged was lost.
+
+Each round starts the API with the board engine on (``BOARD_ENGINE_PROMOTE_AFTER=1``
+and a long ``--flush-interval``, so most changes are only in the write-ahead log
+when the process dies), makes ``--boards`` boards resident, and runs one client
+per board doing task moves and title edits back to back. After a random
+``--min-run``..``--max-run`` seconds the server is killed with SIGKILL.
+
+The next start recovers the log. Every board must then be exactly the state
+after all of its acknowledged changes, or after those plus the one change that
+was in flight when the server died; positions must be gap-free; and the board's
+``task.moved``/``task.updated`` activity must count the same changes. The last
+round ends with a clean shutdown, after which no board may still be held.
+
+Run from backend/ with the database configured (DATABASE_URL, SECRET_KEY):
+    python bench/board_engine_recovery.py --email user@example.com --password secret --rounds 5
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Model:
+    """Expected state of one board: task ids per column in order, and titles."""
+
+    def __init__(self, board):
+        columns = sorted(board["columns"], key=lambda column: column["order_index"])
+        self.column_ids = [column["id"] for column in columns]
+        self.order = {column["id"]: [task["id"] for task in column["tasks"]] for column in columns}
+        self.titles = {task["id"]: task["title"] for column in columns for task in column["tasks"]}
+        self.changes = 0 # Acknowledged changes since the board was created
+
+    def copy(self):
+        other = Model.__new__(Model)
+        other.column_ids = self.column_ids
+        other.order = {column_id: list(task_ids) for column_id, task_ids in self.order.items()}
+        other.titles = dict(self.titles)
+        other.changes = self.changes
+        return other
+
+    def move(self, task_id, column_id, index):
+        for task_ids in self.order.values():
+            if task_id in task_ids:
+                task_ids.remove(task_id)
+        destination = self.order[column_id]
+        destination.insert(max(0, min(index, len(destination))), task_id)
+        self.changes += 1
+
+    def rename(self, task_id, title):
+        self.titles[task_id] = title
+        self.changes += 1
+
+    def state(self):
+        return {column_id: [(task_id, self.titles[task_id]) for task_id in task_ids]
+                for column_id, task_ids in self.order.items()}
+
+
+def board_state(board):
+    return {
+        column["id"]: [(task["id"], task["title"]) for task in sorted(column["tasks"], key=lambda task: task["order_index"])]
+        for column in board["columns"]
+    }
+
+
+def gap_free(board) -> bool:
+    return all(
+        sorted(task["order_index"] for task in column["tasks"]) == list(range(len(column["tasks"])))
+        for column in board["columns"]
+    )
+
+
+class Server:
+    def __init__(self, port: int, env: dict):
+        self.port = port
+        self.env = env
+        self.process = None
+
+    def start(self, timeout: float = 60.0):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.port), "--log-level", "warning"],
+            cwd=BACKEND, env=self.env, start_new_session=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"http://127.0.0.1:{self.port}/", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if self.process.poll() is not None:
+                raise SystemExit(f"Server exited with {self.process.returncode} while starting")
+            time.sleep(0.2)
+        raise SystemExit("Server did not start")
+
+    def kill(self):
+        os.killpg(self.process.pid, signal.SIGKILL)
+        self.process.wait()
+
+    def stop(self):
+        os.killpg(self.process.pid, signal.SIGTERM)
+        self.process.wait(timeout=60)
+
+
+def count_activity(client, board_id) -> int:
+    count, cursor = 0, None
+    while True:
+        page = client.get(f"/boards/{board_id}/activity", params={"limit": 200, **({"cursor": cursor} if cursor else {})}).json()
+        count += sum(1 for item in page["items"] if item["action"] in ("task.moved", "task.updated"))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return count
+
+
+def run_client(client, board_id, model: Model, seed: int, result: dict):
+    """Change the board until a request fails (the server was killed)."""
+    rng = random.Random(seed)
+    task_ids = list(model.titles)
+    result["acknowledged"] = model
+    result["in_flight"] = None
+    while True:
+        task_id = rng.choice(task_ids)
+        candidate = model.copy()
+        if rng.random() < 0.75:
+            column_id, index = rng.choice(model.column_ids), rng.randint(0, 20)
+            candidate.move(task_id, column_id, index)
+            request = ("PUT", f"/tasks/{task_id}/move", {"column_id": column_id, "order_index": index})
+        else:
+            title = f"{model.titles[task_id].split(' #')[0]} #{candidate.changes}"
+            candidate.rename(task_id, title)
+            request = ("PUT", f"/tasks/{task_id}", {"title": title})
+        result["in_flight"] = candidate
+        try:
+            response = client.request(request[0], request[1], json=request[2])
+        except httpx.HTTPError:
+            return
+        if response.status_code != 200:
+            result["error"] = f"{response.status_code} {response.text[:200]}"
+            return
+        model = candidate
+        result["acknowledged"] = model
+        result["in_flight"] = None
+        result["changes"] = result.get("changes", 0) + 1
+
+
+def verify(client, models: dict, results: dict) -> list:
+    """Check every board against its acknowledged (or acknowledged + in-flight) state; returns failures
+    and leaves ``models`` at the state found."""
+    failures = []
+    for board_id, model in models.items():
+        board = client.get(f"/boards/{board_id}", params={"stream": "true"}).json()
+        found = board_state(board)
+        acknowledged, in_flight = results[board_id]["acknowledged"], results[board_id]["in_flight"]
+        if found == acknowledged.state():
+            models[board_id] = acknowledged
+        elif in_flight is not None and found == in_flight.state():
+            models[board_id] = in_flight
+        else:
+            failures.append(f"board {board_id}: state is neither the acknowledged one nor that plus the in-flight change")
+            continue
+        if not gap_free(board):
+            failures.append(f"board {board_id}: order_index has gaps or duplicates")
+        activity = count_activity(client, board_id)
+        if activity != models[board_id].changes:
+            failures.append(f"board {board_id}: {activity} task.moved/task.updated entries for {models[board_id].changes} changes")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8100, help="Port for the API processes this starts")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--boards", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=40, help="Tasks per board, over three columns")
+    parser.add_argument("--flush-interval", type=float, default=2.0)
+    parser.add_argument("--min-run", type=float, default=1.0, help="Seconds of load before the kill, at least")
+    parser.add_argument("--max-run", type=float, default=4.0)
+    parser.add_argument("--wal-dir", help="Write-ahead log directory (default: a temporary one)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    wal_dir = args.wal_dir or tempfile.mkdtemp(prefix="board-engine-wal-")
+    env = {
+        **os.environ,
+        "BOARD_ENGINE_ENABLED": "true",
+        "BOARD_ENGINE_PROMOTE_AFTER": "1",
+        "BOARD_ENGINE_FLUSH_INTERVAL": str(args.flush_interval),
+        "BOARD_ENGINE_WAL_DIR": wal_dir,
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    server = Server(args.port, env)
+    server.start()
+    client = httpx.Client(base_url=f"http://127.0.0.1:{args.port}/api/v1", timeout=30)
+    token = client.post("/auth/token", data={"username": args.email, "password": args.password})
+    token.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {token.json()['access_token']}"
+
+    models = {}
+    for n in range(args.boards):
+        board = client.post("/boards/", json={
+            "name": f"engine recovery {int(time.time())} #{n}",
+            "columns": [{"name": name, "order_index": i} for i, name in enumerate(("To do", "Doing", "Done"))],
+        }).json()
+        for i in range(args.tasks):
+            client.post("/tasks/", json={"title": f"Task {i}", "column_id": board["columns"][i % 3]["id"]}).raise_for_status()
+        models[board["id"]] = Model(client.get(f"/boards/{board['id']}", params={"stream": "true"}).json())
+
+    rounds, failures = [], []
+    for round_number in range(args.rounds):
+        for board_id in models:
+            client.get(f"/boards/{board_id}") # Promotes the board
+        time.sleep(0.5)
+        resident = client.get("/metrics/").json()["board_engine"]["boards"]
+
+        results = {board_id: {} for board_id in models}
+        threads = [
+            threading.Thread(target=run_client, args=(
+                httpx.Client(base_url=client.base_url, headers=client.headers, timeout=30),
+                board_id, model, rng.randrange(1 << 30), results[board_id],
+            ))
+            for board_id, model in models.items()
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(rng.uniform(args.min_run, args.max_run))
+        server.kill()
+        for thread in threads:
+            thread.join()
+
+        started = time.perf_counter()
+        server.start() # Recovers the dead process's log
+        recovery_seconds = time.perf_counter() - started
+        round_failures = [f"board {board_id}: client error {result['error']}" for board_id, result in results.items() if "error" in result]
+        round_failures += verify(client, models, results)
+        rounds.append({
+            "round": round_number + 1,
+            "resident_boards": resident,
+            "acknowledged_changes": sum(result.get("changes", 0) for result in results.values()),
+            "in_flight_applied": sum(
+                1 for board_id, result in results.items()
+                if result["in_flight"] is not None and models[board_id] is result["in_flight"]
+            ),
+            "restart_seconds": round(recovery_seconds, 2),
+            "failures": round_failures,
+        })
+        failures += round_failures
+        print(json.dumps(rounds[-1]))
+
+    server.stop() # A clean shutdown flushes and releases every board
+    status = subprocess.run([sys.executable, "-m", "app.services.board_engine", "status"], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    still_held = [board_id for board_id in models if board_id in status]
+    if still_held:
+        failures.append(f"{len(still_held)} boards still held after a clean shutdown")
+    report = {"rounds": rounds, "failures": failures, "wal_dir": wal_dir, "left_in_wal_dir": sorted(os.listdir(wal_dir))}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if failures:
+        raise SystemExit(f"{len(failures)} failures")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare buffered and streamed ``GET /boards/{id}`` on one (large) board.
+
+For each mode it reports time to first byte, total time and response size,
+and, with ``--server-pid`` (a single-worker server on the same host), how far
+the server's RSS rose above its level before the request. The board cache is
+bypassed by the streamed mode; start the server with ``BOARD_CACHE_BACKEND=none``
+so the buffered mode measures a render rather than a cache hit. Streamed runs
+go first, since the allocator keeps memory the buffered render freed.
+
+Usage (from backend/):
+    python bench/board_stream.py --board <board id> --email user@example.com --password secret \\
+        --server-pid $(pgrep -f "uvicorn app.main:app") --runs 3
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+import httpx
+
+
+def read_rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+class RssSampler(threading.Thread):
+    """Polls a process's RSS until stopped and keeps the peak."""
+
+    def __init__(self, pid: int, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.baseline = read_rss_kb(pid)
+        self.peak = self.baseline
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, read_rss_kb(self.pid))
+            time.sleep(self.interval)
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        return self.peak - self.baseline
+
+
+def fetch(client: httpx.Client, url: str, stream: bool, server_pid=None) -> dict:
+    sampler = RssSampler(server_pid) if server_pid else None
+    if sampler:
+        sampler.start()
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    with client.stream("GET", url, params={"stream": str(stream).lower()}) as response:
+        response.raise_for_status()
+        for chunk in response.iter_raw():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+    result = {
+        "ttfb_ms": round(first_byte * 1000, 1),
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        "bytes": size,
+    }
+    if sampler:
+        result["rss_growth_mb"] = round(sampler.stop() / 1024, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--board", required=True)
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--server-pid", type=int, help="Sample this process's RSS during each request")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.base_url, timeout=600) as client:
+        token = client.post("/api/v1/auth/token", data={"username": args.email, "password": args.password})
+        token.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {token.json()['access_token']}"
+        url = f"/api/v1/boards/{args.board}"
+
+        report = {"board": args.board, "runs": args.runs}
+        for mode, stream in (("streamed", True), ("buffered", False)):
+            runs = [fetch(client, url, stream, args.server_pid) for _ in range(args.runs)]
+            # Freed memory is mostly kept by the allocator, so later runs understate growth: report the max
+            report[mode] = {
+                metric: round((max if metric == "rss_growth_mb" else statistics.median)(run[metric] for run in runs), 1)
+                for metric in runs[0]
+            }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""Scripted load harness for the Kanban API.
+
+Drives a weighted mix of realistic client actions (open board, drag task,
+create/edit task, login burst, board listing) against a running API and
+writes per-endpoint latency percentiles and throughput as JSON, so two runs
+(e.g. from two commits) can be compared with the ``compare`` subcommand.
+
+Usage:
+    python bench/load_test.py run --base-url http://localhost:8000 \\
+        --concurrency 32 --duration 60 --output results.json
+    python bench/load_test.py compare baseline.json candidate.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+API_PREFIX = "/api/v1"
+DEFAULT_MIX = "open_board=35,drag_task=25,create_task=10,edit_task=10,login=5,list_boards=15"
+PASSWORD = "loadtest-password"
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def parse_mix(mix_str):
+    mix = {}
+    for part in mix_str.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}'. Known: {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain"], text=True, stderr=subprocess.DEVNULL).strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+class Recorder:
+    """Collects latency samples keyed by endpoint template (e.g. ``GET /boards/{board_id}``)."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.enabled = False
+
+    def record(self, endpoint, elapsed_ms, status_code):
+        if not self.enabled:
+            return
+        self.samples[endpoint].append(elapsed_ms)
+        self.statuses[endpoint][str(status_code)] += 1
+
+    def summary(self, measured_seconds):
+        endpoints = {}
+        for endpoint in sorted(self.samples):
+            values = sorted(self.samples[endpoint])
+            statuses = dict(self.statuses[endpoint])
+            errors = sum(count for code, count in statuses.items() if not code.startswith("2"))
+            endpoints[endpoint] = {
+                "count": len(values),
+                "errors": errors,
+                "status_codes": statuses,
+                "throughput_rps": round(len(values) / measured_seconds, 3),
+                "latency_ms": {
+                    "min": round(values[0], 3),
+                    "mean": round(sum(values) / len(values), 3),
+                    "p50": round(percentile(values, 50), 3),
+                    "p95": round(percentile(values, 95), 3),
+                    "p99": round(percentile(values, 99), 3),
+                    "max": round(values[-1], 3),
+                },
+            }
+        total = sum(e["count"] for e in endpoints.values())
+        return endpoints, {
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "throughput_rps": round(total / measured_seconds, 3),
+        }
+
+
+class VirtualUser:
+    """A logged-in user together with a local model of the boards it owns."""
+
+    def __init__(self, email, token):
+        self.email = email
+        self.token = token
+        self.boards = {}  # board_id -> {column_id: [task_id, ...]}
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def random_task(self, rng):
+        board_id = rng.choice(list(self.boards))
+        columns = self.boards[board_id]
+        populated = [column_id for column_id, tasks in columns.items() if tasks]
+        if not populated:
+            return board_id, None, None
+        column_id = rng.choice(populated)
+        return board_id, column_id, rng.choice(columns[column_id])
+
+
+async def timed(client, recorder, endpoint, method, url, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError:
+        response, status = None, "transport_error"
+    recorder.record(endpoint, (time.perf_counter() - start) * 1000, status)
+    return response
+
+
+# --- Scenarios ---------------------------------------------------------------
+
+async def scenario_open_board(client, recorder, user, rng, args):
+    board_id = rng.choice(list(user.boards))
+    await timed(client, recorder, "GET /boards/{board_id}", "GET",
+                f"{API_PREFIX}/boards/{board_id}", headers=user.headers)
+
+
+async def scenario_list_boards(client, recorder, user, rng, args):
+    await timed(client, recorder, "GET /boards/", "GET", f"{API_PREFIX}/boards/", headers=user.headers)
+
+
+async def scenario_drag_task(client, recorder, user, rng, args):
+    board_id, source_column_id, task_id = user.random_task(rng)
+    if task_id is None:
+        return
+    columns = user.boards[board_id]
+    destination_column_id = rng.choice(list(columns))
+    destination = columns[destination_column_id]
+    new_index = rng.randint(0, max(0, len(destination) - (1 if destination_column_id == source_column_id else 0)))
+    response = await timed(client, recorder, "PUT /tasks/{task_id}/move", "PUT",
+                           f"{API_PREFIX}/tasks/{task_id}/move", headers=user.headers,
+                           json={"column_id": destination_column_id, "order_index": new_index})
+    if response is not None and response.status_code == 200:
+        if task_id in columns[source_column_id]:
+            columns[source_column_id].remove(task_id)
+        destination.insert(min(new_index, len(destination)), task_id)
+
+
+async def scenario_create_task(client, recorder, user, rng, args):
+    board_id = rng.choice(list(user.boards))
+    column_id = rng.choice(list(user.boards[board_id]))
+    response = await timed(client, recorder, "POST /tasks/", "POST", f"{API_PREFIX}/tasks/",
+                           headers=user.headers,
+                           json={"title": f"load task {rng.randrange(10**9)}", "column_id": column_id,
+                                 "priority": rng.randint(0, 3)})
+    if response is not None and response.status_code == 200:
+        user.boards[board_id][column_id].append(response.json()["id"])
+
+
+async def scenario_edit_task(client, recorder, user, rng, args):
+    _, _, task_id = user.random_task(rng)
+    if task_id is None:
+        return
+    await timed(client, recorder, "PUT /tasks/{task_id}", "PUT", f"{API_PREFIX}/tasks/{task_id}",
+                headers=user.headers,
+                json={"title": f"edited {rng.randrange(10**9)}", "description": "edited by load test",
+                      "priority": rng.randint(0, 3)})
+
+
+async def scenario_login(client, recorder, user, rng, args):
+    for _ in range(args.login_burst):
+        await timed(client, recorder, "POST /auth/token", "POST", f"{API_PREFIX}/auth/token",
+                    data={"username": user.email, "password": PASSWORD})
+
+
+SCENARIOS = {
+    "open_board": scenario_open_board,
+    "drag_task": scenario_drag_task,
+    "create_task": scenario_create_task,
+    "edit_task": scenario_edit_task,
+    "login": scenario_login,
+    "list_boards": scenario_list_boards,
+}
+
+
+# --- Setup -------------------------------------------------------------------
+
+async def setup_user(client, index, run_tag, args, rng):
+    email = f"loadtest-{run_tag}-{index}@example.com"
+    response = await client.post(f"{API_PREFIX}/auth/register",
+                                 json={"email": email, "password": PASSWORD, "full_name": f"Load Test {index}"})
+    if response.status_code not in (200, 400):
+        response.raise_for_status()
+    response = await client.post(f"{API_PREFIX}/auth/token", data={"username": email, "password": PASSWORD})
+    response.raise_for_status()
+    user = VirtualUser(email, response.json()["access_token"])
+
+    for board_number in range(args.boards_per_user):
+        response = await client.post(
+            f"{API_PREFIX}/boards/", headers=user.headers,
+            json={"name": f"Load board {board_number}",
+                  "columns": [{"name": f"Column {i}", "order_index": i} for i in range(args.columns)]})
+        response.raise_for_status()
+        board = response.json()
+        columns = {column["id"]: [] for column in board["columns"]}
+        for column_id in columns:
+            for task_number in range(args.tasks_per_column):
+                response = await client.post(
+                    f"{API_PREFIX}/tasks/", headers=user.headers,
+                    json={"title": f"Seed task {task_number}", "column_id": column_id,
+                          "priority": rng.randint(0, 3)})
+                response.raise_for_status()
+                columns[column_id].append(response.json()["id"])
+        user.boards[board["id"]] = columns
+    return user
+
+
+async def worker(client, recorder, user, rng, mix, args, stop_at):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < stop_at:
+        scenario = SCENARIOS[rng.choices(names, weights)[0]]
+        await scenario(client, recorder, user, rng, args)
+        if args.think_time:
+            await asyncio.sleep(rng.uniform(0, args.think_time))
+
+
+async def run(args):
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    run_tag = f"{int(time.time())}{rng.randrange(1000):03d}"
+    limits = httpx.Limits(max_connections=args.concurrency + args.users,
+                          max_keepalive_connections=args.concurrency + args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        print(f"Setting up {args.users} users x {args.boards_per_user} boards "
+              f"({args.columns} columns, {args.tasks_per_column} tasks/column)...", file=sys.stderr)
+        users = await asyncio.gather(*(setup_user(client, i, run_tag, args, random.Random(args.seed + i))
+                                       for i in range(args.users)))
+
+        recorder = Recorder()
+        start = time.perf_counter()
+        measure_from = start + args.warmup
+        stop_at = measure_from + args.duration
+        workers = [
+            asyncio.create_task(worker(client, recorder, users[i % len(users)],
+                                       random.Random(args.seed * 1000 + i), mix, args, stop_at))
+            for i in range(args.concurrency)
+        ]
+        await asyncio.sleep(args.warmup)
+        recorder.enabled = True
+        print(f"Measuring for {args.duration}s at concurrency {args.concurrency}...", file=sys.stderr)
+        await asyncio.gather(*workers)
+        measured_seconds = time.perf_counter() - measure_from
+
+    endpoints, totals = recorder.summary(measured_seconds)
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "measured_seconds": round(measured_seconds, 3),
+        },
+        "config": {key: value for key, value in vars(args).items() if key not in ("func", "output")},
+        "totals": totals,
+        "endpoints": endpoints,
+    }
+
+
+def cmd_run(args):
+    result = asyncio.run(run(args))
+    payload = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+    for endpoint, stats in result["endpoints"].items():
+        latency = stats["latency_ms"]
+        print(f"{endpoint:32s} n={stats['count']:<7d} rps={stats['throughput_rps']:<9.2f} "
+              f"p50={latency['p50']:<8.2f} p95={latency['p95']:<8.2f} p99={latency['p99']:<8.2f} "
+              f"errors={stats['errors']}", file=sys.stderr)
+
+
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    if baseline["config"].get("mix") != candidate["config"].get("mix") or \
+            baseline["config"].get("concurrency") != candidate["config"].get("concurrency"):
+        print("warning: runs used different mix/concurrency; comparison may not be meaningful", file=sys.stderr)
+
+    regressions = []
+    print(f"{'endpoint':32s} {'metric':>10s} {'baseline':>10s} {'candidate':>10s} {'change':>8s}")
+    for endpoint in sorted(set(baseline["endpoints"]) & set(candidate["endpoints"])):
+        base, cand = baseline["endpoints"][endpoint], candidate["endpoints"][endpoint]
+        rows = [(metric, base["latency_ms"][metric], cand["latency_ms"][metric], True)
+                for metric in ("p50", "p95", "p99")]
+        rows.append(("rps", base["throughput_rps"], cand["throughput_rps"], False))
+        for metric, old, new, lower_is_better in rows:
+            change = (new - old) / old if old else 0.0
+            regressed = change > args.threshold if lower_is_better else change < -args.threshold
+            if regressed and metric in args.gate:
+                regressions.append((endpoint, metric, change))
+            print(f"{endpoint:32s} {metric:>10s} {old:>10.2f} {new:>10.2f} {change:>+7.1%}{' !' if regressed else ''}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:", file=sys.stderr)
+        for endpoint, metric, change in regressions:
+            print(f"  {endpoint} {metric} {change:+.1%}", file=sys.stderr)
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run a load test against a live API")
+    run_parser.add_argument("--base-url", default="http://localhost:8000")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="Number of concurrent virtual clients")
+    run_parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    run_parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before measuring")
+    run_parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma-separated scenario=weight pairs")
+    run_parser.add_argument("--users", type=int, default=4)
+    run_parser.add_argument("--boards-per-user", type=int, default=2)
+    run_parser.add_argument("--columns", type=int, default=4)
+    run_parser.add_argument("--tasks-per-column", type=int, default=20)
+    run_parser.add_argument("--login-burst", type=int, default=3, help="Logins per login scenario")
+    run_parser.add_argument("--think-time", type=float, default=0.0, help="Max random pause between actions (s)")
+    run_parser.add_argument("--timeout", type=float, default=30.0)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Relative change treated as a regression (default 0.10)")
+    compare_parser.add_argument("--gate", nargs="+", default=["p95", "p99", "rps"],
+                                help="Metrics that fail the comparison when they regress")
+    compare_parser.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
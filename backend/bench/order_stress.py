@@ -0,0 +1,289 @@
+"""Concurrency stress test of the order_index invariants: creates, moves and deletes on shared columns.
+
+Creates ``--boards`` scratch boards of ``--columns`` columns and ``--tasks``
+tasks each, then runs ``--rounds`` rounds. In a round, ``--threads`` client
+threads send ``--ops`` randomized requests, picked by ``--mix`` from:
+
+``move``         PUT /tasks/{id}/move to a random column and index (past the end too)
+``reorder``      the same within the task's own column
+``create``       POST /tasks/ into a random column
+``delete``       DELETE /tasks/{id}
+``column_move``  PUT /boards/{id}/columns/{id}/move
+``column_churn`` DELETE a column (its tasks are deleted by a background job) and add a new one
+
+Threads share the columns, so requests race on the same rows: a request may
+get 409 (a conflicting writer won; not retried) or 404 (its task was deleted
+meanwhile). After each round, every board is read back and checked: the live
+columns' positions, and each live column's live tasks' positions, must be
+unique and gap-free (0..n-1). The report gives per-operation outcomes and
+latency, successful moves per second, and the server's write conflicts by
+cause (stale conditional write, serialization failure, deadlock) from
+/metrics. Those counters are per worker, so run the API with one worker, e.g.
+(from backend/):
+
+    RATE_LIMIT_ENABLED=false uvicorn app.main:app
+    python bench/order_stress.py --email user@example.com --password secret --threads 16 --rounds 5
+
+Exits non-zero if an invariant is broken or a request fails with 5xx.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+OPERATIONS = ("move", "reorder", "create", "delete", "column_move", "column_churn")
+DEFAULT_MIX = "move=50,reorder=15,create=15,delete=15,column_move=4,column_churn=1"
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}' (one of {', '.join(OPERATIONS)})")
+        mix[name] = float(weight)
+    return mix
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "p50_ms": round(values[len(values) // 2] * 1000, 1),
+        "p95_ms": round(values[int(len(values) * 0.95)] * 1000, 1),
+        "p99_ms": round(values[int(len(values) * 0.99)] * 1000, 1),
+    }
+
+
+class View:
+    """What the threads pick targets from: the boards as read at the start of the round,
+    plus what they created since. It goes stale during the round, which is the point."""
+
+    def __init__(self, boards):
+        self.lock = threading.Lock()
+        self.columns = {} # column id -> board id
+        self.tasks = {} # task id -> column id
+        for board in boards:
+            for column in board["columns"]:
+                self.columns[column["id"]] = board["id"]
+                for task in column["tasks"]:
+                    self.tasks[task["id"]] = column["id"]
+
+    def pick_task(self, rng):
+        with self.lock:
+            if not self.tasks:
+                return None, None
+            task_id = rng.choice(list(self.tasks))
+            return task_id, self.tasks[task_id]
+
+    def pick_column(self, rng, board_id=None):
+        with self.lock:
+            column_ids = [column_id for column_id, owner in self.columns.items() if board_id in (None, owner)]
+            return rng.choice(column_ids) if column_ids else None
+
+    def add_task(self, task_id, column_id):
+        with self.lock:
+            self.tasks[task_id] = column_id
+
+    def drop_task(self, task_id):
+        with self.lock:
+            self.tasks.pop(task_id, None)
+
+    def replace_column(self, old_id, new_id, board_id):
+        with self.lock:
+            self.columns.pop(old_id, None)
+            self.columns[new_id] = board_id
+            for task_id in [task_id for task_id, column_id in self.tasks.items() if column_id == old_id]:
+                del self.tasks[task_id]
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statuses = defaultdict(Counter) # operation -> status code -> count
+        self.latencies = defaultdict(list) # operation -> seconds, successful requests only
+        self.errors = [] # 5xx and transport errors
+
+    def add(self, operation: str, status, seconds: float, detail: str = ""):
+        with self.lock:
+            self.statuses[operation][status] += 1
+            if status == 200 or status == 202:
+                self.latencies[operation].append(seconds)
+            elif not isinstance(status, int) or status >= 500:
+                self.errors.append(f"{operation}: {status} {detail[:200]}")
+
+
+def run_operation(client, view: View, results: Results, rng, operation: str, max_index: int):
+    started = time.perf_counter()
+    request = None
+    if operation in ("move", "reorder"):
+        task_id, column_id = view.pick_task(rng)
+        if task_id is None:
+            return
+        if operation == "move":
+            column_id = view.pick_column(rng, view.columns.get(column_id)) or column_id
+        request = ("PUT", f"/tasks/{task_id}/move", {"column_id": column_id, "order_index": rng.randint(0, max_index)})
+    elif operation == "create":
+        column_id = view.pick_column(rng)
+        request = ("POST", "/tasks/", {"title": f"Stress {rng.randrange(1 << 30)}", "column_id": column_id})
+    elif operation == "delete":
+        task_id, _ = view.pick_task(rng)
+        if task_id is None:
+            return
+        request = ("DELETE", f"/tasks/{task_id}", None)
+    elif operation == "column_move":
+        column_id = view.pick_column(rng)
+        board_id = view.columns.get(column_id)
+        request = ("PUT", f"/boards/{board_id}/columns/{column_id}/move", {"new_order_index": rng.randint(0, 8)})
+    if request is not None:
+        try:
+            response = client.request(request[0], request[1], json=request[2])
+        except httpx.HTTPError as e:
+            results.add(operation, type(e).__name__, 0, str(e))
+            return
+        results.add(operation, response.status_code, time.perf_counter() - started, response.text)
+        if operation == "create" and response.status_code == 200:
+            view.add_task(response.json()["id"], request[2]["column_id"])
+        elif operation == "delete" and response.status_code in (200, 404):
+            view.drop_task(task_id)
+        elif operation == "move" and response.status_code == 200:
+            view.add_task(task_id, request[2]["column_id"])
+        return
+
+    # column_churn: delete a column, then add one so the board keeps its shape
+    column_id = view.pick_column(rng)
+    board_id = view.columns.get(column_id)
+    try:
+        response = client.delete(f"/boards/{board_id}/columns/{column_id}")
+        results.add(operation, response.status_code, time.perf_counter() - started, response.text)
+        if response.status_code != 202:
+            return
+        added = client.post(f"/boards/{board_id}/columns", json={"name": f"Churn {rng.randrange(1 << 30)}"})
+    except httpx.HTTPError as e:
+        results.add(operation, type(e).__name__, 0, str(e))
+        return
+    if added.status_code == 200:
+        view.replace_column(column_id, added.json()["id"], board_id)
+    else:
+        results.add("column_add", added.status_code, 0, added.text)
+
+
+def check_board(board) -> list:
+    """Violations of the ordering invariants in one board."""
+    problems = []
+    column_positions = sorted(column["order_index"] for column in board["columns"])
+    if column_positions != list(range(len(column_positions))):
+        problems.append(f"board {board['id']}: column positions {column_positions}")
+    for column in board["columns"]:
+        positions = sorted(task["order_index"] for task in column["tasks"])
+        if positions != list(range(len(positions))):
+            duplicates = sorted(p for p, n in Counter(positions).items() if n > 1)
+            gaps = sorted(set(range(len(positions))) - set(positions))
+            problems.append(f"board {board['id']} column {column['id']}: {len(positions)} tasks, "
+                            f"duplicates at {duplicates[:10]}, missing {gaps[:10]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--boards", type=int, default=2)
+    parser.add_argument("--columns", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=60, help="Initial tasks per board")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--ops", type=int, default=2000, help="Requests per round")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Default: {DEFAULT_MIX}")
+    parser.add_argument("--max-index", type=int, default=40, help="Largest order_index a move asks for")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    operations, weights = zip(*args.mix.items())
+    with httpx.Client(base_url=f"{args.base_url}/api/v1", timeout=60,
+                      limits=httpx.Limits(max_connections=args.threads * 2)) as client:
+        token = client.post("/auth/token", data={"username": args.email, "password": args.password})
+        token.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {token.json()['access_token']}"
+
+        board_ids = []
+        for n in range(args.boards):
+            board = client.post("/boards/", json={
+                "name": f"order stress {int(time.time())} #{n}",
+                "columns": [{"name": f"Column {i}", "order_index": i} for i in range(args.columns)],
+            }).json()
+            board_ids.append(board["id"])
+            for i in range(args.tasks):
+                column_id = board["columns"][i % args.columns]["id"]
+                client.post("/tasks/", json={"title": f"Task {i}", "column_id": column_id}).raise_for_status()
+
+        def read_boards():
+            # ?stream=true reads Postgres even if a board engine holds the board
+            return [client.get(f"/boards/{board_id}", params={"stream": "true"}).json() for board_id in board_ids]
+
+        rounds, violations, failures = [], [], []
+        for round_number in range(args.rounds):
+            view = View(read_boards())
+            results = Results()
+            conflicts_before = client.get("/metrics/").json().get("write_conflicts", {})
+            seeds = [rng.randrange(1 << 30) for _ in range(args.ops)]
+            picks = rng.choices(operations, weights, k=args.ops)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(args.threads) as pool:
+                list(pool.map(
+                    lambda n: run_operation(client, view, results, random.Random(seeds[n]), picks[n], args.max_index),
+                    range(args.ops),
+                ))
+            seconds = time.perf_counter() - started
+
+            conflicts_after = client.get("/metrics/").json().get("write_conflicts", {})
+            round_violations = [problem for board in read_boards() for problem in check_board(board)]
+            requests = sum(sum(statuses.values()) for statuses in results.statuses.values())
+            conflicts = {cause: conflicts_after.get(cause, 0) - conflicts_before.get(cause, 0) for cause in conflicts_after}
+            moves = results.statuses["move"][200] + results.statuses["reorder"][200]
+            report = {
+                "round": round_number + 1,
+                "requests": requests,
+                "seconds": round(seconds, 2),
+                "requests_per_second": round(requests / seconds, 1),
+                "moves_per_second": round(moves / seconds, 1),
+                "outcomes": {operation: {str(status): count for status, count in sorted(statuses.items(), key=str)}
+                             for operation, statuses in sorted(results.statuses.items())},
+                "latency": {operation: percentiles(values) for operation, values in sorted(results.latencies.items())},
+                "write_conflicts": conflicts,
+                "conflict_rates": {cause: round(count / requests, 4) for cause, count in conflicts.items()} if requests else {},
+                "violations": round_violations,
+                "server_errors": results.errors[:20],
+            }
+            rounds.append(report)
+            violations += round_violations
+            failures += results.errors
+            print(json.dumps({key: report[key] for key in (
+                "round", "requests", "moves_per_second", "write_conflicts", "violations")}))
+
+    summary = {
+        "rounds": rounds,
+        "violations": len(violations),
+        "server_errors": len(failures),
+        "moves_per_second": round(sum(r["moves_per_second"] for r in rounds) / len(rounds), 1) if rounds else None,
+    }
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    if violations or failures:
+        raise SystemExit(f"{len(violations)} invariant violations, {len(failures)} server errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Python CPU per request on the hot endpoints, measured in-process.
+
+Runs the app inside this process (Starlette's TestClient, no network or
+uvicorn) against the configured database, and for each request kind reports
+the process CPU time per request (the mean of the best of ``--rounds``
+rounds, and the median over all of them), wall time per request and the number
+of SQL statements executed. Postgres runs in its own processes, so the CPU time is
+what the request costs in Python: routing, validation, statement construction
+and compilation, the driver and serialization (plus the test client's own
+small, constant overhead).
+
+Run it before and after a change and compare:
+
+    python bench/request_cpu.py run --output before.json
+    # ...check out the change...
+    python bench/request_cpu.py run --output after.json
+    python bench/request_cpu.py compare before.json after.json
+
+It registers a user of its own and creates one board of ``--columns`` columns
+and ``--tasks`` tasks. Run from backend/ with DATABASE_URL and SECRET_KEY set.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+KINDS = ("me", "list_boards", "get_board", "get_task_subtasks", "update_task", "move_task", "create_delete_task")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def run(args):
+    from fastapi.testclient import TestClient
+    from app.db.database import get_engine
+    from app.main import create_app
+
+    logging.disable(logging.INFO) # Request logging would dominate the measurement and the output
+    rng = random.Random(args.seed)
+    with TestClient(create_app()) as client:
+        # A user of its own, so list_boards measures one board rather than whatever the seed user has
+        email, password = f"request-cpu-{time.time_ns()}@example.com", "request-cpu-password"
+        client.post("/api/v1/auth/register", json={"email": email, "password": password, "full_name": "Request CPU"}).raise_for_status()
+        token = client.post("/api/v1/auth/token", data={"username": email, "password": password})
+        token.raise_for_status()
+        headers = {"Authorization": f"Bearer {token.json()['access_token']}"}
+        api = "/api/v1"
+
+        board = client.post(f"{api}/boards/", headers=headers, json={
+            "name": f"request cpu {int(time.time())}",
+            "columns": [{"name": f"Column {i}", "order_index": i} for i in range(args.columns)],
+        }).json()
+        column_ids = [column["id"] for column in board["columns"]]
+        task_ids = [
+            client.post(f"{api}/tasks/", headers=headers, json={"title": f"Task {i}", "column_id": column_ids[i % len(column_ids)]}).json()["id"]
+            for i in range(args.tasks)
+        ]
+
+        def request(kind, n):
+            if kind == "me":
+                return client.get(f"{api}/auth/me", headers=headers)
+            if kind == "list_boards":
+                return client.get(f"{api}/boards/", headers=headers)
+            if kind == "get_board":
+                # Rendered from Postgres each time, not the response cache
+                return client.get(f"{api}/boards/{board['id']}", headers=headers, params={"stream": "true"})
+            if kind == "get_task_subtasks":
+                return client.get(f"{api}/tasks/{rng.choice(task_ids)}/subtasks", headers=headers)
+            if kind == "update_task":
+                return client.put(f"{api}/tasks/{rng.choice(task_ids)}", headers=headers, json={"title": f"Edited {n}"})
+            if kind == "move_task":
+                return client.put(f"{api}/tasks/{rng.choice(task_ids)}/move", headers=headers,
+                                  json={"column_id": rng.choice(column_ids), "order_index": rng.randint(0, args.tasks // len(column_ids))})
+            created = client.post(f"{api}/tasks/", headers=headers, json={"title": f"Scratch {n}", "column_id": rng.choice(column_ids)})
+            created.raise_for_status()
+            return client.delete(f"{api}/tasks/{created.json()['id']}", headers=headers)
+
+        statements = StatementCounter(get_engine())
+        for kind in args.kinds:
+            for n in range(args.warmup):
+                request(kind, n).raise_for_status()
+        # Kinds take turns round by round, and each reports its best round: on a busy machine
+        # the fastest round is the closest to the code's own cost
+        samples = {kind: {"cpu": [], "wall": [], "round_cpu": [], "statements": 0} for kind in args.kinds}
+        for _ in range(args.rounds):
+            for kind in args.kinds:
+                sample = samples[kind]
+                statements.count = 0
+                round_cpu = 0.0
+                for n in range(args.requests):
+                    started_cpu, started = time.process_time(), time.perf_counter()
+                    response = request(kind, n)
+                    cpu = time.process_time() - started_cpu
+                    sample["wall"].append(time.perf_counter() - started)
+                    sample["cpu"].append(cpu)
+                    round_cpu += cpu
+                    response.raise_for_status()
+                sample["round_cpu"].append(round_cpu / args.requests)
+                sample["statements"] += statements.count
+        results = {}
+        for kind, sample in samples.items():
+            results[kind] = {
+                "cpu_ms": round(min(sample["round_cpu"]) * 1000, 3),
+                "cpu_ms_median": round(statistics.median(sample["cpu"]) * 1000, 3),
+                "wall_ms": round(statistics.mean(sample["wall"]) * 1000, 3),
+                "statements": round(sample["statements"] / (args.requests * args.rounds), 1),
+            }
+            print(json.dumps({"kind": kind, **results[kind]}))
+    return {"revision": git_revision(), "requests": args.requests, "rounds": args.rounds, "results": results}
+
+
+def cmd_run(args):
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"{'kind':<20} {'cpu ms before':>14} {'after':>8} {'change':>8} {'statements':>12}")
+    for kind, after in candidate["results"].items():
+        before = baseline["results"].get(kind)
+        if before is None:
+            continue
+        change = (after["cpu_ms"] - before["cpu_ms"]) / before["cpu_ms"]
+        print(f"{kind:<20} {before['cpu_ms']:>14.3f} {after['cpu_ms']:>8.3f} {change:>+8.1%} "
+              f"{before['statements']:>5} -> {after['statements']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Measure CPU per request in-process")
+    run_parser.add_argument("--requests", type=int, default=200, help="Measured requests per kind and round")
+    run_parser.add_argument("--rounds", type=int, default=5, help="cpu_ms is the best round's mean")
+    run_parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per kind first (fills caches)")
+    run_parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    run_parser.add_argument("--columns", type=int, default=4)
+    run_parser.add_argument("--tasks", type=int, default=40)
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--output", help="Write the JSON report here")
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
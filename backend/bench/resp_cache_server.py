@@ -0,0 +1,178 @@
+"""Minimal Redis-compatible (RESP2) cache server for local testing.
+
+Implements just what the shared board cache, rate limiter and idempotency
+store use: GET, SET (with EX/PX/NX), INCR/INCRBY, PEXPIRE, DEL, EXISTS, DBSIZE,
+FLUSHDB/FLUSHALL, INFO, PING and CLIENT. It is a single in-memory LRU bounded
+by --maxmemory bytes of values (like Redis with ``maxmemory-policy allkeys-lru``).
+
+Usage:
+    python bench/resp_cache_server.py --port 6390 --maxmemory 67108864
+    BOARD_CACHE_BACKEND=redis BOARD_CACHE_REDIS_URL=redis://localhost:6390/0 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class Store:
+    def __init__(self, maxmemory):
+        self.maxmemory = maxmemory
+        self.used = 0
+        self.data = OrderedDict()  # key -> (value, expires_at or None)
+        self.evicted = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            self.delete(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, ttl=None):
+        self.delete(key)
+        self.data[key] = (value, time.monotonic() + ttl if ttl else None)
+        self.used += len(key) + len(value)
+        while self.maxmemory and self.used > self.maxmemory and self.data:
+            self.delete(next(iter(self.data)))
+            self.evicted += 1
+
+    def incr(self, key, amount=1):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            entry = None
+        value = int(entry[0]) + amount if entry is not None else amount
+        self.delete(key)
+        self.data[key] = (str(value).encode(), entry[1] if entry is not None else None)
+        self.used += len(key) + len(self.data[key][0])
+        return value
+
+    def expire(self, key, ttl):
+        entry = self.data.get(key)
+        if entry is None:
+            return 0
+        self.data[key] = (entry[0], time.monotonic() + ttl)
+        return 1
+
+    def delete(self, key):
+        entry = self.data.pop(key, None)
+        if entry is None:
+            return 0
+        self.used -= len(key) + len(entry[0])
+        return 1
+
+    def flush(self):
+        self.data.clear()
+        self.used = 0
+
+    def info(self):
+        return (
+            "# Memory\r\n"
+            f"used_memory:{self.used}\r\nmaxmemory:{self.maxmemory}\r\n"
+            "# Stats\r\n"
+            f"keyspace_hits:{self.hits}\r\nkeyspace_misses:{self.misses}\r\nevicted_keys:{self.evicted}\r\n"
+        )
+
+
+def encode(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        value = value.encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+async def read_command(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.decode().split()  # Inline command (e.g. typed in telnet)
+    args = []
+    for _ in range(int(line[1:])):
+        size = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+def execute(store, args):
+    command = args[0].upper() if isinstance(args[0], bytes) else args[0].upper().encode()
+    if command == b"PING":
+        return b"+PONG\r\n"
+    if command == b"GET":
+        return encode(store.get(args[1]))
+    if command == b"SET":
+        ttl = None
+        options = [arg.upper() for arg in args[3:]]
+        if b"EX" in options:
+            ttl = float(args[3 + options.index(b"EX") + 1])
+        elif b"PX" in options:
+            ttl = float(args[3 + options.index(b"PX") + 1]) / 1000
+        if b"NX" in options and store.get(args[1]) is not None:
+            return b"$-1\r\n"
+        store.set(args[1], args[2], ttl)
+        return b"+OK\r\n"
+    if command == b"INCR":
+        return encode(store.incr(args[1]))
+    if command == b"INCRBY":
+        return encode(store.incr(args[1], int(args[2])))
+    if command == b"PEXPIRE":
+        return encode(store.expire(args[1], float(args[2]) / 1000))
+    if command == b"DEL":
+        return encode(sum(store.delete(key) for key in args[1:]))
+    if command == b"EXISTS":
+        return encode(sum(store.get(key) is not None for key in args[1:]))
+    if command == b"DBSIZE":
+        return encode(len(store.data))
+    if command in (b"FLUSHDB", b"FLUSHALL"):
+        store.flush()
+        return b"+OK\r\n"
+    if command == b"INFO":
+        return encode(store.info())
+    if command in (b"CLIENT", b"SELECT"):
+        return b"+OK\r\n"
+    return b"-ERR unknown command '%s'\r\n" % command
+
+
+async def serve(port, maxmemory):
+    store = Store(maxmemory)
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if args:
+                    writer.write(execute(store, args))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", port)
+    print(f"RESP cache listening on 127.0.0.1:{port} (maxmemory={maxmemory})")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--maxmemory", type=int, default=64 * 1024 * 1024, help="Bytes of keys+values (0 = unbounded)")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.maxmemory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measure API worker cold start: process spawn -> first successful response.
+
+Each run starts a fresh uvicorn process, polls ``--path`` until it answers,
+then stops the process. Separately, it times importing the app (or factory)
+in a fresh interpreter, which is the part autoscaled workers pay before
+they can even bind. Reports min/median/max over ``--runs`` as JSON.
+
+Usage (from backend/, with DATABASE_URL and SECRET_KEY set):
+    python bench/startup_time.py --runs 10
+    python bench/startup_time.py --runs 10 --path /api/v1/boards/ --header "Authorization: Bearer <token>"
+    python bench/startup_time.py --target app.main:create_app --factory
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def summarize(values):
+    return {
+        "min_ms": round(min(values) * 1000, 1),
+        "median_ms": round(statistics.median(values) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+
+def time_import(target: str) -> float:
+    # Imports the target itself, so a lazily built app (app.main:app) is built too
+    module, _, attribute = target.partition(":")
+    code = f"import time; t = time.perf_counter(); from {module} import {attribute}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_first_response(args, port: int) -> float:
+    command = [sys.executable, "-m", "uvicorn", args.target, "--port", str(port), "--log-level", "warning"]
+    if args.factory:
+        command.append("--factory")
+    headers = dict(header.split(": ", 1) for header in args.header)
+    url = f"http://127.0.0.1:{port}{args.path}"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        with httpx.Client(timeout=30) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"Server exited during startup:\n{process.stderr.read().decode()}")
+                try:
+                    response = client.get(url, headers=headers)
+                except httpx.TransportError:
+                    time.sleep(0.005)
+                    continue
+                elapsed = time.perf_counter() - started
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{args.path} answered {response.status_code}: {response.text[:200]}")
+                return elapsed
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main:app", help="uvicorn app (or factory with --factory)")
+    parser.add_argument("--factory", action="store_true")
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--header", action="append", default=[], help='Extra request header, "Name: value"')
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    imports = [time_import(args.target) for _ in range(args.runs)]
+    first_responses = [time_first_response(args, args.port) for _ in range(args.runs)]
+
+    report = {
+        "target": args.target,
+        "path": args.path,
+        "runs": args.runs,
+        "git_commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip(),
+        "import": summarize(imports),
+        "spawn_to_first_response": summarize(first_responses),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
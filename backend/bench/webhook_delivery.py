@@ -0,0 +1,149 @@
+"""End-to-end check of outbox webhook delivery: task moves -> receiver.
+
+Runs ``webhook_receiver``'s handler in-process, creates a scratch board with two
+columns and ``--tasks`` tasks, then makes ``--moves`` moves from ``--threads``
+client threads. It waits until an event for every move has arrived and reports
+move latency, delivery lag (``occurred_at`` to receipt), batch sizes and
+duplicates (expected with at-least-once delivery when ``--fail-rate`` > 0). It
+exits non-zero if events are still missing after ``--wait`` seconds.
+
+Start the API pointing at the receiver first, e.g. (from backend/):
+    WEBHOOK_URLS=http://127.0.0.1:9100/events RATE_LIMIT_ENABLED=false uvicorn app.main:app
+    python bench/webhook_delivery.py --email user@example.com --password secret --moves 2000 --fail-rate 0.2
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+import httpx
+
+from webhook_receiver import make_handler
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "p50_ms": round(values[len(values) // 2] * 1000, 1),
+        "p95_ms": round(values[int(len(values) * 0.95)] * 1000, 1),
+        "max_ms": round(values[-1] * 1000, 1),
+    }
+
+
+class Received:
+    """Events seen by the receiver, keyed by event id."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = {} # event id -> (event, seconds from occurred_at to first receipt)
+        self.deliveries = 0
+        self.batch_sizes = []
+
+    def on_body(self, path, body):
+        now = time.time()
+        with self.lock:
+            self.batch_sizes.append(len(body["events"]))
+            for event in body["events"]:
+                self.deliveries += 1
+                if event["id"] not in self.events:
+                    lag = now - datetime.fromisoformat(event["occurred_at"]).timestamp()
+                    self.events[event["id"]] = (event, lag)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--port", type=int, default=9100, help="Receiver port (the API's WEBHOOK_URLS must point here)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of deliveries the receiver answers with 503")
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--moves", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--wait", type=float, default=120.0, help="Seconds to wait for outstanding events")
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    received = Received()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.fail_rate, None, received.on_body, quiet=True))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with httpx.Client(base_url=f"{args.base_url}/api/v1", timeout=60) as client:
+        token = client.post("/auth/token", data={"username": args.email, "password": args.password})
+        token.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {token.json()['access_token']}"
+
+        board = client.post("/boards/", json={
+            "name": f"webhook delivery {int(time.time())}",
+            "columns": [{"name": "From", "order_index": 0}, {"name": "To", "order_index": 1}],
+        }).json()
+        column_ids = [column["id"] for column in sorted(board["columns"], key=lambda column: column["order_index"])]
+        task_ids = [
+            client.post("/tasks/", json={"title": f"Task {n}", "column_id": column_ids[0]}).json()["id"]
+            for n in range(args.tasks)
+        ]
+
+        # Each task is moved by one thread only, so its moves never conflict
+        task_locks = {task_id: threading.Lock() for task_id in task_ids}
+        move_times, move_errors, moved = [], [], []
+
+        def move(n):
+            rng = random.Random(n)
+            task_id = rng.choice(task_ids)
+            with task_locks[task_id]:
+                started = time.perf_counter()
+                response = client.put(f"/tasks/{task_id}/move", json={"column_id": rng.choice(column_ids), "order_index": 0})
+                elapsed = time.perf_counter() - started
+            if response.status_code == 200:
+                move_times.append(elapsed)
+                moved.append(task_id)
+            else:
+                move_errors.append(response.status_code)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            list(pool.map(move, range(args.moves)))
+        move_seconds = time.perf_counter() - started
+
+        ours = set(task_ids)
+        deadline = time.monotonic() + args.wait
+        while True:
+            with received.lock:
+                delivered = [lag for event, lag in received.events.values() if event["task_id"] in ours]
+            if len(delivered) >= len(moved) or time.monotonic() > deadline:
+                break
+            time.sleep(0.2)
+        metrics = client.get("/metrics/").json().get("webhooks")
+
+    server.shutdown()
+    report = {
+        "moves": len(moved),
+        "move_errors": len(move_errors),
+        "moves_per_second": round(len(moved) / move_seconds, 1),
+        "move_latency": percentiles(move_times),
+        "events_received": len(delivered),
+        "events_missing": len(moved) - len(delivered),
+        "duplicate_deliveries": received.deliveries - len(received.events),
+        "requests": len(received.batch_sizes),
+        "batch_size_mean": round(statistics.mean(received.batch_sizes), 1) if received.batch_sizes else None,
+        "batch_size_max": max(received.batch_sizes, default=None),
+        "delivery_lag": percentiles(delivered),
+        "dispatcher": metrics, # Of the API worker that answered
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if report["events_missing"]:
+        raise SystemExit(f"{report['events_missing']} events were not delivered within {args.wait}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Local webhook receiver for testing outgoing webhooks (due-date reminders, outbox events).
+
+Prints each JSON body it receives and answers 204. With --fail-rate it answers
+503 to that fraction of requests, to exercise senders' retry paths. With
+--output each body is also appended to a file as one JSON line. Connections
+are kept alive (HTTP/1.1), as a pooling sender expects.
+
+Usage:
+    python bench/webhook_receiver.py --port 9100
+    python -m app.services.reminders --sink webhook --webhook-url http://localhost:9100/reminders
+    WEBHOOK_URLS=http://localhost:9100/events uvicorn app.main:app
+"""
+import argparse
+import json
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(fail_rate, output, on_body=None, quiet=False):
+    """``on_body(path, parsed_body)`` is called for each accepted request (for in-process use)."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if len(body) < length:
+                self.close_connection = True # The sender went away mid-request
+                return
+            if random.random() < fail_rate:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if not quiet:
+                print(f"{self.path} {body.decode(errors='replace')}", flush=True)
+            if output:
+                with open(output, "a") as f:
+                    f.write(json.dumps({"path": self.path, "body": json.loads(body or b"null")}) + "\n")
+            if on_body:
+                on_body(self.path, json.loads(body or b"null"))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass # The body print above is the log
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--output", help="Append received bodies to this JSON-lines file")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.fail_rate, args.output))
+    print(f"Webhook receiver listening on 127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
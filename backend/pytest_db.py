@@ -0,0 +1,89 @@
+"""pytest fixtures for tests on a database cloned from a ``reset_db.py`` snapshot.
+
+Seed and snapshot a dataset once, then every run (and, where a test asks for
+it, every test) gets its own copy in seconds, however large the dataset:
+
+    python seed_db.py --boards 5000 --tasks-per-column 200-600
+    python reset_db.py snapshot kanban_seeded
+    pytest -p pytest_db --db-snapshot kanban_seeded
+
+(or ``pytest_plugins = ["pytest_db"]`` in a conftest.py; ``DB_SNAPSHOT`` in the
+environment works like ``--db-snapshot``). Tests that use these fixtures are
+skipped when no snapshot is given.
+
+``kanban_database``  session: URL of this run's clone of the snapshot. The app's
+                     settings point to it, so ``SessionLocal`` and ``create_app()``
+                     use it. Dropped at the end unless ``--keep-db``.
+``db_session``       a Session on it, closed after the test.
+``empty_database``   the run's clone emptied (users included) before the test.
+``fresh_database``   URL of a clone for this test alone, for tests that change a
+                     lot of data or must start from the pristine dataset.
+"""
+import dataclasses
+import os
+import uuid
+
+import pytest
+
+from app.core.config import configure, get_settings
+from app.db.database import SessionLocal, dispose_engine
+from reset_db import Databases, reset_database
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("kanban database")
+    group.addoption("--db-snapshot", default=os.environ.get("DB_SNAPSHOT"),
+                    help="reset_db.py snapshot to clone test databases from")
+    group.addoption("--keep-db", action="store_true", help="Do not drop the run's database at the end")
+
+
+@pytest.fixture(scope="session")
+def _databases(request):
+    snapshot = request.config.getoption("--db-snapshot")
+    if not snapshot:
+        pytest.skip("needs a database snapshot: --db-snapshot NAME (see reset_db.py)")
+    databases = Databases()
+    yield databases, snapshot
+    databases.dispose()
+
+
+@pytest.fixture(scope="session")
+def kanban_database(request, _databases):
+    databases, snapshot = _databases
+    name = f"{snapshot}_run_{os.getpid()}"
+    databases.drop(name, force=True) # Left over by a run that was killed
+    url = databases.clone(snapshot, name)
+    settings = get_settings()
+    configure(dataclasses.replace(settings, database_url=url))
+    dispose_engine() # The next session connects to the clone
+    yield url
+    dispose_engine()
+    configure(settings)
+    if not request.config.getoption("--keep-db"):
+        databases.drop(name, force=True)
+
+
+@pytest.fixture
+def db_session(kanban_database):
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def empty_database(kanban_database):
+    dispose_engine() # TRUNCATE waits for every open session on the tables
+    if not reset_database(keep_users=False, database_url=kanban_database):
+        pytest.fail("Could not empty the test database")
+    return kanban_database
+
+
+@pytest.fixture
+def fresh_database(_databases):
+    databases, snapshot = _databases
+    name = f"{snapshot}_{uuid.uuid4().hex[:12]}"
+    url = databases.clone(snapshot, name)
+    yield url
+    databases.drop(name, force=True)
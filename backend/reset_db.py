@@ -1,57 +1,189 @@
-import os
-from sqlalchemy import create_engine, text
-from dotenv import load_dotenv
+"""Reset the database, or snapshot it and clone/restore databases from the snapshot.
+
+``reset`` empties every table with one ``TRUNCATE ... RESTART IDENTITY CASCADE``
+(all tables except users and alembic_version; ``--all`` empties users too).
+
+A snapshot is a Postgres template database: a copy of the configured database
+(for instance right after ``seed_db.py``) that nothing connects to. Cloning one
+is a file-level copy made by ``CREATE DATABASE ... TEMPLATE``, which takes
+seconds even for millions of rows, so benchmark and test runs can each start
+from the same large dataset:
+
+    python seed_db.py --boards 5000 --tasks-per-column 200-600
+    python reset_db.py snapshot kanban_seeded          # copy of DATABASE_URL's database
+    python reset_db.py clone kanban_seeded kanban_run1 # prints the new database's URL
+    python reset_db.py restore kanban_seeded --force   # DATABASE_URL's database, back to the snapshot
+    python reset_db.py drop kanban_run1
+    python reset_db.py list
+
+Postgres copies a database only while no one else is connected to it, so stop
+the API and workers before ``snapshot`` or ``restore`` (``--force`` disconnects
+them). These commands connect to the ``postgres`` maintenance database and need
+the CREATEDB privilege. ``pytest_db.py`` wraps them as pytest fixtures.
+"""
+import argparse
 import sys
 
-# Load environment variables
-load_dotenv()
-
-# Get database URL from environment or use default
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost/kanban_dev")
-
-def reset_database():
-    """Reset all tables except users."""
-    # Create engine
-    engine = create_engine(DATABASE_URL)
-    
-    # Define reset queries - order matters for referential integrity
-    reset_queries = [
-        # First clear the junction table
-        "DELETE FROM task_assignees;",
-        
-        # Then clear tasks
-        "DELETE FROM tasks;",
-        
-        # Then clear board columns
-        "DELETE FROM board_columns;",
-        
-        # Finally clear boards
-        "DELETE FROM boards;"
-    ]
-    
-    # Execute queries
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app.core.config import get_settings
+
+DATABASE_URL = get_settings().database_url
+
+KEEP_TABLES = {"alembic_version"} # Never emptied; users is kept too unless keep_users=False
+
+# Plain and partitioned tables of the current schema; partitions are emptied with their parent
+TABLES_SQL = """
+    SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+    ORDER BY c.relname
+"""
+
+
+def reset_database(keep_users: bool = True, database_url: str = None) -> bool:
+    """Empty every table (except users, with keep_users) and restart their identity sequences."""
+    engine = create_engine(database_url or DATABASE_URL)
     try:
-        with engine.connect() as connection:
-            # Start a transaction
-            with connection.begin():
-                print("Starting database reset...")
-                for query in reset_queries:
-                    connection.execute(text(query))
-                print("Database reset complete!")
-                return True
-                
+        with engine.begin() as connection:
+            keep = KEEP_TABLES | ({"users"} if keep_users else set())
+            tables = [name for name in connection.execute(text(TABLES_SQL)).scalars() if name not in keep]
+            if tables:
+                quote = connection.dialect.identifier_preparer.quote
+                # One statement: no row-by-row deletes, and CASCADE empties whatever references them
+                connection.execute(text(f"TRUNCATE {', '.join(quote(name) for name in tables)} RESTART IDENTITY CASCADE"))
+            print(f"Emptied {len(tables)} tables")
+        return True
     except Exception as e:
         print(f"Error resetting database: {e}")
         return False
-    
-    return True
+    finally:
+        engine.dispose()
+
+
+class Databases:
+    """CREATE/DROP DATABASE through the server's maintenance database (they cannot run in a transaction)."""
+
+    def __init__(self, database_url: str = None):
+        self.url = make_url(database_url or DATABASE_URL)
+        self.engine = create_engine(self.url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+        self.quote = self.engine.dialect.identifier_preparer.quote
+
+    def url_of(self, name: str) -> str:
+        return self.url.set(database=name).render_as_string(hide_password=False)
+
+    def exists(self, name: str) -> bool:
+        with self.engine.connect() as connection:
+            return connection.scalar(text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name}) is not None
+
+    def disconnect(self, name: str) -> int:
+        """Terminate other sessions on a database; returns how many there were."""
+        with self.engine.connect() as connection:
+            return len(connection.execute(text(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = :name AND pid <> pg_backend_pid()"
+            ), {"name": name}).all())
+
+    def copy(self, source: str, target: str, force: bool = False):
+        """CREATE DATABASE target as a copy of source, which must have no other sessions (force ends them)."""
+        if force:
+            self.disconnect(source)
+        with self.engine.connect() as connection:
+            # FILE_COPY copies the files instead of WAL-logging every block (the default since Postgres 15)
+            strategy = " STRATEGY FILE_COPY" if connection.dialect.server_version_info >= (15,) else ""
+            connection.execute(text(f"CREATE DATABASE {self.quote(target)} TEMPLATE {self.quote(source)}{strategy}"))
+
+    def drop(self, name: str, force: bool = False):
+        if not self.exists(name):
+            return
+        with self.engine.connect() as connection:
+            # Template databases cannot be dropped
+            connection.execute(text(f"ALTER DATABASE {self.quote(name)} IS_TEMPLATE false"))
+            connection.execute(text(f"DROP DATABASE {self.quote(name)}{' WITH (FORCE)' if force else ''}"))
+
+    def snapshot(self, name: str, force: bool = False):
+        """Copy the configured database into template database ``name``, replacing an older one."""
+        self.drop(name)
+        self.copy(self.url.database, name, force=force)
+        with self.engine.connect() as connection:
+            connection.execute(text(f"ALTER DATABASE {self.quote(name)} IS_TEMPLATE true"))
+
+    def clone(self, snapshot: str, name: str) -> str:
+        """Create database ``name`` from a snapshot and return its URL."""
+        self.copy(snapshot, name)
+        return self.url_of(name)
+
+    def restore(self, snapshot: str, force: bool = False):
+        """Replace the configured database with a copy of the snapshot."""
+        self.drop(self.url.database, force=force)
+        self.copy(snapshot, self.url.database)
+
+    def snapshots(self) -> list:
+        with self.engine.connect() as connection:
+            return list(connection.execute(text(
+                "SELECT datname, pg_size_pretty(pg_database_size(datname)) FROM pg_database "
+                "WHERE datistemplate AND datname NOT IN ('template0', 'template1') ORDER BY datname"
+            )).all())
+
+    def dispose(self):
+        self.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command")
+
+    reset_parser = subparsers.add_parser("reset", help="Empty every table except users (the default command)")
+    reset_parser.add_argument("--all", action="store_true", help="Empty users too")
+    reset_parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation")
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="Copy the database into a template database")
+    snapshot_parser.add_argument("name")
+    snapshot_parser.add_argument("--force", action="store_true", help="Disconnect other sessions first")
+
+    clone_parser = subparsers.add_parser("clone", help="Create a database from a snapshot and print its URL")
+    clone_parser.add_argument("snapshot")
+    clone_parser.add_argument("name")
+
+    restore_parser = subparsers.add_parser("restore", help="Replace the database with a copy of a snapshot")
+    restore_parser.add_argument("snapshot")
+    restore_parser.add_argument("--force", action="store_true", help="Disconnect other sessions first")
+
+    drop_parser = subparsers.add_parser("drop", help="Drop a clone or snapshot")
+    drop_parser.add_argument("name")
+    drop_parser.add_argument("--force", action="store_true", help="Disconnect other sessions first")
+
+    subparsers.add_parser("list", help="List snapshots")
+    args = parser.parse_args()
+
+    if args.command in (None, "reset"):
+        keep_users = not getattr(args, "all", False)
+        if not getattr(args, "yes", False):
+            # Add a confirmation prompt
+            what = "ALL data except users" if keep_users else "ALL data, users included"
+            response = input(f"This will delete {what}. Are you sure? (y/N): ")
+            if response.lower() != 'y':
+                print("Operation cancelled.")
+                sys.exit(0)
+        sys.exit(0 if reset_database(keep_users=keep_users) else 1)
+
+    databases = Databases()
+    try:
+        if args.command == "snapshot":
+            databases.snapshot(args.name, force=args.force)
+            print(f"Snapshot {args.name} of {databases.url.database}")
+        elif args.command == "clone":
+            print(databases.clone(args.snapshot, args.name))
+        elif args.command == "restore":
+            databases.restore(args.snapshot, force=args.force)
+            print(f"Restored {databases.url.database} from {args.snapshot}")
+        elif args.command == "drop":
+            databases.drop(args.name, force=args.force)
+        elif args.command == "list":
+            for name, size in databases.snapshots():
+                print(f"{name}\t{size}")
+    finally:
+        databases.dispose()
+
 
 if __name__ == "__main__":
-    # Add a confirmation prompt
-    response = input("This will delete ALL data except users. Are you sure? (y/N): ")
-    if response.lower() == 'y':
-        success = reset_database()
-        sys.exit(0 if success else 1)
-    else:
-        print("Operation cancelled.")
-        sys.exit(0) 
\ No newline at end of file
+    main()
@@ -0,0 +1,220 @@
+"""Bulk-load synthetic boards, columns, tasks and assignees with Postgres COPY.
+
+Rows are generated lazily and streamed through ``COPY ... FROM STDIN`` one
+batch of boards at a time, so memory stays flat and each batch commits on
+its own. Non-deleted tasks in every column get contiguous ``order_index``
+values starting at 0, matching the invariants maintained by ``app/api/tasks.py``.
+
+Example (roughly 10M tasks):
+    python seed_db.py --users 2000 --boards 5000 --columns-per-board 5 \\
+        --tasks-per-column 200-600 --assignees-per-task 0-3 --deleted-ratio 0.05
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import psycopg
+from sqlalchemy.engine import make_url
+
+from app.core.config import get_settings
+from app.models import user # Registers User, which Task.assignees refers to by name
+from app.services import board_stats
+
+DATABASE_URL = get_settings().database_url
+
+COLUMN_NAMES = ["Backlog", "To Do", "In Progress", "Review", "Done", "Blocked", "Icebox", "Archive"]
+
+# Live tasks enter the transition log as "created", like tasks created through the API
+CREATED_TRANSITIONS_SQL = """
+    INSERT INTO task_transitions (task_id, board_id, kind, to_column_id)
+    SELECT t.id, c.board_id, 'created', t.column_id
+    FROM tasks t JOIN board_columns c ON c.id = t.column_id
+    WHERE c.board_id = ANY(%(board_ids)s) AND NOT t.is_deleted AND NOT c.is_deleted
+"""
+
+
+def parse_range(value):
+    """Parse ``"N"`` or ``"MIN-MAX"`` into an inclusive ``(min, max)`` tuple."""
+    low, _, high = value.partition("-")
+    low = int(low)
+    high = int(high) if high else low
+    if low < 0 or high < low:
+        raise argparse.ArgumentTypeError(f"invalid range '{value}'")
+    return low, high
+
+
+def get_copy_connection():
+    """Open a psycopg 3 connection (COPY support) for DATABASE_URL, whatever driver it names."""
+    url = make_url(DATABASE_URL).set(drivername="postgresql+psycopg")
+    engine = create_engine(url)
+    return engine.raw_connection()
+
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        # Descriptions are slices of one pre-built text blob; building a fresh random
+        # string per task would dominate the load time.
+        self.text_blob = "".join(self.rng.choices(string.ascii_letters + "     ", k=max(args.description_size[1], 1) * 4))
+        self.now = datetime.now(timezone.utc)
+
+    def description(self):
+        size = self.rng.randint(*self.args.description_size)
+        if size == 0:
+            return None
+        start = self.rng.randrange(len(self.text_blob) - size + 1)
+        return self.text_blob[start:start + size]
+
+    def due_date(self):
+        if self.rng.random() >= self.args.due_ratio:
+            return None
+        return self.now + timedelta(days=self.rng.uniform(-30, 60))
+
+    def column_tasks(self, column_id, board_id, board_number, column_number, user_ids, assignee_rows):
+        """Yield task rows for one column, collecting its assignee rows on the side."""
+        rng = self.rng
+        args = self.args
+        task_count = rng.randint(*args.tasks_per_column)
+        next_index = 0
+        for task_number in range(task_count):
+            is_deleted = rng.random() < args.deleted_ratio
+            if is_deleted:
+                # Soft-deleted tasks keep whatever index they had when deleted
+                order_index = rng.randint(0, max(next_index, 0))
+            else:
+                order_index = next_index
+                next_index += 1
+            task_id = uuid4()
+            yield (
+                task_id,
+                f"Task {board_number}.{column_number}.{task_number}",
+                self.description(),
+                column_id,
+                board_id,
+                self.due_date(),
+                rng.randint(0, 3),
+                order_index,
+                is_deleted,
+            )
+            assignee_count = min(rng.randint(*args.assignees_per_task), len(user_ids))
+            for user_id in rng.sample(user_ids, assignee_count):
+                assignee_rows.append((task_id, board_id, user_id))
+
+
+def ensure_users(connection, args):
+    """Return ids of the seed users, creating the missing ones via COPY."""
+    emails = [f"{args.email_prefix}{i}@example.com" for i in range(args.users)]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT email, id FROM users WHERE email = ANY(%s)", (emails,))
+        existing = dict(cursor.fetchall())
+        missing = [email for email in emails if email not in existing]
+        if missing:
+            hashed_password = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(args.password)
+            new_users = {email: uuid4() for email in missing}
+            with cursor.copy("COPY users (id, email, hashed_password, full_name) FROM STDIN") as copy:
+                for email, user_id in new_users.items():
+                    copy.write_row((user_id, email, hashed_password, email.split("@")[0]))
+            existing.update(new_users)
+    connection.commit()
+    print(f"Users ready: {len(existing)} ({len(missing)} created)")
+    return [existing[email] for email in emails]
+
+
+def seed_batch(connection, generator, user_ids, first_board, board_count):
+    args = generator.args
+    boards = []
+    columns = []
+    for board_number in range(first_board, first_board + board_count):
+        board_id = uuid4()
+        boards.append((board_id, f"Seed board {board_number}", f"Synthetic board #{board_number}",
+                       user_ids[board_number % len(user_ids)]))
+        for column_number in range(args.columns_per_board):
+            columns.append((uuid4(), COLUMN_NAMES[column_number % len(COLUMN_NAMES)], column_number,
+                            board_id, board_number, column_number))
+
+    assignee_rows = []
+    task_count = 0
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL synchronous_commit = off")
+        with cursor.copy("COPY boards (id, name, description, created_by) FROM STDIN") as copy:
+            for row in boards:
+                copy.write_row(row)
+        with cursor.copy("COPY board_columns (id, name, order_index, board_id, is_deleted) FROM STDIN") as copy:
+            for column_id, name, order_index, board_id, _, _ in columns:
+                copy.write_row((column_id, name, order_index, board_id, False))
+        with cursor.copy(
+            "COPY tasks (id, title, description, column_id, board_id, due_date, priority, order_index, is_deleted) FROM STDIN"
+        ) as copy:
+            for column_id, _, _, board_id, board_number, column_number in columns:
+                for row in generator.column_tasks(column_id, board_id, board_number, column_number, user_ids, assignee_rows):
+                    copy.write_row(row)
+                    task_count += 1
+        with cursor.copy("COPY task_assignees (task_id, board_id, user_id) FROM STDIN") as copy:
+            for row in assignee_rows:
+                copy.write_row(row)
+        # COPY bypasses the API hooks, so count the new boards' statistics here, in one statement
+        # built by board_stats (the aggregation its rebuilds use)
+        counters = board_stats.count_boards([row[0] for row in boards]).compile(
+            dialect=psycopg.dialect(), compile_kwargs={"render_postcompile": True}
+        )
+        cursor.execute(str(counters), counters.params)
+        cursor.execute(CREATED_TRANSITIONS_SQL, {"board_ids": [row[0] for row in boards]})
+    connection.commit()
+    return len(columns), task_count, len(assignee_rows)
+
+
+def seed_database(args):
+    generator = Generator(args)
+    connection = get_copy_connection()
+    try:
+        user_ids = ensure_users(connection, args)
+        totals = [0, 0, 0]
+        start = time.perf_counter()
+        for first_board in range(0, args.boards, args.batch_boards):
+            board_count = min(args.batch_boards, args.boards - first_board)
+            for i, count in enumerate(seed_batch(connection, generator, user_ids, first_board, board_count)):
+                totals[i] += count
+            elapsed = time.perf_counter() - start
+            print(f"  boards {first_board + board_count}/{args.boards}: "
+                  f"{totals[1]:,} tasks, {totals[2]:,} assignee links "
+                  f"({totals[1] / elapsed:,.0f} tasks/s)")
+        print(f"Seeding complete in {time.perf_counter() - start:.1f}s: {args.boards} boards, "
+              f"{totals[0]:,} columns, {totals[1]:,} tasks, {totals[2]:,} assignee links")
+        return True
+    except Exception as e:
+        connection.rollback()
+        print(f"Error seeding database: {e}")
+        return False
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="Seed users (board owners and assignees)")
+    parser.add_argument("--boards", type=int, default=100)
+    parser.add_argument("--columns-per-board", type=int, default=4)
+    parser.add_argument("--tasks-per-column", type=parse_range, default=(10, 50), help="N or MIN-MAX")
+    parser.add_argument("--assignees-per-task", type=parse_range, default=(0, 2), help="N or MIN-MAX")
+    parser.add_argument("--description-size", type=parse_range, default=(0, 200), help="Characters, N or MIN-MAX")
+    parser.add_argument("--deleted-ratio", type=float, default=0.05, help="Fraction of tasks soft-deleted")
+    parser.add_argument("--due-ratio", type=float, default=0.3, help="Fraction of tasks with a due date")
+    parser.add_argument("--batch-boards", type=int, default=50, help="Boards per COPY batch/transaction")
+    parser.add_argument("--email-prefix", default="seed-user-")
+    parser.add_argument("--password", default="seed-password", help="Password for created seed users")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible datasets")
+    args = parser.parse_args()
+
+    success = seed_database(args)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Shared fixtures. Tests on the database need a snapshot (see pytest_db.py):
+
+    python reset_db.py snapshot kanban_test
+    pytest --db-snapshot kanban_test
+"""
+import dataclasses
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import configure, get_settings
+
+pytest_plugins = ["pytest_db"]
+
+API = "/api/v1"
+
+
+class ApiClient(TestClient):
+    """Paths are relative to the API prefix, as with the bench scripts' clients."""
+
+    def request(self, method, url, **kwargs):
+        return super().request(method, API + url, **kwargs)
+
+
+def log_in(client):
+    """Register a new user and send their token with every request of ``client``."""
+    email = f"test-{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/auth/register", json={"email": email, "password": "secret", "full_name": "Test"}).raise_for_status()
+    token = client.post("/auth/token", data={"username": email, "password": "secret"})
+    token.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {token.json()['access_token']}"
+    return client
+
+
+def make_board(client, columns=3, tasks=24) -> str:
+    """A board of ``columns`` columns, with ``tasks`` tasks dealt round them."""
+    board = client.post("/boards/", json={
+        "name": "test board",
+        "columns": [{"name": f"Column {i}", "order_index": i} for i in range(columns)],
+    }).json()
+    for i in range(tasks):
+        column_id = board["columns"][i % columns]["id"]
+        client.post("/tasks/", json={"title": f"Task {i}", "column_id": column_id}).raise_for_status()
+    return board["id"]
+
+
+def read_board(client, board_id) -> dict:
+    """The board as stored in Postgres (?stream=true bypasses the board engine)."""
+    response = client.get(f"/boards/{board_id}", params={"stream": "true"})
+    response.raise_for_status()
+    return response.json()
+
+
+@pytest.fixture
+def make_client(kanban_database):
+    """Build an app on the run's database (``make_client(**settings)``) and log a new user in to it."""
+    settings = get_settings()
+    clients = []
+
+    def make(**overrides):
+        from app.main import create_app
+        app = create_app(dataclasses.replace(get_settings(), rate_limit_enabled=False, **overrides))
+        client = ApiClient(app)
+        client.__enter__() # Runs the lifespan: job workers, board engine
+        clients.append(client)
+        return log_in(client)
+
+    yield make
+    for client in reversed(clients):
+        client.__exit__(None, None, None)
+    configure(settings)
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client()
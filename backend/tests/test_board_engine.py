@@ -0,0 +1,259 @@
+"""The board engine's write-ahead log, recovery, and what happens when the log fails."""
+import asyncio
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from uuid import UUID
+
+import httpx
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import get_settings
+from app.db.database import SessionLocal
+from app.models.board import Board
+from app.models.task import Task
+from app.services import board_wal
+from app.services.board_engine import BoardEngine, claim, recover_dead_owners
+from app.services.board_wal import WriteAheadLog, read_log
+from .conftest import API, log_in, make_board, read_board
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def board_state(board) -> dict:
+    """Task ids and titles per column, in order; empty columns left out."""
+    return {
+        column["id"]: [(task["id"], task["title"]) for task in sorted(column["tasks"], key=lambda task: task["order_index"])]
+        for column in board["columns"] if column["tasks"]
+    }
+
+
+def stored_state(db, board_id) -> dict:
+    state = {}
+    for column_id, task_id, title in db.execute(
+        select(Task.column_id, Task.id, Task.title)
+        .where(Task.board_id == board_id, Task.is_deleted == False)
+        .order_by(Task.column_id, Task.order_index)
+    ):
+        state.setdefault(str(column_id), []).append((str(task_id), title))
+    return state
+
+
+def moved(state: dict, task_id: str, column_id: str, index: int) -> dict:
+    state = {column: list(tasks) for column, tasks in state.items()}
+    for column, tasks in state.items():
+        for task in tasks:
+            if task[0] == task_id:
+                tasks.remove(task)
+                break
+        else:
+            continue
+        break
+    destination = state.setdefault(column_id, [])
+    destination.insert(max(0, min(index, len(destination))), task)
+    return {column: tasks for column, tasks in state.items() if tasks}
+
+
+def write_log(directory, owner: str, records) -> int:
+    """Append ``records`` to a new log of ``owner`` and close it (unlocked, as if its process died)."""
+    async def write():
+        wal = WriteAheadLog(str(directory), owner)
+        wal.open()
+        lsn = 0
+        for record in records:
+            lsn = wal.append(record)
+        await wal.wait_durable(lsn)
+        await wal.close(remove=False)
+        return lsn
+    return asyncio.run(write())
+
+
+# --- The log ---
+
+def test_log_group_commit_and_torn_tail(tmp_path, monkeypatch):
+    fsyncs = []
+    fsync = os.fsync
+    monkeypatch.setattr(board_wal.os, "fsync", lambda fd: fsyncs.append(fd) or fsync(fd))
+
+    async def write():
+        wal = WriteAheadLog(str(tmp_path), "owner")
+        wal.open()
+        opened = len(fsyncs)
+        # Appended before the writer runs: one fsync for all three
+        lsns = [wal.append({"n": n}) for n in range(3)]
+        await wal.wait_durable(lsns[-1])
+        assert len(fsyncs) == opened + 1
+        await wal.wait_durable(wal.append({"n": 3}))
+        assert len(fsyncs) == opened + 2
+        assert wal.durable_lsn == wal.last_lsn == 4
+        await wal.close(remove=False)
+    asyncio.run(write())
+
+    assert [record["lsn"] for record in read_log(str(tmp_path), "owner")] == [1, 2, 3, 4]
+    segment, = board_wal.segments(str(tmp_path), "owner")
+    with open(segment, "rb") as f:
+        data = f.read()
+
+    # A crash during the last write: the torn record and nothing after it is read
+    with open(segment, "wb") as f:
+        f.write(data[:-5])
+    assert [record["n"] for record in read_log(str(tmp_path), "owner")] == [0, 1, 2]
+
+    # A record that fails its CRC ends the log too
+    lines = data.splitlines(keepends=True)
+    lines[1] = lines[1].replace(b'"n":1', b'"n":7')
+    with open(segment, "wb") as f:
+        f.write(b"".join(lines))
+    assert [record["n"] for record in read_log(str(tmp_path), "owner")] == [0]
+
+
+def test_failed_log_refuses_changes(tmp_path):
+    async def write():
+        wal = WriteAheadLog(str(tmp_path), "owner")
+        wal.open()
+        await wal.wait_durable(wal.append({"n": 0}))
+
+        def fail(lines):
+            raise OSError("No space left on device")
+        wal._write_lines = fail
+        lsn = wal.append({"n": 1})
+        with pytest.raises(RuntimeError):
+            await wal.wait_durable(lsn)
+        assert wal.durable_lsn == 1 and wal.failed is not None
+        with pytest.raises(RuntimeError):
+            wal.append({"n": 2})
+        await wal.close(remove=False)
+    asyncio.run(write())
+    assert [record["n"] for record in read_log(str(tmp_path), "owner")] == [0]
+
+
+# --- Recovery ---
+
+def test_recovery_replays_records_past_engine_lsn(client, db_session, tmp_path):
+    board_id = make_board(client, tasks=6)
+    board = read_board(client, board_id)
+    first, second = (task["id"] for task in board["columns"][0]["tasks"][:2])
+    doing = board["columns"][1]["id"]
+    owner = "dead-engine"
+    assert claim(db_session, board_id, owner)
+    logged = {"board": board_id, "at": datetime.now(timezone.utc).isoformat(), "actor": board["created_by"]}
+    write_log(tmp_path, owner, [
+        {**logged, "op": "move", "task": first, "column": doing, "index": 0},
+        {**logged, "op": "move", "task": second, "column": doing, "index": 0},
+        {**logged, "op": "edit", "task": second, "changes": {"title": "Recovered"}, "fields": ["title"]},
+    ])
+    # Postgres has applied LSN 1: recovery replays only 2 and 3
+    db_session.execute(update(Board).where(Board.id == board_id).values(engine_lsn=1))
+    db_session.commit()
+
+    assert recover_dead_owners(SessionLocal, str(tmp_path)) == (1, 2)
+    expected = moved(board_state(board), second, doing, 0)
+    expected[doing][0] = (second, "Recovered")
+    assert board_state(read_board(client, board_id)) == expected
+    assert db_session.scalar(select(Board.engine_owner).where(Board.id == board_id)) is None
+    assert os.listdir(tmp_path) == [] # The dead owner's log is gone once recovered
+
+
+def test_change_the_log_failed_to_take_is_not_written(client, db_session, tmp_path):
+    board_id = make_board(client, tasks=6)
+    board = read_board(client, board_id)
+    first, second = (UUID(task["id"]) for task in board["columns"][0]["tasks"][:2])
+    done = UUID(board["columns"][2]["id"])
+    user_id = UUID(board["created_by"])
+
+    async def run():
+        # Nothing is flushed by the clock: only the release after the failure writes Postgres
+        engine = BoardEngine(SessionLocal, enabled=True, wal_dir=str(tmp_path), promote_after=1, flush_interval=3600)
+        await engine.start()
+        try:
+            engine.touch(board_id)
+            assert await engine._resident(board_id) is not None
+            db = SessionLocal()
+            try:
+                await engine.move_task(db, first, done, 0, None, user_id) # Acknowledged
+
+                def fail(lines):
+                    raise OSError("No space left on device")
+                engine.wal._write_lines = fail
+                with pytest.raises(RuntimeError):
+                    await engine.move_task(db, second, done, 0, None, user_id)
+            finally:
+                db.close()
+            assert not engine._boards # Released from the log, not from memory
+        finally:
+            await engine.stop()
+    asyncio.run(run())
+
+    stored = read_board(client, board_id)
+    assert board_state(stored) == moved(board_state(board), str(first), str(done), 0)
+    assert db_session.scalar(select(Board.engine_owner).where(Board.id == board_id)) is None
+
+
+# --- A real crash ---
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_kill_9_loses_no_acknowledged_change(kanban_database, db_session, tmp_path):
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": kanban_database,
+        "SECRET_KEY": get_settings().secret_key,
+        "BOARD_ENGINE_ENABLED": "true",
+        "BOARD_ENGINE_PROMOTE_AFTER": "1",
+        "BOARD_ENGINE_FLUSH_INTERVAL": "3600", # Every change is only in the log when the server dies
+        "BOARD_ENGINE_WAL_DIR": str(tmp_path),
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env, start_new_session=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        http = httpx.Client(base_url=f"http://127.0.0.1:{port}{API}", timeout=30)
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+                break
+            except httpx.HTTPError:
+                assert server.poll() is None and time.monotonic() < deadline, "the server did not start"
+                time.sleep(0.2)
+        log_in(http)
+        board_id = make_board(http, tasks=12)
+        board = read_board(http, board_id)
+        http.get(f"/boards/{board_id}") # Promotes the board
+        while http.get("/metrics/").json()["board_engine"]["boards"] != 1:
+            assert time.monotonic() < deadline, "the board was not promoted"
+            time.sleep(0.1)
+
+        rng = random.Random(3)
+        task_ids = [task["id"] for column in board["columns"] for task in column["tasks"]]
+        column_ids = [column["id"] for column in board["columns"]]
+        for n in range(30):
+            task_id = rng.choice(task_ids)
+            if n % 3:
+                body = {"column_id": rng.choice(column_ids), "order_index": rng.randint(0, 8)}
+                http.put(f"/tasks/{task_id}/move", json=body).raise_for_status()
+            else:
+                http.put(f"/tasks/{task_id}", json={"title": f"Renamed {n}"}).raise_for_status()
+        acknowledged = board_state(http.get(f"/boards/{board_id}").json()) # From memory
+        assert http.get("/metrics/").json()["board_engine"]["changes"] == 30
+    finally:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+
+    assert stored_state(db_session, board_id) == board_state(board) # Nothing reached Postgres
+    assert recover_dead_owners(SessionLocal, str(tmp_path)) == (1, 30)
+    assert stored_state(db_session, board_id) == acknowledged
+    assert db_session.scalar(select(Board.engine_owner).where(Board.id == board_id)) is None
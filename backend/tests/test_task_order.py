@@ -0,0 +1,97 @@
+"""Ordering invariants under concurrent writes: bench/order_stress.py in miniature."""
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.models.board_stats import BoardCounter
+from app.services.board_stats import rebuild_board
+from .conftest import make_board, read_board
+
+
+def positions_problems(board) -> list:
+    problems = []
+    column_positions = sorted(column["order_index"] for column in board["columns"])
+    if column_positions != list(range(len(column_positions))):
+        problems.append(f"column positions {column_positions}")
+    for column in board["columns"]:
+        positions = sorted(task["order_index"] for task in column["tasks"])
+        if positions != list(range(len(positions))):
+            duplicates = sorted(p for p, n in Counter(positions).items() if n > 1)
+            problems.append(f"column {column['id']}: positions {positions}, duplicates {duplicates}")
+    return problems
+
+
+def test_new_board_positions(client):
+    board_id = make_board(client)
+    board = read_board(client, board_id)
+    assert [len(column["tasks"]) for column in board["columns"]] == [8, 8, 8]
+    assert positions_problems(board) == []
+
+
+def test_concurrent_writes_keep_positions_gap_free(client):
+    board_id = make_board(client)
+    board = read_board(client, board_id)
+    column_ids = [column["id"] for column in board["columns"]]
+    task_ids = [task["id"] for column in board["columns"] for task in column["tasks"]]
+    rng = random.Random(7)
+    requests = []
+    for _ in range(300):
+        operation = rng.choices(("move", "create", "delete", "column_move"), (70, 12, 12, 6))[0]
+        if operation == "move":
+            requests.append(("PUT", f"/tasks/{rng.choice(task_ids)}/move",
+                             {"column_id": rng.choice(column_ids), "order_index": rng.randint(0, 12)}))
+        elif operation == "create":
+            requests.append(("POST", "/tasks/", {"title": "Raced", "column_id": rng.choice(column_ids)}))
+        elif operation == "delete":
+            requests.append(("DELETE", f"/tasks/{rng.choice(task_ids)}", None))
+        else:
+            requests.append(("PUT", f"/boards/{board_id}/columns/{rng.choice(column_ids)}/move",
+                             {"new_order_index": rng.randint(0, 3)}))
+
+    def send(request):
+        method, url, body = request
+        return client.request(method, url, json=body).status_code
+
+    with ThreadPoolExecutor(8) as pool:
+        statuses = Counter(pool.map(send, requests))
+
+    # 409: a conflicting writer won; 404: the task was deleted meanwhile
+    assert set(statuses) <= {200, 404, 409}, statuses
+    assert statuses[200] > len(requests) // 2, statuses
+    assert positions_problems(read_board(client, board_id)) == []
+
+
+def test_deleted_column_refuses_tasks(client):
+    board_id = make_board(client, tasks=6)
+    board = read_board(client, board_id)
+    kept, deleted = board["columns"][0], board["columns"][1]
+    assert client.delete(f"/boards/{board_id}/columns/{deleted['id']}").status_code == 202
+
+    task_id = kept["tasks"][0]["id"]
+    assert client.put(f"/tasks/{task_id}/move", json={"column_id": deleted["id"], "order_index": 0}).status_code == 404
+    assert client.post("/tasks/", json={"title": "Late", "column_id": deleted["id"]}).status_code == 404
+    assert positions_problems(read_board(client, board_id)) == []
+
+
+def counters(db, board_id) -> dict:
+    rows = db.execute(select(BoardCounter).where(BoardCounter.board_id == board_id, BoardCounter.count != 0)).scalars()
+    return {(row.dimension, row.key): row.count for row in rows}
+
+
+def test_counters_match_a_rebuild(make_client, db_session):
+    # No job workers: the deleted column's tasks stay live in the table, and the
+    # counters must already leave them out
+    client = make_client(job_workers=0)
+    board_id = make_board(client, tasks=9)
+    board = read_board(client, board_id)
+    client.delete(f"/boards/{board_id}/columns/{board['columns'][2]['id']}").raise_for_status()
+    task_id = board["columns"][0]["tasks"][0]["id"]
+    client.put(f"/tasks/{task_id}/move", json={"column_id": board["columns"][1]["id"], "order_index": 0}).raise_for_status()
+
+    maintained = counters(db_session, board_id)
+    rebuild_board(db_session, board_id)
+    assert counters(db_session, board_id) == maintained
+    assert maintained[("column", board["columns"][1]["id"])] == 4
+    db_session.rollback()